@@ -1,47 +1,58 @@
+import os
 import re
-import cv2
+import sys
+from collections import OrderedDict
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPlainTextEdit, QLabel, QSizePolicy
-from PyQt6.QtGui import QFont, QColor, QPainter, QImage, QPixmap
-from PyQt6.QtCore import Qt
-
-
-def parse_ass_styles(ass_text):
-    styles = {}
-    lines = ass_text.splitlines()
-    style_section = False
-
-    for line in lines:
-        if line.strip().lower().startswith("[v4+ styles]"):
-            style_section = True
-            continue
-        if style_section and line.strip().lower().startswith("format:"):
-            continue
-        if style_section and line.strip().lower().startswith("style:"):
-            parts = line.split(",")
-            if len(parts) >= 10:
-                name = parts[0].split(":")[1].strip()
-                font_name = parts[1].strip()
-                font_size = int(float(parts[2].strip()))
-                primary_color = parts[3].strip()
-                outline_color = parts[4].strip()
-                bold = parts[7].strip() == "-1"
-                italic = parts[8].strip() == "-1"
-                alignment = int(parts[11].strip()) if parts[11].strip().isdigit() else 2
-                outline_width = int(parts[16].strip()) if len(parts) > 16 and parts[16].strip().isdigit() else 1
-                shadow = int(parts[17].strip()) if len(parts) > 17 and parts[17].strip().isdigit() else 0
-
-                styles[name] = {
-                    "font": font_name,
-                    "size": font_size,
-                    "color": ass_color_to_qcolor(primary_color),
-                    "outline_color": ass_color_to_qcolor(outline_color),
-                    "bold": bold,
-                    "italic": italic,
-                    "alignment": alignment,
-                    "outline_width": outline_width,
-                    "shadow": shadow
-                }
-    return styles
+from PyQt6.QtGui import QFont, QFontMetricsF, QColor, QPainter, QPainterPath, QPen, QBrush, QPixmap
+from PyQt6.QtCore import Qt, QTimer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.subtitle_document import SubtitleEvent
+from scripts.ass_index import AssLineIndex
+
+
+DEFAULT_PREVIEW_STYLE = {
+    "font": "Arial",
+    "size": 24,
+    "color": QColor("white"),
+    "outline_color": QColor("black"),
+    "bold": False,
+    "italic": False,
+    "alignment": 2,
+    "outline_width": 2,
+    "shadow": 1
+}
+
+ALIGN_MAP = {
+    1: Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom,
+    2: Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom,
+    3: Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignBottom,
+    4: Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+    5: Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter,
+    6: Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+    7: Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+    8: Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
+    9: Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignTop,
+}
+DEFAULT_ALIGNMENT = Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom
+
+# Cues this many lines above and below the cursor get their frames decoded ahead
+PREFETCH_LINES = 5
+
+
+def style_to_preview(style):
+    """Preview attributes (QColors, flags) for a SubtitleStyle."""
+    return {
+        "font": style.fontname,
+        "size": int(style.fontsize),
+        "color": ass_color_to_qcolor(style.primary_colour),
+        "outline_color": ass_color_to_qcolor(style.outline_colour),
+        "bold": style.bold != 0,
+        "italic": style.italic != 0,
+        "alignment": style.alignment,
+        "outline_width": int(style.outline),
+        "shadow": int(style.shadow),
+    }
 
 
 def parse_inline_tags(text, base_style):
@@ -83,75 +94,154 @@ def ass_color_to_qcolor(c):
         return QColor("white")
 
 
+def style_key(style):
+    """Hashable form of a preview style dict (QColors aren't hashable)."""
+    return (style["font"], style["size"], style["bold"], style["italic"], style["color"].rgba(),
+            style["outline_color"].rgba(), style.get("outline_width", 1), style.get("shadow", 0))
+
+
 class SubtitleLabel(QWidget):
+    # Rendered subtitle overlays by (lines, widget size, device pixel ratio),
+    # shared by every label; a repaint of something already seen is one blit
+    PIXMAP_CACHE_SIZE = 64
+    pixmap_cache = OrderedDict()
+    font_cache = {}
+
     def __init__(self):
         super().__init__()
-        self.chunks = []
-        self.alignment = Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom
+        self.lines = []  # (chunks, alignment), in render order
+        self.lines_key = ()
         
 
     def setChunksAndAlignment(self, chunks, alignment):
-        self.chunks = chunks
-        self.alignment = alignment
+        self.setLines([(chunks, alignment)] if chunks else [])
+
+    def setLines(self, lines):
+        """Several events on screen at once; ones sharing an alignment stack like libass does."""
+        lines_key = tuple((tuple((text, style_key(style)) for text, style in chunks), alignment)
+                          for chunks, alignment in lines)
+        if lines_key == self.lines_key:
+            return
+        self.lines = lines
+        self.lines_key = lines_key
         self.update()
 
     def paintEvent(self, event):
+        if not self.lines:
+            return
+        ratio = self.devicePixelRatioF()
+        key = (self.lines_key, self.width(), self.height(), ratio)
+        pixmap = self.pixmap_cache.get(key)
+        if pixmap is None:
+            pixmap = self.render_lines(ratio)
+            self.pixmap_cache[key] = pixmap
+            while len(self.pixmap_cache) > self.PIXMAP_CACHE_SIZE:
+                self.pixmap_cache.popitem(last=False)
+        else:
+            self.pixmap_cache.move_to_end(key)
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
-        rect = self.rect()
+        painter.drawPixmap(0, 0, pixmap)
 
-        total_width = 0
-        for text, style in self.chunks:
+    @classmethod
+    def font_for(cls, style):
+        """(QFont, QFontMetricsF) for a style, built once per font/size/weight."""
+        key = (style["font"], style["size"], style["bold"], style["italic"])
+        if key not in cls.font_cache:
             font = QFont(style["font"], style["size"])
             font.setBold(style["bold"])
             font.setItalic(style["italic"])
-            painter.setFont(font)
-            total_width += painter.fontMetrics().horizontalAdvance(text)
+            cls.font_cache[key] = (font, QFontMetricsF(font))
+        return cls.font_cache[key]
 
-        if self.alignment & Qt.AlignmentFlag.AlignHCenter:
-            x = (rect.width() - total_width) // 2
-        elif self.alignment & Qt.AlignmentFlag.AlignRight:
-            x = rect.width() - total_width
-        else:
-            x = 0
-        y = rect.height() - 20 if self.alignment & Qt.AlignmentFlag.AlignBottom else rect.height() // 2
-
-        for text, style in self.chunks:
-            font = QFont(style["font"], style["size"])
-            font.setBold(style["bold"])
-            font.setItalic(style["italic"])
-            painter.setFont(font)
+    def render_lines(self, ratio):
+        """Draw every line into a transparent pixmap the size of the widget."""
+        rect = self.rect()
+        pixmap = QPixmap(int(rect.width() * ratio), int(rect.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        stacked = {}  # vertical alignment -> height already used
+        for chunks, alignment in self.lines:
+            total_width = 0
+            line_height = 0
+            for text, style in chunks:
+                _, metrics = self.font_for(style)
+                total_width += metrics.horizontalAdvance(text)
+                line_height = max(line_height, metrics.height())
+
+            if alignment & Qt.AlignmentFlag.AlignHCenter:
+                x = (rect.width() - total_width) / 2
+            elif alignment & Qt.AlignmentFlag.AlignRight:
+                x = rect.width() - total_width
+            else:
+                x = 0
+            vertical = alignment & (Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignTop)
+            offset = stacked.get(vertical, 0)
+            stacked[vertical] = offset + line_height
+            if alignment & Qt.AlignmentFlag.AlignBottom:
+                y = rect.height() - 20 - offset
+            elif alignment & Qt.AlignmentFlag.AlignTop:
+                y = 20 + line_height + offset
+            else:
+                y = rect.height() // 2 + offset
+
+            self.paint_chunks(painter, chunks, x, y)
+        painter.end()
+        return pixmap
+
+    def paint_chunks(self, painter, chunks, x, y):
+        """Each chunk's glyphs as one path: shadow, then a stroked outline, then the fill."""
+        for text, style in chunks:
+            font, metrics = self.font_for(style)
+            path = QPainterPath()
+            path.addText(x, y, font, text)
 
             outline_width = style.get("outline_width", 1)
             shadow = style.get("shadow", 0)
+            outline = QBrush(style["outline_color"])
 
             if shadow > 0:
-                painter.setPen(style["outline_color"])
-                painter.drawText(x + shadow, y + shadow, text)
+                painter.fillPath(path.translated(shadow, shadow), outline)
 
             if outline_width > 0:
-                painter.setPen(style["outline_color"])
-                for dx in range(-outline_width, outline_width + 1):
-                    for dy in range(-outline_width, outline_width + 1):
-                        if dx != 0 or dy != 0:
-                            painter.drawText(x + dx, y + dy, text)
+                pen = QPen(outline, outline_width * 2)
+                pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
+                painter.strokePath(path, pen)
 
-            painter.setPen(style["color"])
-            painter.drawText(x, y, text)
-            x += painter.fontMetrics().horizontalAdvance(text)
+            painter.fillPath(path, QBrush(style["color"]))
+            x += metrics.horizontalAdvance(text)
 
 
 class ASSPreview(QWidget):
     def __init__(self):
         super().__init__()
         self.styles = {}
+        self.styles_version = None
         self.video_path = None
+        self.frame_server = None
+        self.frame_ms = None  # frame last asked for
+        self.frame_shown_ms = None  # frame on screen
+
+        # Each editor line parsed once, then re-parsed only when an edit touches it
+        self.ass_index = AssLineIndex([""])
+        self.block_count = 1
+        self.shown_events = None
+        self.preview_block = None
 
         main_layout = QVBoxLayout(self)
 
         self.editor = QPlainTextEdit()
         self.editor.setPlaceholderText("Paste or load your ASS file contents...")
-        self.editor.cursorPositionChanged.connect(self.update_preview)
+        self.editor.document().contentsChange.connect(self.apply_contents_change)
+
+        # Cursor moves and edits only restart this timer; the preview is drawn once they settle
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(50)
+        self.preview_timer.timeout.connect(self.update_preview)
+        self.editor.cursorPositionChanged.connect(self.preview_timer.start)
 
         self.video_frame = QLabel()
         self.video_frame.setMinimumHeight(200)
@@ -172,83 +262,119 @@ class ASSPreview(QWidget):
 
     def set_ass_text(self, text):
         self.editor.setPlainText(text)
-        self.styles = parse_ass_styles(text)
 
-    def set_video_preview(self, video_path):
+    def apply_contents_change(self, position, chars_removed, chars_added):
+        """Re-parse just the lines (blocks) an edit replaced."""
+        document = self.editor.document()
+        first = document.findBlock(position).blockNumber()
+        last_block = document.findBlock(position + chars_added)
+        last = last_block.blockNumber() if last_block.isValid() else document.blockCount() - 1
+        removed = last - first + 1 - (document.blockCount() - self.block_count)
+
+        lines = []
+        block = document.findBlockByNumber(first)
+        for _ in range(last - first + 1):
+            lines.append(block.text())
+            block = block.next()
+
+        if removed < 0 or first + removed > len(self.ass_index):
+            self.ass_index.reset(document.toPlainText().split("\n"))  # shouldn't happen; resync
+        else:
+            self.ass_index.replace(first, removed, lines)
+        self.block_count = document.blockCount()
+        self.shown_events = None
+        self.preview_block = None
+        self.preview_timer.start()
+
+    def preview_styles(self):
+        """Preview attributes of every style, recomputed only after a Style: line changes."""
+        if self.styles_version != self.ass_index.styles_version:
+            self.styles = {name: style_to_preview(style) for name, style in self.ass_index.styles.items()}
+            self.styles_version = self.ass_index.styles_version
+        return self.styles
+
+    def attach_player(self, player):
+        """Follow a QMediaPlayer: show the events on screen at its position while it plays or seeks."""
+        player.positionChanged.connect(self.show_time)
+
+    def show_time(self, ms):
+        # The frame follows the player on every tick. The frame server keeps
+        # only the newest request and caches by frame index, so this neither
+        # queues up decodes nor repeats them within one frame
+        self.show_frame(ms)
+        events = self.ass_index.cues.at(ms)
+        shown = [id(event) for event in events]
+        if shown == self.shown_events:
+            return  # same cues as the last tick
+        self.shown_events = shown
+        self.preview_block = None
+        self.subtitle_label.setLines([self.event_chunks(event) for event in events])
+
+    def event_chunks(self, event):
+        """(chunks, alignment) to draw one event with its style and inline tags."""
+        base_style = self.preview_styles().get(event.style, DEFAULT_PREVIEW_STYLE)
+        chunks = parse_inline_tags(event.text.replace("\n", " "), base_style)
+        return chunks, ALIGN_MAP.get(base_style["alignment"], DEFAULT_ALIGNMENT)
+
+    def set_video_preview(self, video_path, frame_server):
+        """Show frames of video_path under the preview, decoded by frame_server."""
         self.video_path = video_path
-        cap = cv2.VideoCapture(video_path)
-        ret, frame = cap.read()
-        cap.release()
-        if ret:
-            h, w, _ = frame.shape
-            crop_h = h // 3  # bottom third
-            frame_bottom = frame[h - crop_h :, :, :]
-            frame_bottom = cv2.cvtColor(frame_bottom, cv2.COLOR_BGR2RGB)
-
-            # Convert to QImage
-            qimg = QImage(
-                frame_bottom.data,
-                frame_bottom.shape[1],
-                frame_bottom.shape[0],
-                frame_bottom.strides[0],
-                QImage.Format.Format_RGB888,
-            )
-
-            # Scale to fit the fixed label size, keeping aspect ratio
-            pixmap = QPixmap.fromImage(qimg).scaled(
-                self.video_frame.width(),
-                self.video_frame.height(),
-                Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.video_frame.setPixmap(pixmap)
-    def update_preview(self):
-        try:
-            ass_text = self.editor.toPlainText()
-            self.styles = parse_ass_styles(ass_text)
-            
-            cursor = self.editor.textCursor()
-            cursor.select(cursor.SelectionType.LineUnderCursor)
-            current_line = cursor.selectedText()
-
-            if current_line.lower().startswith("dialogue:"):
-                parts = current_line.split(",")
-                if len(parts) >= 10:
-                    style_name = parts[3].strip()
-                    dialogue_text = ",".join(parts[9:])
-                    print(style_name)
-                    print(self.styles.get(style_name))
-                    base_style = self.styles.get(style_name, {
-                        "font": "Arial",
-                        "size": 24,
-                        "color": QColor("white"),
-                        "outline_color": QColor("black"),
-                        "bold": False,
-                        "italic": False,
-                        "alignment": 2,
-                        "outline_width": 2,
-                        "shadow": 1
-                    })
-
-                    chunks = parse_inline_tags(dialogue_text, base_style)
-                    align_map = {
-                        1: Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom,
-                        2: Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom,
-                        3: Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignBottom,
-                        4: Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
-                        5: Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter,
-                        6: Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
-                        7: Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
-                        8: Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
-                        9: Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignTop,
-                    }
-                    self.subtitle_label.setChunksAndAlignment(
-                        chunks, align_map.get(base_style["alignment"], Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom)
-                    )
-                    return
-
-            self.subtitle_label.setChunksAndAlignment([], Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom)
-        except Exception as e:
-            self.subtitle_label.setChunksAndAlignment([], Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom)
+        self.frame_server = frame_server
+        self.frame_ms = None
+        self.frame_shown_ms = None
+        frame_server.frame_ready.connect(self.frame_ready)
+        self.show_frame(0)
+
+    def frame_size(self):
+        return max(1, self.video_frame.width()), max(1, self.video_frame.height())
+
+    def show_frame(self, ms):
+        """Put the bottom third of the frame at ms behind the subtitle overlay."""
+        if self.frame_server is None or ms == self.frame_ms:
             return
+        self.frame_ms = ms
+        image = self.frame_server.request("preview", ms, *self.frame_size(), bottom=1 / 3)
+        if image is not None:
+            self.set_frame(ms, image)
+
+    def frame_ready(self, tag, ms, image):
+        # While playing, the frame asked for has usually moved on by the time
+        # a decode finishes; show it anyway until the latest one arrives
+        if tag == "preview" and self.frame_shown_ms != self.frame_ms:
+            self.set_frame(ms, image)
+
+    def set_frame(self, ms, image):
+        self.frame_shown_ms = ms
+        self.video_frame.setPixmap(QPixmap.fromImage(image))
+
+    def prefetch_frames(self, block):
+        """Have the frames of the cues a few lines around the cursor decoded ahead."""
+        if self.frame_server is None:
+            return
+        times = []
+        for distance in range(1, PREFETCH_LINES + 1):
+            for number in (block + distance, block - distance):
+                event = self.ass_index.entry(number)
+                if isinstance(event, SubtitleEvent) and not event.comment:
+                    times.append(event.start)
+        self.frame_server.prefetch(times, *self.frame_size(), bottom=1 / 3)
 
+    def update_preview(self):
+        """Preview the Dialogue line under the cursor from its already parsed event."""
+        block = self.editor.textCursor().blockNumber()
+        if block == self.preview_block:
+            return
+        self.preview_block = block
+        self.shown_events = None
+
+        event = self.ass_index.entry(block)
+        if isinstance(event, SubtitleEvent) and not event.comment:
+            self.show_frame(event.start)
+            self.prefetch_frames(block)
+        if isinstance(event, SubtitleEvent) and not event.comment and event.text:
+            try:
+                self.subtitle_label.setLines([self.event_chunks(event)])
+                return
+            except Exception:
+                pass
+        self.subtitle_label.setChunksAndAlignment([], DEFAULT_ALIGNMENT)
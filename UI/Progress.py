@@ -1,17 +1,378 @@
+import gc
+import threading
+from collections import OrderedDict, deque
+
 from PyQt6.QtCore import QThread, pyqtSignal
 
 
+def format_ffmpeg_progress(info):
+    """One-line summary of a run_ffmpeg progress dict for status labels."""
+    parts = []
+    if info.get("percent") is not None:
+        parts.append(f"{info['percent']:.1f}%")
+    if info.get("fps"):
+        parts.append(f"{info['fps']:.1f} fps")
+    if info.get("speed"):
+        parts.append(f"{info['speed']:.2f}x")
+    if info.get("eta") is not None:
+        minutes, seconds = divmod(int(info["eta"]), 60)
+        parts.append(f"ETA {minutes}:{seconds:02}")
+    return "  ".join(parts)
+
+
 class SubtitleWorker(QThread):
     finished = pyqtSignal()
+    progress = pyqtSignal(dict)  # run_ffmpeg progress dicts
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
 
-    def __init__(self, video_path, ass_text, output_path):
+    def __init__(self, video_path, ass_text, output_path, workers=1, smart=False, reuse_chunks=False):
         super().__init__()
         self.video_path = video_path
         self.ass_text = ass_text
         self.output_path = output_path
+        self.workers = workers
+        self.smart = smart
+        self.reuse_chunks = reuse_chunks
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
 
     def run(self):
         # Call your blocking function
         from scripts.add_subtitles_to_video import add_styled_subtitles
-        add_styled_subtitles(self.video_path, self.ass_text, self.output_path)
-        self.finished.emit()
\ No newline at end of file
+        from scripts.ffmpeg_runner import FFmpegCancelled
+        from scripts.render_cache import RenderCache
+        try:
+            add_styled_subtitles(self.video_path, self.ass_text, self.output_path,
+                                 progress_callback=self.progress.emit, cancel_event=self.cancel_event,
+                                 workers=self.workers, smart=self.smart,
+                                 cache=RenderCache() if self.reuse_chunks else None)
+        except FFmpegCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit()
+
+
+class ExportWorker(QThread):
+    """Writes every deliverable (soft/burned MP4 and sidecars) in one ffmpeg pass."""
+    done = pyqtSignal(dict)
+    progress = pyqtSignal(dict)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, video_path, srt_text, output_base, ass_text=None):
+        super().__init__()
+        self.video_path = video_path
+        self.srt_text = srt_text
+        self.output_base = output_base
+        self.ass_text = ass_text
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        from scripts.export import export_deliverables
+        from scripts.ffmpeg_runner import FFmpegCancelled
+        try:
+            paths = export_deliverables(self.video_path, self.srt_text, self.output_base, ass_text=self.ass_text,
+                                        progress_callback=self.progress.emit, cancel_event=self.cancel_event)
+        except FFmpegCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.done.emit(paths)
+
+
+class TranscriptionWorker(QThread):
+    """
+    Runs audio extraction and Whisper off the GUI thread, emitting each batch
+    of decoded segments as soon as it is available.
+    """
+    status = pyqtSignal(str)
+    segments_ready = pyqtSignal(list)
+    window_refined = pyqtSignal(float, float, list)  # window start, end, refined segments
+    progress = pyqtSignal(int)  # percent of audio transcribed
+    done = pyqtSignal(object)  # full whisper-style result
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, video_path, model_name, device, wav_path=None, workers=1, daemon_url=None, draft_model=None,
+                 journal_path=None, backend="whisper"):
+        super().__init__()
+        self.video_path = video_path
+        self.model_name = model_name
+        self.device = device
+        self.wav_path = wav_path
+        self.workers = workers
+        self.daemon_url = daemon_url
+        self.draft_model = draft_model
+        self.journal_path = journal_path
+        self.backend = backend
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        from scripts.create_subtitles import SubtitleGenerator
+
+        if self.daemon_url and self._run_on_daemon():
+            return
+
+        generator = SubtitleGenerator(model_name=self.model_name, device=self.device, backend=self.backend)
+        try:
+            self.status.emit("Extracting audio...")
+            if self.wav_path:
+                generator.extract_audio(self.video_path, self.wav_path)
+            audio = generator.load_audio(self.wav_path or self.video_path)
+            duration = max(len(audio) / 16000, 1e-6)
+
+            self.status.emit("Transcribing audio...")
+            if self.draft_model and self.draft_model != self.model_name:
+                self._run_two_pass(generator, audio, duration)
+            else:
+                if self.workers > 1:
+                    # Chunks come back in order as the pool finishes them
+                    stream = generator.iter_transcribe_parallel(audio, workers=self.workers,
+                                                                should_stop=self.isInterruptionRequested)
+                else:
+                    stream = generator.iter_transcribe(audio, should_stop=self.isInterruptionRequested,
+                                                       journal_path=self.journal_path)
+                for segments, position in stream:
+                    if segments:
+                        self.segments_ready.emit(segments)
+                    self.progress.emit(min(100, int(position / duration * 100)))
+
+            if self.isInterruptionRequested() or generator.last_result is None:
+                self._free_model(generator)
+                self.cancelled.emit()
+                return
+            self.progress.emit(100)
+            self.done.emit(generator.last_result)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _run_two_pass(self, generator, audio, duration):
+        """
+        Show a draft from the small model first, then re-transcribe each
+        window with the selected model and emit it to replace the draft.
+        """
+        self.status.emit(f"Drafting with {self.draft_model}...")
+        for segments, position in generator.iter_transcribe(audio, model_name=self.draft_model,
+                                                            should_stop=self.isInterruptionRequested):
+            if segments:
+                self.segments_ready.emit(segments)
+            self.progress.emit(min(50, int(position / duration * 50)))
+        if self.isInterruptionRequested():
+            return
+
+        self.status.emit(f"Draft ready, refining with {self.model_name}...")
+        generator.last_result = None
+        for start, end, segments in generator.iter_transcribe_windows(audio, model_name=self.model_name,
+                                                                      should_stop=self.isInterruptionRequested):
+            self.window_refined.emit(start, end, segments)
+            self.progress.emit(min(100, 50 + int(end / duration * 50)))
+
+    def _run_on_daemon(self):
+        """
+        Transcribe through the local server, which keeps models warm.
+        Returns False (so the caller runs in-process) if the server is
+        unreachable or its queue is full, or for a draft-first run, which
+        the server can't do. The server runs one pass with its own runners
+        and keeps no resume journal, so those settings are reported as not
+        applied.
+        """
+        from scripts.daemon import DaemonClient, DaemonBusy
+
+        if self.draft_model and self.draft_model != self.model_name:
+            self.status.emit("Transcription server can't draft first, transcribing locally...")
+            return False
+        client = DaemonClient(self.daemon_url)
+        if not client.is_available():
+            self.status.emit("Transcription server not running, transcribing locally...")
+            return False
+        ignored = []
+        if self.workers > 1:
+            ignored.append(f"{self.workers} workers")
+        if self.journal_path:
+            ignored.append("resume journal")
+        try:
+            if ignored:
+                self.status.emit(f"Transcribing on local server (not using {', '.join(ignored)})...")
+            else:
+                self.status.emit("Transcribing on local server...")
+            duration = None
+            stream = client.iter_transcribe(self.video_path, self.model_name, self.device, backend=self.backend)
+            for segments, position in stream:
+                if self.isInterruptionRequested():
+                    # Closing the stream makes the server cancel the job
+                    stream.close()
+                    self.cancelled.emit()
+                    return True
+                if segments:
+                    self.segments_ready.emit(segments)
+                if duration is None:
+                    from scripts.audio_stream import probe_duration
+                    duration = probe_duration(self.video_path) or 0
+                if duration:
+                    self.progress.emit(min(100, int(position / duration * 100)))
+        except DaemonBusy:
+            self.status.emit("Transcription server busy, transcribing locally...")
+            return False
+        except Exception as e:
+            self.failed.emit(str(e))
+            return True
+
+        if client.last_result is None:
+            if self.isInterruptionRequested():
+                self.cancelled.emit()
+            else:
+                self.failed.emit("Transcription server ended the job without a result")
+            return True
+        self.progress.emit(100)
+        self.done.emit(client.last_result)
+        return True
+
+    def _free_model(self, generator):
+        from scripts.model_cache import get_model_cache
+
+        get_model_cache().release(generator.model_name, generator.device, generator.precision, generator.backend)
+        gc.collect()
+
+
+class ModelPreloadWorker(QThread):
+    """Loads a Whisper model into the shared model cache off the GUI thread."""
+    status = pyqtSignal(str)
+
+    def __init__(self, model_name, device, backend="whisper"):
+        super().__init__()
+        self.model_name = model_name
+        self.device = device
+        self.backend = backend
+
+    def run(self):
+        from scripts.model_cache import get_model, default_precision, get_model_cache
+
+        precision = default_precision(self.device, self.backend)
+        if (self.model_name, self.device, precision, self.backend) in get_model_cache():
+            return
+        self.status.emit(f"Loading {self.model_name} model on {self.device} in the background...")
+        try:
+            get_model(self.model_name, self.device, precision, self.backend)
+        except Exception as e:
+            self.status.emit(f"Could not preload model: {e}")
+            return
+        self.status.emit(f"{self.model_name} model ready.")
+
+
+class FrameServer(QThread):
+    """
+    Serves preview frames of one video by timestamp from a single decoder
+    on this thread.
+
+    request() returns a cached QImage at once, or queues the decode and
+    emits frame_ready(tag, ms, image) when it's ready. Only the newest
+    request per tag is kept, so scrubbing never builds a backlog. prefetch()
+    decodes frames likely to be asked for next while nothing else is
+    waiting. Frames are shrunk to their requested size while decoding and
+    kept in an LRU cache under a byte budget.
+    """
+    frame_ready = pyqtSignal(str, int, object)  # tag, requested ms, QImage
+
+    def __init__(self, video_path, cache_bytes=64 * 1024 * 1024):
+        super().__init__()
+        self.video_path = video_path
+        self.cache_bytes = cache_bytes
+        self.cache = OrderedDict()  # (frame index, width, height, bottom, fit) -> QImage
+        self.cached_bytes = 0
+        self.requests = OrderedDict()  # tag -> (ms, width, height, bottom, fit)
+        self.prefetches = deque()
+        self.source = None
+        self.stopping = False
+        self.condition = threading.Condition()
+
+    def _key(self, ms, width, height, bottom, fit):
+        # Frame index needs the decoder's frame rate; before it's open, ms stands in
+        index = self.source.frame_index(ms) if self.source else ("ms", ms)
+        return index, width, height, bottom, fit
+
+    def request(self, tag, ms, width, height, bottom=1.0, fit="cover"):
+        with self.condition:
+            image = self.cache.get(self._key(ms, width, height, bottom, fit))
+            if image is not None:
+                self.cache.move_to_end(self._key(ms, width, height, bottom, fit))
+                self.requests.pop(tag, None)
+                return image
+            self.requests[tag] = (ms, width, height, bottom, fit)
+            self.requests.move_to_end(tag)
+            self.condition.notify()
+        return None
+
+    def prefetch(self, times, width, height, bottom=1.0, fit="cover"):
+        """Replace the prefetch queue with these timestamps, nearest first."""
+        with self.condition:
+            self.prefetches = deque((ms, width, height, bottom, fit) for ms in times)
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        from scripts.frame_source import FrameSource
+
+        try:
+            self.source = FrameSource(self.video_path)
+        except Exception as e:
+            print(f"Frame server could not open {self.video_path}: {e}")
+            return
+        try:
+            while True:
+                with self.condition:
+                    while not (self.stopping or self.requests or self.prefetches):
+                        self.condition.wait()
+                    if self.stopping:
+                        return
+                    if self.requests:
+                        tag, job = self.requests.popitem(last=False)
+                    else:
+                        tag, job = None, self.prefetches.popleft()
+                    key = self._key(*job)
+                    image = self.cache.get(key)
+
+                if image is None:
+                    image = self._decode(key)
+                if image is not None and tag is not None:
+                    self.frame_ready.emit(tag, job[0], image)
+        finally:
+            self.source.close()
+
+    def _decode(self, key):
+        from PyQt6.QtGui import QImage
+        from scripts.frame_source import prepare_frame
+
+        index, width, height, bottom, fit = key
+        frame = self.source.read(index)
+        if frame is None:
+            return None
+        rgb = prepare_frame(frame, width, height, bottom, fit)
+        image = QImage(rgb.data, rgb.shape[1], rgb.shape[0], rgb.strides[0],
+                       QImage.Format.Format_RGB888).copy()  # own the pixels, not numpy's
+
+        with self.condition:
+            if key not in self.cache:
+                self.cache[key] = image
+                self.cached_bytes += image.sizeInBytes()
+                while self.cached_bytes > self.cache_bytes and len(self.cache) > 1:
+                    _, evicted = self.cache.popitem(last=False)
+                    self.cached_bytes -= evicted.sizeInBytes()
+        return image
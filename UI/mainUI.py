@@ -3,19 +3,20 @@ import os
 from time import sleep
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QFileDialog,
-    QPlainTextEdit, QLabel, QTabWidget, QComboBox, QHBoxLayout, QSpinBox, QCheckBox
+    QPlainTextEdit, QLabel, QTabWidget, QComboBox, QHBoxLayout, QSpinBox, QCheckBox, QSlider
 )
-from PyQt6.QtMultimediaWidgets import QVideoWidget
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtCore import QUrl, Qt
-from PyQt6.QtGui import QImage, QPixmap
-from UI.Progress import SubtitleWorker
+from PyQt6.QtGui import QPixmap, QTextCursor
+from UI.Progress import (SubtitleWorker, TranscriptionWorker, ExportWorker, ModelPreloadWorker, FrameServer,
+                         format_ffmpeg_progress)
 from PyQt6.QtWidgets import QProgressBar
 
-import cv2
-
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from scripts.create_subtitles import SubtitleGenerator
+from scripts.word_table import WordTable
+from scripts.daemon import DEFAULT_URL as DEFAULT_DAEMON_URL
+from scripts.backends import BACKENDS, DEFAULT_BACKEND, available_backends
+from scripts.progressive import draft_model_for, parse_srt_cues, cue_key, merge_refined_window, line_edits
 from scripts.add_subtitles_to_video import convert_to_ass, add_styled_subtitles
 from UI.ASSPreview import ASSPreview
 from UI.LoadingOverlay import LoadingOverlay
@@ -27,6 +28,9 @@ class SubtitleApp(QWidget):
         self.setWindowTitle("Subtitle Generator")
         self.resize(900, 600)
         self.video_path = None
+        self.last_words = None  # WordTable of the last transcription, kept for re-segmenting
+        self.draft_cues = None  # cue key -> cue written by a draft pass still being refined
+        self.preload_pending = False  # selection changed while a preload was running
 
         # Tabs
         self.tabs = QTabWidget()
@@ -42,6 +46,8 @@ class SubtitleApp(QWidget):
         layout = QVBoxLayout(self)
         layout.addWidget(self.tabs)
 
+        self.preload_model()
+
     def init_tab1(self):
         layout = QVBoxLayout()
 
@@ -85,9 +91,17 @@ class SubtitleApp(QWidget):
         max_words_per_segment_layout.addWidget(QLabel("Max words per segment:"))
         max_words_per_segment_layout.addWidget(self.spin_max_words_per_segment)
 
+        parallel_workers_layout = QHBoxLayout()
+        self.spin_parallel_workers = QSpinBox()
+        self.spin_parallel_workers.setRange(1, os.cpu_count() or 1)
+        self.spin_parallel_workers.setValue(1)
+        parallel_workers_layout.addWidget(QLabel("Parallel workers (splits audio at silence):"))
+        parallel_workers_layout.addWidget(self.spin_parallel_workers)
+
         layout.addLayout(max_words_per_line_layout)
         layout.addLayout(max_segment_duration_layout)
         layout.addLayout(max_words_per_segment_layout)
+        layout.addLayout(parallel_workers_layout)
 
         # Whisper device dropdown
         self.device_dropdown = QComboBox()
@@ -101,10 +115,54 @@ class SubtitleApp(QWidget):
         layout.addWidget(QLabel("Whisper model size:"))
         layout.addWidget(self.model_size_dropdown)
 
+        # Inference engine; only those whose libraries are installed are offered
+        self.backend_dropdown = QComboBox()
+        for name in available_backends() or [DEFAULT_BACKEND]:
+            self.backend_dropdown.addItem(BACKENDS[name].label, name)
+        layout.addWidget(QLabel("Inference engine:"))
+        layout.addWidget(self.backend_dropdown)
+
+        self.checkbox_preload_model = QCheckBox("Load the selected model in the background")
+        self.checkbox_preload_model.setChecked(True)
+        layout.addWidget(self.checkbox_preload_model)
+        self.model_size_dropdown.currentTextChanged.connect(self.preload_model)
+        self.device_dropdown.currentTextChanged.connect(self.preload_model)
+        self.backend_dropdown.currentIndexChanged.connect(self.preload_model)
+        self.checkbox_preload_model.toggled.connect(self.preload_model)
+
+        self.checkbox_draft_first = QCheckBox("Show a quick draft first, then refine with the selected model")
+        self.checkbox_draft_first.setToolTip("Edits made while refining are kept")
+        self.checkbox_draft_first.setChecked(False)
+        layout.addWidget(self.checkbox_draft_first)
+
+        self.checkbox_use_daemon = QCheckBox("Use local transcription server if running (python scripts/daemon.py)")
+        self.checkbox_use_daemon.setChecked(False)
+        self.checkbox_use_daemon.toggled.connect(self.preload_model)
+        layout.addWidget(self.checkbox_use_daemon)
+
+        self.checkbox_keep_wav = QCheckBox("Keep extracted audio as WAV next to the video")
+        self.checkbox_keep_wav.setChecked(False)
+        layout.addWidget(self.checkbox_keep_wav)
+
         # Generate button
+        generate_row = QHBoxLayout()
         self.btn_generate_srt = QPushButton("Generate Subtitles")
         self.btn_generate_srt.clicked.connect(self.generate_srt)
-        layout.addWidget(self.btn_generate_srt)
+        self.btn_resegment = QPushButton("Re-segment")
+        self.btn_resegment.setToolTip("Re-apply the line/segment limits to the last transcription without running Whisper")
+        self.btn_resegment.clicked.connect(self.resegment_srt)
+        self.btn_cancel_generate = QPushButton("Cancel")
+        self.btn_cancel_generate.setDisabled(True)
+        self.btn_cancel_generate.clicked.connect(self.cancel_generate)
+        generate_row.addWidget(self.btn_generate_srt)
+        generate_row.addWidget(self.btn_resegment)
+        generate_row.addWidget(self.btn_cancel_generate)
+        layout.addLayout(generate_row)
+
+        self.transcribe_progress = QProgressBar()
+        self.transcribe_progress.setRange(0, 100)
+        self.transcribe_progress.setValue(0)
+        layout.addWidget(self.transcribe_progress)
 
         # SRT editor
         self.srt_editor = QPlainTextEdit()
@@ -121,8 +179,12 @@ class SubtitleApp(QWidget):
         self.btn_save_srt_with_video.clicked.connect(self.save_srt_with_video)
         self.btn_convert_ass = QPushButton("Convert to ASS")
         self.btn_convert_ass.clicked.connect(self.convert_to_ass)
+        self.btn_export_all = QPushButton("Export All Formats")
+        self.btn_export_all.setToolTip("Soft-subtitled MP4, burned-in MP4 and SRT/ASS/VTT files from a single read of the video")
+        self.btn_export_all.clicked.connect(self.export_all)
         row_buttons.addWidget(self.btn_save_srt_with_video)
         row_buttons.addWidget(self.btn_convert_ass)
+        row_buttons.addWidget(self.btn_export_all)
         layout.addLayout(row_buttons)
 
         status_layout_1 = QHBoxLayout()
@@ -143,23 +205,115 @@ class SubtitleApp(QWidget):
         self.btn_add_video = QPushButton("Add Subtitles to Video")
         self.btn_add_video.clicked.connect(self.add_to_video)
 
-        # Video preview
-        self.video_widget = QVideoWidget()
-        self.media_player = QMediaPlayer()
-        self.audio_output = QAudioOutput()
-        self.media_player.setAudioOutput(self.audio_output)
-        self.media_player.setVideoOutput(self.video_widget)
+        # Video preview; the player itself is created on first use so
+        # QtMultimedia isn't loaded at startup
+        self.video_container = QWidget()
+        self.video_container_layout = QVBoxLayout(self.video_container)
+        self.video_container_layout.setContentsMargins(0, 0, 0, 0)
+        self.media_player = None
+
+        self.btn_cancel_video = QPushButton("Cancel")
+        self.btn_cancel_video.setDisabled(True)
+        self.btn_cancel_video.clicked.connect(self.cancel_add_to_video)
+
+        self.spin_render_workers = QSpinBox()
+        self.spin_render_workers.setRange(1, os.cpu_count() or 1)
+        self.spin_render_workers.setValue(1)
+        self.spin_render_workers.setToolTip("Encode keyframe-aligned chunks of the video in parallel")
+
+        self.checkbox_smart_render = QCheckBox("Only re-encode parts with subtitles")
+        self.checkbox_smart_render.setChecked(False)
+
+        self.checkbox_reuse_chunks = QCheckBox("Reuse unchanged chunks from earlier renders")
+        self.checkbox_reuse_chunks.setChecked(False)
+        self.checkbox_reuse_chunks.setToolTip("Applies to smart renders and renders with more than one worker")
+
+        add_video_row = QHBoxLayout()
+        add_video_row.addWidget(self.checkbox_smart_render)
+        add_video_row.addWidget(self.checkbox_reuse_chunks)
+        add_video_row.addWidget(QLabel("Render workers:"))
+        add_video_row.addWidget(self.spin_render_workers)
+        add_video_row.addWidget(self.btn_add_video)
+        add_video_row.addWidget(self.btn_cancel_video)
 
         layout.addWidget(self.ass_editor)
-        layout.addWidget(self.btn_add_video)
-        layout.addWidget(self.video_widget)
+        layout.addLayout(add_video_row)
+        layout.addWidget(self.video_container)
 
         self.progress_bar = QProgressBar()
-        self.progress_bar.setRange(0, 0)  # Indeterminate
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
         layout.addWidget(self.progress_bar)
 
+        self.status_label_tab2 = QLabel("Status: Idle")
+        layout.addWidget(self.status_label_tab2)
+
         self.tab2.setLayout(layout)
 
+    def ensure_media_player(self):
+        if self.media_player is None:
+            from PyQt6.QtMultimediaWidgets import QVideoWidget
+            from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+            self.video_widget = QVideoWidget()
+            self.media_player = QMediaPlayer()
+            self.audio_output = QAudioOutput()
+            self.media_player.setAudioOutput(self.audio_output)
+            self.media_player.setVideoOutput(self.video_widget)
+            self.video_container_layout.addWidget(self.video_widget)
+
+            # Play / seek controls; the ASS preview follows the position
+            self.btn_play = QPushButton("Play")
+            self.btn_play.clicked.connect(self.toggle_playback)
+            self.position_slider = QSlider(Qt.Orientation.Horizontal)
+            self.position_slider.sliderMoved.connect(self.media_player.setPosition)
+            self.media_player.durationChanged.connect(lambda ms: self.position_slider.setRange(0, ms))
+            self.media_player.positionChanged.connect(self.update_position_slider)
+            self.media_player.playbackStateChanged.connect(
+                lambda state: self.btn_play.setText("Pause" if state == QMediaPlayer.PlaybackState.PlayingState
+                                                    else "Play"))
+            controls = QHBoxLayout()
+            controls.addWidget(self.btn_play)
+            controls.addWidget(self.position_slider)
+            self.video_container_layout.addLayout(controls)
+            self.ass_editor.attach_player(self.media_player)
+        return self.media_player
+
+    def toggle_playback(self):
+        from PyQt6.QtMultimedia import QMediaPlayer
+
+        if self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+            self.media_player.pause()
+        else:
+            self.media_player.play()
+
+    def update_position_slider(self, ms):
+        if not self.position_slider.isSliderDown():
+            self.position_slider.blockSignals(True)
+            self.position_slider.setValue(ms)
+            self.position_slider.blockSignals(False)
+
+    def preload_model(self):
+        """Warm the selected model in the background while the user picks a file."""
+        if not self.checkbox_preload_model.isChecked() or self.checkbox_use_daemon.isChecked():
+            self.preload_pending = False
+            return
+        if getattr(self, "preload_worker", None) and self.preload_worker.isRunning():
+            # Cache loads are serialised; load whatever is selected once the running one ends
+            self.preload_pending = True
+            return
+        self.preload_pending = False
+        model_name = self.model_size_dropdown.currentText()
+        device = self.device_dropdown.currentText()
+        self.preload_worker = ModelPreloadWorker(model_name, device, self.backend_dropdown.currentData())
+        self.preload_worker.status.connect(lambda text: self.status_label_tab1.setText(f"Status: {text}"))
+        self.preload_worker.finished.connect(self.preload_finished)
+        self.preload_worker.start()
+
+    def preload_finished(self):
+        if self.preload_pending:
+            self.preload_model()
+
     def select_video(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Select Video", "", "Videos (*.mp4 *.mkv *.avi)"
@@ -167,22 +321,28 @@ class SubtitleApp(QWidget):
         if file_path:
             self.video_path = file_path
             self.video_label.setText(os.path.basename(file_path))
-            self.ass_editor.set_video_preview(file_path)
-
-            # Show first frame preview
-            cap = cv2.VideoCapture(file_path)
-            ret, frame = cap.read()
-            cap.release()
-            if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = frame.shape
-                qimg = QImage(frame.data, w, h, ch * w, QImage.Format.Format_RGB888)
-                pix = QPixmap.fromImage(qimg).scaled(
-                    self.video_label.width(), self.video_label.height(),
-                    Qt.AspectRatioMode.IgnoreAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                self.video_label.setPixmap(pix)
+
+            # One decoder thread serves the thumbnail and the ASS preview's frames
+            if getattr(self, "frame_server", None):
+                self.frame_server.stop()
+            self.frame_server = FrameServer(file_path)
+            self.frame_server.frame_ready.connect(self.show_thumbnail)
+            self.frame_server.start()
+            self.show_thumbnail("thumbnail", 0, self.frame_server.request(
+                "thumbnail", 0, self.video_label.width(), self.video_label.height(), fit="stretch"))
+            self.ass_editor.set_video_preview(file_path, self.frame_server)
+
+            # Load the source paused so the ASS preview can be scrubbed along it
+            self.ensure_media_player().setSource(QUrl.fromLocalFile(file_path))
+
+    def show_thumbnail(self, tag, ms, image):
+        if tag == "thumbnail" and image is not None:
+            self.video_label.setPixmap(QPixmap.fromImage(image))
+
+    def closeEvent(self, event):
+        if getattr(self, "frame_server", None):
+            self.frame_server.stop()
+        super().closeEvent(event)
 
     def generate_srt(self):
         if not self.video_path:
@@ -190,31 +350,124 @@ class SubtitleApp(QWidget):
             return
 
         self.btn_generate_srt.setDisabled(True)
+        self.btn_resegment.setDisabled(True)
+        self.btn_cancel_generate.setDisabled(False)
         self.status_label_tab1.setText("Status: Generating SRT subtitles...")
-        sleep(1)
-
-        max_words_per_line = self.spin_max_words_per_line.value()
-        max_segment_duration = self.spin_max_segment_duration.value()
-        max_words_per_segment = self.spin_max_words_per_segment.value()
-        device = self.device_dropdown.currentText()
-        model_size = self.model_size_dropdown.currentText()
-        
-        self.loading_overlay = LoadingOverlay(self)
-        # Placeholder SRT content
-        subtitleGenerator = SubtitleGenerator(model_name=model_size, device=device)
-        print("Extracting audio...")
-        audio_path = os.path.splitext(self.video_path)[0] + ".wav"
-        subtitleGenerator.extract_audio(self.video_path, audio_path)
-        print("Transcribing audio...")
-        srt_path = os.path.splitext(self.video_path)[0] + ".srt"
-        subtitleGenerator.transcribe_audio(audio_path, srt_path, max_words_per_line=max_words_per_line, max_segment_duration=max_segment_duration, max_words_per_segment=max_words_per_segment)
+        self.transcribe_progress.setValue(0)
+        self.srt_editor.clear()
+        self.srt_count = 0
+
+        wav_path = os.path.splitext(self.video_path)[0] + ".wav" if self.checkbox_keep_wav.isChecked() else None
+        model_name = self.model_size_dropdown.currentText()
+        draft_model = draft_model_for(model_name) if self.checkbox_draft_first.isChecked() else None
+        # Every cue the draft pass writes, so refinement can tell them from user edits
+        self.draft_cues = {} if draft_model else None
+        self.transcription_worker = TranscriptionWorker(
+            self.video_path,
+            model_name,
+            self.device_dropdown.currentText(),
+            wav_path=wav_path,
+            workers=self.spin_parallel_workers.value(),
+            daemon_url=DEFAULT_DAEMON_URL if self.checkbox_use_daemon.isChecked() else None,
+            draft_model=draft_model,
+            # Checkpoints let a closed or crashed session resume this video where it stopped
+            journal_path=os.path.splitext(self.video_path)[0] + ".journal",
+            backend=self.backend_dropdown.currentData(),
+        )
+        self.transcription_worker.status.connect(lambda text: self.status_label_tab1.setText(f"Status: {text}"))
+        self.transcription_worker.segments_ready.connect(self.append_segments)
+        self.transcription_worker.window_refined.connect(self.refine_window)
+        self.transcription_worker.progress.connect(self.transcribe_progress.setValue)
+        self.transcription_worker.done.connect(self.transcription_done)
+        self.transcription_worker.cancelled.connect(lambda: self.transcription_stopped("Status: Transcription cancelled."))
+        self.transcription_worker.failed.connect(lambda error: self.transcription_stopped(f"Status: Transcription failed: {error}"))
+        self.transcription_worker.start()
+
+    def append_segments(self, segments):
+        # Apply the current layout rules to the new segments and append them to the editor
+        srt_text = SubtitleGenerator(cache=False).resegment(
+            {"segments": segments},
+            max_words_per_line=self.spin_max_words_per_line.value(),
+            max_segment_duration=self.spin_max_segment_duration.value(),
+            max_words_per_segment=self.spin_max_words_per_segment.value(),
+            start_index=self.srt_count + 1,
+        )
+        self.srt_count += srt_text.count(" --> ")
+        if self.draft_cues is not None:
+            for cue in parse_srt_cues(srt_text):
+                self.draft_cues[cue_key(cue)] = cue
+        cursor = QTextCursor(self.srt_editor.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(srt_text)
+
+    def refine_window(self, start, end, segments):
+        # Swap the draft cues of this window for the refined ones, keeping user edits
+        refined_srt = SubtitleGenerator(cache=False).resegment(
+            {"segments": segments},
+            max_words_per_line=self.spin_max_words_per_line.value(),
+            max_segment_duration=self.spin_max_segment_duration.value(),
+            max_words_per_segment=self.spin_max_words_per_segment.value(),
+        )
+        srt_text = merge_refined_window(self.srt_editor.toPlainText(), self.draft_cues or {}, start, end, refined_srt)
+
+        # Rewrite only the lines that changed, in one undoable step, so the
+        # user's cursor and selection move with the text around them
+        scroll = self.srt_editor.verticalScrollBar().value()
+        cursor = QTextCursor(self.srt_editor.document())
+        cursor.beginEditBlock()
+        for edit_start, edit_end, text in line_edits(self.srt_editor.toPlainText(), srt_text):
+            cursor.setPosition(edit_start)
+            cursor.setPosition(edit_end, QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(text)
+        cursor.endEditBlock()
+        self.srt_editor.verticalScrollBar().setValue(scroll)
+        self.srt_count = srt_text.count(" --> ")
+
+    def transcription_done(self, result):
+        self.last_words = WordTable.from_result(result)
+        base_path = os.path.splitext(self.video_path)[0]
+        subtitleGenerator = SubtitleGenerator(cache=False)
+        subtitleGenerator.save_words(result, base_path + ".words.json")
+        with open(base_path + ".srt", "w", encoding="utf-8") as f:
+            f.write(self.srt_editor.toPlainText())
         print("SRT Created")
-        with open(srt_path, "r", encoding="utf-8") as f:
-            srt_content = f.read()
-        self.srt_editor.setPlainText(srt_content)
-        self.loading_overlay.hide_overlay
+        self.transcription_stopped("Status: SRT Subtitles generated successfully.")
+
+    def transcription_stopped(self, status):
+        self.draft_cues = None
         self.btn_generate_srt.setDisabled(False)
-        self.status_label_tab1.setText("Status: SRT Subtitles generated successfully.")
+        self.btn_resegment.setDisabled(False)
+        self.btn_cancel_generate.setDisabled(True)
+        self.status_label_tab1.setText(status)
+
+    def cancel_generate(self):
+        if getattr(self, "transcription_worker", None) and self.transcription_worker.isRunning():
+            self.btn_cancel_generate.setDisabled(True)
+            self.status_label_tab1.setText("Status: Cancelling...")
+            self.transcription_worker.cancel()
+
+    def resegment_srt(self):
+        if not self.video_path:
+            self.srt_editor.setPlainText("Please select a video first.")
+            return
+
+        subtitleGenerator = SubtitleGenerator(cache=False)
+        if self.last_words is None:
+            # Fall back to the sidecar from an earlier session
+            words_path = os.path.splitext(self.video_path)[0] + ".words.json"
+            if not os.path.exists(words_path):
+                self.status_label_tab1.setText("Status: Nothing to re-segment, generate subtitles first.")
+                return
+            self.last_words = WordTable.from_result(subtitleGenerator.load_words(words_path))
+
+        srt_content = subtitleGenerator.resegment(
+            self.last_words,
+            max_words_per_line=self.spin_max_words_per_line.value(),
+            max_segment_duration=self.spin_max_segment_duration.value(),
+            max_words_per_segment=self.spin_max_words_per_segment.value(),
+        )
+        self.srt_editor.setPlainText(srt_content)
+        self.status_label_tab1.setText("Status: Subtitles re-segmented.")
 
     def save_srt(self):
         pass
@@ -248,15 +501,48 @@ class SubtitleApp(QWidget):
 
             #need to check srt in correct format
             print("Adding subtitles to video...")
-            device = self.device_dropdown.currentText()
-            model_size = self.model_size_dropdown.currentText()
-            subtitleGenerator = SubtitleGenerator(model_name=model_size, device=device)
+            # No model is loaded here; SubtitleGenerator only draws from the model cache on transcription
+            subtitleGenerator = SubtitleGenerator(device=self.device_dropdown.currentText())
             subtitleGenerator.add_subtitles_to_video(self.video_path, srt_path, save_path, burn_in)
             print(f"Done! Output video: {save_path}")
 
             self.btn_save_srt_with_video.setDisabled(False)
             self.status_label_tab1.setText(f"Status: SRT saved at {srt_path}, Video saved at {save_path}. Now Idle")
 
+    def export_all(self):
+        if not self.video_path or not self.srt_editor.toPlainText().strip():
+            self.status_label_tab1.setText("Status: Select a video and generate subtitles first.")
+            return
+
+        output_base, _ = QFileDialog.getSaveFileName(
+            self,
+            "Export As (base name)",
+            os.path.splitext(os.path.basename(self.video_path))[0],
+            "All files (*)"
+        )
+        if not output_base:
+            return
+        output_base = os.path.splitext(output_base)[0]
+
+        # Burn in the styled ASS from the Edit tab if there is one
+        ass_text = self.ass_editor.editor.toPlainText()
+        if not ass_text.lstrip().startswith("[Script Info]"):
+            ass_text = None
+
+        self.btn_export_all.setDisabled(True)
+        self.status_label_tab1.setText("Status: Exporting...")
+        self.export_worker = ExportWorker(self.video_path, self.srt_editor.toPlainText(), output_base, ass_text)
+        self.export_worker.progress.connect(
+            lambda info: self.status_label_tab1.setText(f"Status: Exporting {format_ffmpeg_progress(info)}"))
+        self.export_worker.done.connect(lambda paths: self.export_stopped(f"Status: Exported {len(paths)} files to {os.path.dirname(output_base)}"))
+        self.export_worker.cancelled.connect(lambda: self.export_stopped("Status: Export cancelled."))
+        self.export_worker.failed.connect(lambda error: self.export_stopped(f"Status: Export failed: {error}"))
+        self.export_worker.start()
+
+    def export_stopped(self, status):
+        self.btn_export_all.setDisabled(False)
+        self.status_label_tab1.setText(status)
+
     def convert_to_ass(self):
         if not self.srt_editor.toPlainText().strip():
             self.ass_editor.set_ass_text("Please generate or paste SRT first.")
@@ -298,21 +584,48 @@ class SubtitleApp(QWidget):
         
         self.btn_add_video.setDisabled(True)
         self.btn_add_video.setText("Adding subtitles to video...")
-        sleep(1)
+        self.btn_cancel_video.setDisabled(False)
+        self.progress_bar.setRange(0, 0)  # Indeterminate until ffmpeg reports its position
         #need to check ass in correct format
         ass_text = self.ass_editor.editor.toPlainText()
         # add_styled_subtitles(self.video_path, ass_text, ass_path)
-        worker = SubtitleWorker(self.video_path, ass_text, save_path)
-        worker.finished.connect(lambda: self.progress_bar.setRange(0, 100))
-        worker.start()
-
+        self.subtitle_worker = SubtitleWorker(self.video_path, ass_text, save_path, workers=self.spin_render_workers.value(),
+                                              smart=self.checkbox_smart_render.isChecked(),
+                                              reuse_chunks=self.checkbox_reuse_chunks.isChecked())
+        self.subtitle_worker.progress.connect(self.update_video_progress)
+        self.subtitle_worker.finished.connect(lambda: self.add_to_video_done(save_path))
+        self.subtitle_worker.cancelled.connect(lambda: self.add_to_video_stopped("Status: Cancelled."))
+        self.subtitle_worker.failed.connect(lambda error: self.add_to_video_stopped(f"Status: Failed: {error}"))
+        self.subtitle_worker.start()
+
+    def update_video_progress(self, info):
+        if info.get("percent") is not None:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(int(info["percent"]))
+        self.status_label_tab2.setText(f"Status: Encoding {format_ffmpeg_progress(info)}")
+
+    def add_to_video_done(self, save_path):
         print('Done')
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(100)
+        self.add_to_video_stopped(f"Status: Video saved at {save_path}")
+        # Optionally, play the new video
+        media_player = self.ensure_media_player()
+        media_player.setSource(QUrl.fromLocalFile(save_path))
+        media_player.play()
+
+    def add_to_video_stopped(self, status):
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 100)
         self.btn_add_video.setDisabled(False)
         self.btn_add_video.setText("Add Subtitles to Video")
-        # Optionally, play the new video
-        self.media_player.setSource(QUrl.fromLocalFile(save_path))
-        self.media_player.play()
+        self.btn_cancel_video.setDisabled(True)
+        self.status_label_tab2.setText(status)
 
+    def cancel_add_to_video(self):
+        if getattr(self, "subtitle_worker", None) and self.subtitle_worker.isRunning():
+            self.btn_cancel_video.setDisabled(True)
+            self.subtitle_worker.cancel()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -1,8 +1,11 @@
 import os
+import sys
 from pathlib import Path
-import subprocess
-import shlex
-import re
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.ffmpeg_runner import run_ffmpeg
+from scripts.chunked_render import render_chunked, render_smart
+from scripts.subtitle_document import SubtitleStyle, parse, dumps
 
 
 def convert_to_ass(srt_text, font="Arial", font_size=28,
@@ -11,46 +14,15 @@ def convert_to_ass(srt_text, font="Arial", font_size=28,
     """
     Convert SRT text into ASS text with styling.
     """
-    style_header = f"""[Script Info]
-ScriptType: v4.00+
-Collisions: Normal
-PlayResX: 1920
-PlayResY: 1080
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,{font},{font_size},{primary_color},&H000000&,{outline_color},&H000000&,-1,0,0,0,100,100,0,0,1,{outline},{shadow},{alignment},10,10,30,0
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
-
-    lines = srt_text.strip().splitlines()
-    ass_events = []
-    time_pattern = re.compile(r"(\d+):(\d+):(\d+),(\d+)")
-
-    def srt_time_to_ass(t):
-        m = time_pattern.match(t)
-        h, mi, s, ms = map(int, m.groups())
-        return f"{h:01}:{mi:02}:{s:02}.{int(ms/10):02}"
+    document = parse(srt_text, "srt")
+    document.styles = {"Default": SubtitleStyle(
+        fontname=font, fontsize=font_size, primary_colour=primary_color, outline_colour=outline_color,
+        outline=outline, shadow=shadow, alignment=alignment,
+    )}
+    return dumps(document, "ass")
 
-    i = 0
-    while i < len(lines):
-        if lines[i].isdigit():
-            start_time, end_time = lines[i + 1].split(" --> ")
-            text = "\\N".join(lines[i + 2:i + 3])  # simple, 1-line text
-            ass_events.append(
-                f"Dialogue: 0,{srt_time_to_ass(start_time)},{srt_time_to_ass(end_time)},Default,,0,0,0,,{text}"
-            )
-            i += 4
-        else:
-            i += 1
 
-    ass_text = style_header + "\n".join(ass_events)
-    return ass_text
-
-
-def add_styled_subtitles(video_path, ass_text, output_path):
+def add_styled_subtitles(video_path, ass_text, output_path, progress_callback=None, cancel_event=None, workers=None, smart=False, cache=None):
     """
     Burn styled ASS subtitles into a video using ffmpeg.
 
@@ -58,10 +30,30 @@ def add_styled_subtitles(video_path, ass_text, output_path):
         video_path: Path to video file.
         ass_text: ASS subtitle text (already includes styles).
         output_path: Path to save output video.
+        progress_callback: Optional callable receiving ffmpeg progress dicts
+            (see scripts.ffmpeg_runner.run_ffmpeg).
+        cancel_event: Optional threading.Event; setting it aborts the encode.
+        workers: If greater than 1, split the source at keyframes and encode
+            that many chunks in parallel (see scripts.chunked_render).
+        smart: Re-encode only the GOPs that overlap a subtitle event and
+            stream-copy the rest.
+        cache: Optional scripts.render_cache.RenderCache. Chunks whose
+            subtitles haven't changed since an earlier render are reused.
+            Only chunked and smart renders use it; a single-pass render
+            (workers 1, smart off) ignores it.
     """
     video_path = os.path.abspath(video_path).replace("\\", "/")
     output_path = os.path.abspath(output_path).replace("\\", "/")
 
+    if smart:
+        render_smart(video_path, ass_text, output_path, workers=workers or 1,
+                     progress_callback=progress_callback, cancel_event=cancel_event, cache=cache)
+        return
+    if workers and workers > 1:
+        render_chunked(video_path, ass_text, output_path, workers=workers or 1,
+                       progress_callback=progress_callback, cancel_event=cancel_event, cache=cache)
+        return
+
     # Write ASS text to a temporary file
     script_dir = os.path.dirname(os.path.abspath(__file__))
     temp_ass_path = os.path.join(script_dir, "temp.ass")
@@ -79,10 +71,11 @@ def add_styled_subtitles(video_path, ass_text, output_path):
         "-vf", vf_filter,
         output_path
     ]
-    subprocess.run(cmd, check=True)
-
-    # Optionally remove temp file
-    os.remove(os.path.join(script_dir, "temp.ass"))
+    try:
+        run_ffmpeg(cmd, progress_callback=progress_callback, cancel_event=cancel_event)
+    finally:
+        # Optionally remove temp file
+        os.remove(os.path.join(script_dir, "temp.ass"))
 
 
 if __name__ == "__main__":
@@ -1,56 +1,21 @@
 import os
+import sys
 import subprocess
 import shlex
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.subtitle_document import SubtitleStyle, load, save
 
 
 def convert_to_ass(srt_path, font, font_size, primary_color, outline_color, outline, shadow, alignment):
-    # Create a styled .ass file
+    # Create a styled .ass file next to the .srt
     ass_path = os.path.splitext(srt_path)[0] + ".ass"
-    style_header = f"""[Script Info]
-ScriptType: v4.00+
-Collisions: Normal
-PlayResX: 1920
-PlayResY: 1080
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,{font},{font_size},{primary_color},&H000000&,{outline_color},&H000000&,-1,0,0,0,100,100,0,0,1,{outline},{shadow},{alignment},10,10,30,0
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
-
-
-    # Convert .srt to .ass content
-    with open(srt_path, "r", encoding="utf-8") as srt_file:
-        lines = srt_file.read().strip().split("\n")
-
-    ass_events = []
-    import re
-    time_pattern = re.compile(r"(\d+):(\d+):(\d+),(\d+)")
-    
-    def srt_time_to_ass(t):
-        m = time_pattern.match(t)
-        h, mi, s, ms = map(int, m.groups())
-        return f"{h:01}:{mi:02}:{s:02}.{int(ms/10):02}"
-
-    i = 0
-    while i < len(lines):
-        if lines[i].isdigit():
-            # index line
-            start_time, end_time = lines[i+1].split(" --> ")
-            text = "\\N".join(lines[i+2:i+3])  # simple, 1-line text
-            ass_events.append(
-                f"Dialogue: 0,{srt_time_to_ass(start_time)},{srt_time_to_ass(end_time)},Default,,0,0,0,,{text}"
-            )
-            i += 4
-        else:
-            i += 1
-
-    with open(ass_path, "w", encoding="utf-8") as ass_file:
-        ass_file.write(style_header + "\n".join(ass_events))
-    
+    document = load(srt_path, "srt")
+    document.styles = {"Default": SubtitleStyle(
+        fontname=font, fontsize=font_size, primary_colour=primary_color, outline_colour=outline_color,
+        outline=outline, shadow=shadow, alignment=alignment,
+    )}
+    save(document, ass_path, "ass")
     return ass_path
 
 
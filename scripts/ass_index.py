@@ -0,0 +1,122 @@
+from bisect import bisect_left
+
+from scripts.subtitle_document import SubtitleEvent, SubtitleStyle, EVENT_FORMAT, parse_event_line, parse_style_line
+from scripts.cue_index import CueIndex
+
+
+# Per-line entries that aren't an event or a style but change how other
+# lines parse; editing one re-reads the whole script
+_STRUCTURE = "structure"
+
+
+class AssLineIndex:
+    """
+    An ASS script parsed line by line and kept in step with edits: each
+    line's event or style, the style table and a CueIndex of the events.
+
+    replace() re-parses only the lines an edit touched, with the section
+    and Format fields in effect at that point looked up from the few
+    structural lines. Section headers and Format: lines decide how other
+    lines parse, and editing one falls back to a full re-read.
+    """
+
+    def __init__(self, lines=()):
+        self.lines = []
+        self.entries = []  # per line: SubtitleEvent, SubtitleStyle, _STRUCTURE or None
+        self.styles = {}
+        self.styles_version = 0
+        self.cues = CueIndex()
+        # (line number, (section, event fields, style fields)) after every
+        # header and Format: line, in line order
+        self.states = []
+        self.reset(lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def entry(self, line_number):
+        """The SubtitleEvent or SubtitleStyle on a line, or None."""
+        if 0 <= line_number < len(self.entries):
+            entry = self.entries[line_number]
+            if entry is not _STRUCTURE:
+                return entry
+        return None
+
+    def reset(self, lines):
+        """Parse a whole script, in order, the way parse_ass does."""
+        self.lines = list(lines)
+        self.entries = []
+        self.states = []
+        state = (None, EVENT_FORMAT, None)
+        for number, line in enumerate(self.lines):
+            entry = self._parse(line, state)
+            if entry is _STRUCTURE:
+                state = self._next_state(line, state)
+                self.states.append((number, state))
+            self.entries.append(entry)
+        self.cues.clear()
+        self.cues.extend(entry for entry in self.entries if isinstance(entry, SubtitleEvent))
+        self._rebuild_styles()
+
+    def replace(self, first, removed, lines):
+        """Lines first .. first + removed - 1 were replaced by lines."""
+        old = self.entries[first:first + removed]
+        state = self.state_at(first)
+        new = [self._parse(line, state) for line in lines]
+        self.lines[first:first + removed] = lines
+        if _STRUCTURE in old or _STRUCTURE in new:
+            self.reset(self.lines)
+            return
+
+        self.entries[first:first + removed] = new
+        shift = len(lines) - removed
+        if shift:
+            self.states = [(number + shift if number >= first else number, state) for number, state in self.states]
+        for entry in old:
+            if isinstance(entry, SubtitleEvent):
+                self.cues.remove(entry)
+        for entry in new:
+            if isinstance(entry, SubtitleEvent):
+                self.cues.add(entry)
+        if any(isinstance(entry, SubtitleStyle) for entry in old + new):
+            self._rebuild_styles()
+
+    def state_at(self, line_number):
+        """(section, event fields, style fields) in effect on a line."""
+        i = bisect_left(self.states, (line_number,))
+        return self.states[i - 1][1] if i else (None, EVENT_FORMAT, None)
+
+    @staticmethod
+    def _next_state(line, state):
+        section, event_fields, style_fields = state
+        stripped = line.strip()
+        if stripped.startswith("["):
+            return stripped.lower(), event_fields, style_fields
+        fields = [f.strip() for f in stripped.split(":", 1)[1].split(",")]
+        if section == "[events]":
+            return section, tuple(fields), style_fields
+        if section in ("[v4+ styles]", "[v4 styles]"):
+            return section, event_fields, fields
+        return state
+
+    def _parse(self, line, state):
+        section, event_fields, style_fields = state
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.endswith("]"):
+            return _STRUCTURE
+        if section == "[events]" and stripped.startswith(("Dialogue:", "Comment:")):
+            try:
+                return parse_event_line(stripped, event_fields)
+            except ValueError:
+                return None  # malformed timestamp
+        lowered = stripped.lower()
+        if section in ("[v4+ styles]", "[v4 styles]") and lowered.startswith("style:"):
+            return parse_style_line(stripped, style_fields)
+        if lowered.startswith("format:") and section in ("[events]", "[v4+ styles]", "[v4 styles]"):
+            return _STRUCTURE
+        return None
+
+    def _rebuild_styles(self):
+        # A handful of lines per script; later definitions win, as in parse_ass
+        self.styles = {entry.name: entry for entry in self.entries if isinstance(entry, SubtitleStyle)}
+        self.styles_version += 1
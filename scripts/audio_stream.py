@@ -0,0 +1,151 @@
+import os
+import subprocess
+
+import numpy as np
+
+from scripts.vad import quietest_cut
+
+
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = SAMPLE_RATE * 30  # 30 seconds of audio per pipe read
+
+
+def ffmpeg_pcm_command(media_path, sample_rate=SAMPLE_RATE, start=None):
+    """Build an ffmpeg command that decodes mono s16le PCM to stdout."""
+    cmd = ["ffmpeg", "-nostdin", "-v", "error"]
+    if start:
+        cmd += ["-ss", str(start)]
+    cmd += [
+        "-i", media_path, "-vn",
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-ac", "1",
+        "-",
+    ]
+    return cmd
+
+
+def probe_duration(media_path):
+    """Return the container duration in seconds, or None if ffprobe can't tell."""
+    cmd = [
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", media_path,
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout.strip()
+        return float(out)
+    except (subprocess.CalledProcessError, ValueError, FileNotFoundError):
+        return None
+
+
+def _iter_raw_chunks(media_path, chunk_samples, sample_rate, start=None):
+    chunk_bytes = chunk_samples * 2
+    proc = subprocess.Popen(
+        ffmpeg_pcm_command(media_path, sample_rate, start),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=chunk_bytes,
+    )
+    finished = False
+    try:
+        while True:
+            raw = proc.stdout.read(chunk_bytes)
+            if not raw:
+                finished = True
+                break
+            if len(raw) % 2:
+                raw = raw[:-1]
+            yield np.frombuffer(raw, dtype=np.int16)
+    finally:
+        proc.stdout.close()
+        if not finished:
+            proc.kill()
+        stderr = proc.stderr.read().decode(errors="replace").strip()
+        proc.stderr.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode audio: {stderr}")
+
+
+def iter_pcm_chunks(media_path, chunk_samples=CHUNK_SAMPLES, sample_rate=SAMPLE_RATE, start=None):
+    """
+    Yield float32 arrays of at most chunk_samples samples, decoded by ffmpeg
+    and read straight from its stdout pipe.
+    """
+    for raw in _iter_raw_chunks(media_path, chunk_samples, sample_rate, start):
+        yield raw.astype(np.float32) / 32768.0
+
+
+def load_pcm(media_path, sample_rate=SAMPLE_RATE, chunk_samples=CHUNK_SAMPLES):
+    """
+    Decode the audio track of media_path into a single float32 array in
+    [-1, 1], as expected by whisper's transcribe().
+
+    The output buffer is preallocated from the probed duration and each
+    chunk is converted directly into it, so no intermediate WAV is written
+    and the decoded samples are never concatenated.
+    """
+    duration = probe_duration(media_path)
+    capacity = int(duration * sample_rate) + sample_rate if duration else chunk_samples * 4
+    audio = np.empty(capacity, dtype=np.float32)
+    filled = 0
+
+    for raw in _iter_raw_chunks(media_path, chunk_samples, sample_rate):
+        end = filled + len(raw)
+        if end > len(audio):
+            # Duration probe was short (or missing); grow geometrically
+            audio = np.resize(audio, max(end, len(audio) * 2))
+        np.multiply(raw, 1.0 / 32768.0, out=audio[filled:end], casting="unsafe")
+        filled = end
+
+    return audio[:filled]
+
+
+def _iter_audio_blocks(source, sample_rate=SAMPLE_RATE, chunk_samples=CHUNK_SAMPLES, start_sample=0):
+    """
+    Yield float32 blocks from a media path (decoded through the ffmpeg pipe),
+    a raw s16le .pcm/.raw file (memory-mapped), an in-memory or memory-mapped
+    array, or any iterable of sample arrays, beginning at start_sample.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if str(source).lower().endswith((".pcm", ".raw")):
+            source = np.memmap(source, dtype=np.int16, mode="r")
+        else:
+            # Let ffmpeg seek so the skipped part is never decoded
+            yield from iter_pcm_chunks(source, chunk_samples, sample_rate, start=start_sample / sample_rate or None)
+            return
+    if isinstance(source, np.ndarray):
+        for i in range(start_sample, len(source), chunk_samples):
+            block = source[i:i + chunk_samples]
+            if block.dtype == np.int16:
+                yield block.astype(np.float32) / 32768.0
+            else:
+                yield np.asarray(block, dtype=np.float32)
+        return
+    skip = start_sample
+    for block in source:
+        block = np.asarray(block, dtype=np.float32)
+        if skip:
+            dropped = min(skip, len(block))
+            block = block[dropped:]
+            skip -= dropped
+        if len(block):
+            yield block
+
+
+def iter_pcm_windows(source, window_s=30, search_s=5, sample_rate=SAMPLE_RATE, start_sample=0):
+    """
+    Yield (offset_samples, window) pairs covering source from start_sample
+    to the end, where each window is at most window_s seconds long and ends
+    at the quietest point of its last search_s seconds. At most about one
+    window plus one read block is held in memory, however long the input is.
+    """
+    window = int(window_s * sample_rate)
+    search_from = window - int(min(search_s, window_s / 2) * sample_rate)
+    pending = np.empty(0, dtype=np.float32)
+    offset = start_sample
+    for block in _iter_audio_blocks(source, sample_rate, min(window, CHUNK_SAMPLES), start_sample):
+        pending = np.concatenate((pending, block)) if len(pending) else block
+        while len(pending) >= window:
+            cut = quietest_cut(pending[:window], sample_rate, search_from)
+            yield offset, pending[:cut]
+            pending = pending[cut:]
+            offset += cut
+    if len(pending):
+        yield offset, pending
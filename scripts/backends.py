@@ -0,0 +1,130 @@
+import importlib.util
+
+
+DEFAULT_BACKEND = "whisper"
+
+
+class WhisperBackend:
+    """
+    openai-whisper running in torch: fp16 on GPUs, fp32 on CPU. The weights
+    are left as whisper loads them; transcribe(fp16=True) already runs the
+    layers in half precision, casting weights on the fly. Models of every
+    backend expose whisper's transcribe(audio, **options) and return its
+    result dict (segments with word timestamps when asked), so the rest of
+    the pipeline doesn't care which one produced a transcript.
+    """
+    name = "whisper"
+    label = "openai-whisper (PyTorch)"
+    requires = ("whisper",)
+
+    @classmethod
+    def is_available(cls):
+        return all(importlib.util.find_spec(module) is not None for module in cls.requires)
+
+    @staticmethod
+    def default_precision(device):
+        return "fp32" if device == "cpu" else "fp16"
+
+    def load(self, model_name, device, precision):
+        import whisper
+
+        return whisper.load_model(model_name, device=device)
+
+
+class WhisperInt8Backend(WhisperBackend):
+    """
+    openai-whisper with every Linear layer dynamically quantized to int8.
+    CPU only. The weights are about 4x smaller, and the matrix multiplies
+    run through int8 kernels while activations stay fp32. The decoding
+    and word timestamp code is whisper's own.
+    """
+    name = "whisper-int8"
+    label = "openai-whisper, int8 quantized (CPU)"
+    requires = ("whisper", "torch")
+
+    @staticmethod
+    def default_precision(device):
+        return "int8"
+
+    def load(self, model_name, device, precision):
+        import torch
+        import whisper
+
+        if device != "cpu":
+            raise ValueError("The int8 whisper backend only runs on the CPU")
+        model = whisper.load_model(model_name, device="cpu")
+        # whisper subclasses nn.Linear only to cast dtypes on the fly; the
+        # quantizer only converts plain nn.Linear modules
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+                module.__class__ = torch.nn.Linear
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class CTranslate2Backend(WhisperBackend):
+    """
+    faster-whisper (CTranslate2) with int8 weights on CPU and fp16 on CUDA.
+    Its output is converted to whisper's result format.
+    """
+    name = "ctranslate2"
+    label = "faster-whisper / CTranslate2"
+    requires = ("faster_whisper",)
+
+    @staticmethod
+    def default_precision(device):
+        return "int8" if device == "cpu" else "fp16"
+
+    def load(self, model_name, device, precision):
+        from faster_whisper import WhisperModel
+
+        compute_type = {"int8": "int8", "fp16": "float16", "fp32": "float32"}[precision]
+        return CTranslate2Model(WhisperModel(model_name, device=device, compute_type=compute_type))
+
+
+class CTranslate2Model:
+    """Adapts faster_whisper.WhisperModel to whisper's model.transcribe()."""
+
+    # whisper.transcribe options with a faster-whisper equivalent of the same name
+    PASSTHROUGH = ("task", "language", "word_timestamps", "initial_prompt", "temperature",
+                   "condition_on_previous_text", "beam_size", "best_of", "patience",
+                   "compression_ratio_threshold", "no_speech_threshold")
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, **options):
+        kwargs = {key: options[key] for key in self.PASSTHROUGH if options.get(key) is not None}
+        if "logprob_threshold" in options:
+            kwargs["log_prob_threshold"] = options["logprob_threshold"]
+        segments_iter, info = self.model.transcribe(audio, **kwargs)
+
+        segments = []
+        for i, segment in enumerate(segments_iter):
+            entry = {
+                "id": i, "seek": segment.seek, "start": segment.start, "end": segment.end,
+                "text": segment.text, "tokens": list(segment.tokens), "temperature": segment.temperature,
+                "avg_logprob": segment.avg_logprob, "compression_ratio": segment.compression_ratio,
+                "no_speech_prob": segment.no_speech_prob,
+            }
+            if segment.words is not None:
+                entry["words"] = [
+                    {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                    for w in segment.words
+                ]
+            segments.append(entry)
+        return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": info.language}
+
+
+BACKENDS = {backend.name: backend for backend in (WhisperBackend, WhisperInt8Backend, CTranslate2Backend)}
+
+
+def get_backend(name=None):
+    try:
+        return BACKENDS[name or DEFAULT_BACKEND]()
+    except KeyError:
+        raise ValueError(f"Unknown inference backend {name!r}; choose from {', '.join(BACKENDS)}") from None
+
+
+def available_backends():
+    """Names of the backends whose libraries are installed, default first."""
+    return [name for name, backend in BACKENDS.items() if backend.is_available()]
@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.backends import BACKENDS
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".webm", ".m4v", ".mp3", ".wav", ".m4a", ".flac")
+
+
+def find_inputs(source):
+    """
+    Resolve a directory (scanned recursively for media files) or a manifest
+    (.txt with one path per line, or a .json list) into a list of paths.
+    """
+    if os.path.isdir(source):
+        found = []
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    found.append(os.path.join(root, name))
+        return sorted(found)
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as f:
+        if source.lower().endswith(".json"):
+            entries = json.load(f)
+        else:
+            entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [entry if os.path.isabs(entry) else os.path.join(base, entry) for entry in entries]
+
+
+def output_bases(inputs, output_dir, source_root=None):
+    """
+    Output path stem for each input: its path relative to source_root (the
+    scanned directory; by default the folder the inputs have in common),
+    mirrored under output_dir without the extension. Files with the same
+    name in different subdirectories keep separate outputs and journals.
+    """
+    paths = [os.path.abspath(path) for path in inputs]
+    if source_root is None and paths:
+        try:
+            source_root = os.path.commonpath([os.path.dirname(path) for path in paths])
+        except ValueError:
+            source_root = None
+    bases = {}
+    for path, original in zip(paths, inputs):
+        if source_root is None:
+            # Inputs on different drives: keep the drive letter as a folder
+            drive, rest = os.path.splitdrive(path)
+            relative = os.path.join(drive.rstrip(":"), rest.lstrip("\\/"))
+        else:
+            relative = os.path.relpath(path, os.path.abspath(source_root))
+        bases[original] = os.path.join(output_dir, os.path.splitext(relative)[0])
+    return bases
+
+
+class BatchState:
+    """
+    Per-file job status persisted as JSON after every change, so a batch
+    that crashes or is killed resumes with the files it hadn't finished.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.jobs = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.jobs = json.load(f)
+
+    def status(self, video_path):
+        return self.jobs.get(video_path, {}).get("status", "pending")
+
+    def update(self, video_path, status, **info):
+        self.jobs[video_path] = {"status": status, "updated": time.time(), **info}
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.jobs, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def _init_worker(threads):
+    # Runs once per worker process, before torch creates its thread pools
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+    except ImportError:
+        return  # torch-free backends go by the environment variables alone
+    torch.set_num_threads(threads)
+
+
+def process_video(video_path, output_base, options):
+    """
+    extract -> transcribe -> segment -> export for one file, writing every
+    output next to output_base. Runs inside a worker process; the Whisper
+    model comes from that process's model cache, so it is loaded once per
+    worker rather than once per file.
+    """
+    from scripts.create_subtitles import SubtitleGenerator
+    from scripts.export import export_deliverables
+
+    generator = SubtitleGenerator(model_name=options["model"], device=options["device"],
+                                  backend=options.get("backend", "whisper"))
+    os.makedirs(os.path.dirname(output_base), exist_ok=True)
+    if options.get("stream"):
+        # Long recordings: SRT and words are written window by window, never held whole
+        srt_path = output_base + ".srt"
+        generator.transcribe_stream_to_srt(
+            video_path, srt_path, words_path=output_base + ".words.json", journal_path=output_base + ".journal",
+            max_words_per_line=options.get("max_words_per_line"),
+            max_segment_duration=options.get("max_segment_duration"),
+            max_words_per_segment=options.get("max_words_per_segment"),
+        )
+        with open(srt_path, "r", encoding="utf-8") as f:
+            srt_text = f.read()
+        return export_deliverables(video_path, srt_text, output_base, formats=options["formats"])
+
+    if options.get("daemon_url"):
+        from scripts.daemon import DaemonClient, DaemonBusy
+
+        # The server holds the warm model; this worker only waits on it,
+        # backing off while the server's queue is full
+        client = DaemonClient(options["daemon_url"])
+        delay = 1
+        while True:
+            try:
+                result = client.transcribe(video_path, options["model"], options["device"],
+                                           priority=options.get("priority", 20),
+                                           backend=options.get("backend", "whisper"))
+                break
+            except DaemonBusy:
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+    elif options.get("batch_size", 1) > 1:
+        audio = generator.load_audio(video_path)
+        result = generator.transcribe(audio, word_timestamps=True, batch_size=options["batch_size"])
+    else:
+        # Checkpointed chunk by chunk, so a preempted node resumes mid-file
+        audio = generator.load_audio(video_path)
+        for _ in generator.iter_transcribe(audio, journal_path=output_base + ".journal"):
+            pass
+        result = generator.last_result
+
+    generator.save_words(result, output_base + ".words.json")
+    srt_text = generator.resegment(
+        result,
+        max_words_per_line=options.get("max_words_per_line"),
+        max_segment_duration=options.get("max_segment_duration"),
+        max_words_per_segment=options.get("max_words_per_segment"),
+    )
+    paths = export_deliverables(video_path, srt_text, output_base, formats=options["formats"])
+    return paths
+
+
+def run_batch(inputs, output_dir, options, workers=1, threads_per_worker=None, state_path=None,
+              retry_failed=False, source_root=None):
+    os.makedirs(output_dir, exist_ok=True)
+    bases = output_bases(inputs, output_dir, source_root)
+    state = BatchState(state_path or os.path.join(output_dir, "batch_status.json"))
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    skip = {"done"} if retry_failed else {"done", "failed"}
+    pending = [path for path in inputs if state.status(path) not in skip]
+    print(f"{len(inputs)} files, {len(inputs) - len(pending)} already handled, {len(pending)} to process")
+
+    # Spawned like parallel_transcribe's workers, so no CUDA state is inherited
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+        futures = {}
+        for path in pending:
+            state.update(path, "queued")
+            futures[pool.submit(process_video, path, bases[path], options)] = path
+
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                outputs = future.result()
+            except Exception as e:
+                state.update(path, "failed", error=f"{e}\n{traceback.format_exc()}")
+                print(f"FAILED {path}: {e}")
+                continue
+            state.update(path, "done", outputs=outputs)
+            print(f"done   {path}")
+
+    failed = [path for path in inputs if state.status(path) == "failed"]
+    return len(inputs) - len(failed), failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate subtitles for many videos without the GUI.")
+    parser.add_argument("source", help="Directory of videos, or a manifest (.txt one path per line, or .json list)")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu", choices=["cpu", "cuda", "mps"])
+    parser.add_argument("--backend", default="whisper", choices=sorted(BACKENDS),
+                        help="Inference engine (whisper-int8 and ctranslate2 are faster on CPU)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each with its own model")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Decode this many 30 s windows per forward pass (faster on CPU; no resume journal)")
+    parser.add_argument("--formats", default="srt",
+                        help="Comma separated: srt, ass, vtt, soft_mp4, burned_mp4")
+    parser.add_argument("--max-words-per-line", type=int, default=None)
+    parser.add_argument("--max-segment-duration", type=float, default=None)
+    parser.add_argument("--max-words-per-segment", type=int, default=None)
+    parser.add_argument("--stream", action="store_true",
+                        help="Transcribe in fixed-size windows with flat memory use (for multi-hour recordings)")
+    parser.add_argument("--daemon", default=None, metavar="URL",
+                        help="Send transcription to a running scripts/daemon.py server, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--state", default=None, help="Status file (default: <output-dir>/batch_status.json)")
+    parser.add_argument("--retry-failed", action="store_true", help="Also re-run files that failed previously")
+    args = parser.parse_args(argv)
+
+    from scripts.export import EXPORT_FORMATS
+
+    formats = tuple(f.strip() for f in args.formats.split(",") if f.strip())
+    unknown = sorted(set(formats) - set(EXPORT_FORMATS))
+    if unknown:
+        parser.error(f"unknown --formats {', '.join(unknown)} (choose from {', '.join(EXPORT_FORMATS)})")
+
+    options = {
+        "model": args.model,
+        "device": args.device,
+        "backend": args.backend,
+        "formats": formats,
+        "max_words_per_line": args.max_words_per_line,
+        "max_segment_duration": args.max_segment_duration,
+        "max_words_per_segment": args.max_words_per_segment,
+        "daemon_url": args.daemon,
+        "stream": args.stream,
+        "batch_size": args.batch_size,
+    }
+    inputs = find_inputs(args.source)
+    done, failed = run_batch(inputs, args.output_dir, options, workers=args.workers,
+                             threads_per_worker=args.threads_per_worker, state_path=args.state,
+                             retry_failed=args.retry_failed,
+                             source_root=args.source if os.path.isdir(args.source) else None)
+    print(f"Finished: {done} ok, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
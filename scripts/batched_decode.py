@@ -0,0 +1,140 @@
+import numpy as np
+
+from scripts.audio_stream import SAMPLE_RATE
+
+
+# Whisper's own fallback thresholds: a window whose greedy decode looks
+# like a loop or garbage is transcribed again through model.transcribe(),
+# which retries at higher temperatures
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def _get_tokenizer(model, language, task):
+    from whisper.tokenizer import get_tokenizer
+
+    try:
+        return get_tokenizer(model.is_multilingual, num_languages=model.num_languages, language=language, task=task)
+    except TypeError:  # openai-whisper before large-v3 support
+        return get_tokenizer(model.is_multilingual, language=language, task=task)
+
+
+def tokens_to_segments(tokens, tokenizer, window_duration):
+    """
+    Split one window's decoded tokens into segments at timestamp-token
+    pairs, the same way whisper.transcribe() does. Times are relative to
+    the window start.
+    """
+    tokens = np.asarray(tokens)
+    ts_begin = tokenizer.timestamp_begin
+    is_timestamp = tokens >= ts_begin
+    single_timestamp_ending = len(tokens) >= 2 and not is_timestamp[-2] and is_timestamp[-1]
+    consecutive = np.flatnonzero(is_timestamp[:-1] & is_timestamp[1:]) + 1
+
+    def segment(sliced, start, end):
+        text_tokens = [int(t) for t in sliced if t < tokenizer.eot]
+        return {"seek": 0, "start": start, "end": end, "text": tokenizer.decode(text_tokens),
+                "tokens": [int(t) for t in sliced]}
+
+    segments = []
+    if len(consecutive):
+        slices = list(consecutive)
+        if single_timestamp_ending:
+            slices.append(len(tokens))
+        last = 0
+        for current in slices:
+            sliced = tokens[last:current]
+            start = (int(sliced[0]) - ts_begin) * 0.02
+            end = (int(sliced[-1]) - ts_begin) * 0.02
+            segments.append(segment(sliced, start, min(end, window_duration)))
+            last = current
+        if last < len(tokens):
+            # whisper.transcribe() would seek back and decode this tail again;
+            # a lone window keeps it as a final segment running to the end
+            start = (int(tokens[last - 1]) - ts_begin) * 0.02
+            segments.append(segment(tokens[last:], min(start, window_duration), window_duration))
+    else:
+        timestamps = tokens[is_timestamp]
+        end = window_duration
+        if len(timestamps) and timestamps[-1] != ts_begin:
+            end = min((int(timestamps[-1]) - ts_begin) * 0.02, window_duration)
+        segments.append(segment(tokens, 0.0, end))
+    return [s for s in segments if s["text"].strip()]
+
+
+def _needs_fallback(result):
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return False  # silence: dropped, not retried
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def transcribe_windows_batched(model, windows, batch_size=8, word_timestamps=True, language=None,
+                               task="transcribe", fp16=False):
+    """
+    Transcribe independent audio windows (float32 arrays of at most 30 s)
+    with an openai-whisper model, batch_size windows per forward pass: the
+    mel spectrograms are stacked, the encoder runs once per batch and
+    whisper's decoder steps every item together until each has emitted its
+    end token.
+
+    Windows are decoded without a prompt from their neighbours, since they
+    run side by side. One whose greedy decode fails whisper's quality checks
+    is redone alone with model.transcribe().
+
+    Unless language is given, it is detected in the first batch and fixed
+    for every later one.
+
+    Returns one (segments, language) pair per window, with segment times
+    relative to the window start.
+    """
+    import torch
+    import whisper
+    from whisper.audio import N_FRAMES, N_SAMPLES, HOP_LENGTH
+    from whisper.timing import add_word_timestamps
+
+    n_mels = model.dims.n_mels
+    outputs = []
+    for i in range(0, len(windows), batch_size):
+        options = whisper.DecodingOptions(task=task, language=language, fp16=fp16, temperature=0.0,
+                                          without_timestamps=False)
+        batch = windows[i:i + batch_size]
+        # Pad with silence in the audio domain, as whisper.transcribe() does, then stack
+        mels = [whisper.log_mel_spectrogram(torch.from_numpy(np.ascontiguousarray(w)), n_mels,
+                                            padding=N_SAMPLES)[:, :N_FRAMES]
+                for w in batch]
+        mel_batch = torch.stack(mels).to(model.device)
+        with torch.no_grad():
+            results = whisper.decode(model, mel_batch, options)
+
+        for window, mel, result in zip(batch, mels, results):
+            if _needs_fallback(result):
+                retry = model.transcribe(window, task=task, language=language, fp16=fp16, verbose=None,
+                                         word_timestamps=word_timestamps, condition_on_previous_text=False)
+                outputs.append((retry["segments"], retry.get("language")))
+                continue
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                outputs.append(([], result.language))
+                continue
+
+            duration = len(window) / SAMPLE_RATE
+            tokenizer = _get_tokenizer(model, result.language, task)
+            segments = tokens_to_segments(result.tokens, tokenizer, duration)
+            if word_timestamps and segments:
+                # Alignment reruns the model on this one window, as whisper.transcribe() does
+                add_word_timestamps(
+                    segments=segments, model=model, tokenizer=tokenizer,
+                    mel=mel.to(model.device).to(torch.float16 if fp16 else torch.float32),
+                    num_frames=min(N_FRAMES, len(window) // HOP_LENGTH),
+                    prepend_punctuations="\"'“¿([{-", append_punctuations="\"'.。,，!！?？:：”)]}、",
+                    last_speech_timestamp=0.0,
+                )
+            for segment in segments:
+                segment.update(temperature=0.0, avg_logprob=result.avg_logprob,
+                               compression_ratio=result.compression_ratio, no_speech_prob=result.no_speech_prob)
+            outputs.append((segments, result.language))
+        if language is None and outputs:
+            # The most common language of the first batch
+            detected = [lang for _, lang in outputs if lang]
+            language = max(set(detected), key=detected.count) if detected else None
+    return outputs
@@ -0,0 +1,444 @@
+import os
+import sys
+import json
+import hashlib
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.audio_stream import probe_duration
+from scripts.ffmpeg_runner import run_ffmpeg, subtitles_filter, FFmpegCancelled
+from scripts.render_cache import RenderCache, hash_file
+from scripts.subtitle_document import SubtitleEvent, parse_ass, style_line
+
+
+def probe_keyframes(video_path):
+    """
+    Keyframe timestamps (seconds) of the first video stream, read from
+    packet flags so nothing has to be decoded. Times are relative to the
+    start of the file, as ffmpeg's -ss and filter timestamps are: packet
+    times are absolute, and MPEG-TS and some MP4s start well above zero.
+    """
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags:format=start_time", "-of", "csv", video_path,
+    ]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    start_time = 0.0
+    keyframes = []
+    for line in out.splitlines():
+        section, _, rest = line.partition(",")
+        if section == "format":
+            try:
+                start_time = float(rest)
+            except ValueError:
+                pass  # N/A
+        elif section == "packet":
+            pts, _, flags = rest.partition(",")
+            if "K" in flags and pts not in ("", "N/A"):
+                keyframes.append(float(pts))
+    keyframes.sort()
+    return [max(0.0, kf - start_time) for kf in keyframes]
+
+
+def plan_chunks(keyframes, duration, target_chunk_s):
+    """
+    Group GOPs into (start, end) chunks of roughly target_chunk_s seconds.
+    Every boundary lies on a keyframe, so each chunk decodes on its own.
+    """
+    bounds = [0.0]
+    for kf in keyframes:
+        if kf - bounds[-1] >= target_chunk_s and duration - kf >= target_chunk_s / 2:
+            bounds.append(kf)
+    bounds.append(duration)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def write_concat_list(paths, list_path):
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            escaped = Path(path).resolve().as_posix().replace("'", r"'\''")
+            f.write(f"file '{escaped}'\n")
+
+
+def concat_and_mux(chunk_paths, video_path, output_path, work_dir, cancel_event=None):
+    """Join video-only chunks losslessly and copy the source audio back in."""
+    list_path = os.path.join(work_dir, "chunks.txt")
+    write_concat_list(chunk_paths, list_path)
+    cmd = [
+        "ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", video_path,
+        "-map", "0:v", "-map", "1:a?",
+        "-c", "copy",
+        output_path,
+    ]
+    run_ffmpeg(cmd, cancel_event=cancel_event, input_path=video_path)
+
+
+class _ProgressAggregator:
+    """Combines per-chunk ffmpeg progress into one report over the whole file."""
+
+    def __init__(self, total, callback):
+        self.total = total
+        self.callback = callback
+        self.done = {}
+        self.fps = {}
+        self.lock = threading.Lock()
+
+    def for_chunk(self, index):
+        def report(info):
+            with self.lock:
+                if info.get("out_time") is not None:
+                    self.done[index] = info["out_time"]
+                if info.get("fps"):
+                    self.fps[index] = info["fps"]
+                finished = sum(self.done.values())
+                percent = min(100.0, finished / self.total * 100) if self.total else None
+                self.callback({
+                    "out_time": finished,
+                    "percent": percent,
+                    "fps": sum(self.fps.values()) or None,
+                    "speed": None,
+                    "eta": None,
+                    "frame": None,
+                })
+        return report
+
+
+def encode_chunk(video_path, ass_text, start, end, chunk_path, threads=None,
+                 encode_args=(), progress_callback=None, cancel_event=None):
+    """
+    Encode [start, end) of the source with ass_text (in source time) burned in.
+
+    The script is used as written. Around the subtitles filter the chunk's
+    frames are moved back onto the source timeline, so libass sees the same
+    timestamps as in a single-pass render. Event times aren't re-rounded,
+    and fades, moves, \\t and karaoke carry on across chunk boundaries
+    instead of restarting. The +0.5 rounds to the nearest tick, since
+    setpts truncates.
+    """
+    ass_path = os.path.splitext(chunk_path)[0] + ".ass"
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write(ass_text)
+
+    vf = f"setpts=PTS+{start:.6f}/TB+0.5,{subtitles_filter(ass_path)},setpts=PTS-{start:.6f}/TB+0.5"
+    cmd = ["ffmpeg", "-y", "-ss", f"{start:.6f}", "-i", video_path, "-t", f"{end - start:.6f}",
+           "-an", "-sn", "-vf", vf]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    cmd += list(encode_args) + [chunk_path]
+    run_ffmpeg(cmd, duration=end - start, progress_callback=progress_callback, cancel_event=cancel_event)
+    return chunk_path
+
+
+def copy_chunk(video_path, start, end, chunk_path, copy_args=(), progress_callback=None, cancel_event=None):
+    """Stream-copy [start, end) of the source video; start must be a keyframe."""
+    cmd = ["ffmpeg", "-y", "-ss", f"{start:.6f}", "-i", video_path, "-t", f"{end - start:.6f}",
+           "-an", "-sn", "-map", "0:v:0", "-c:v", "copy"]
+    cmd += list(copy_args) + [chunk_path]
+    run_ffmpeg(cmd, duration=end - start, progress_callback=progress_callback, cancel_event=cancel_event)
+    return chunk_path
+
+
+def render_chunked(video_path, ass_text, output_path, workers=None, target_chunk_s=None,
+                   encode_args=(), progress_callback=None, cancel_event=None, cache=None):
+    """
+    Burn ass_text into video_path by cutting the source into GOP-aligned
+    chunks, encoding them concurrently and joining them with the concat
+    demuxer. Each chunk starts on a keyframe and renders the subtitles on
+    the source timeline (see encode_chunk), so the frames match a
+    single-pass render.
+
+    Each worker drives its own ffmpeg process; the encoder threads of the
+    machine are split evenly between them. With a RenderCache, chunks whose
+    subtitles are unchanged since a previous render are reused.
+    """
+    cores = os.cpu_count() or 1
+    workers = workers or max(1, min(8, cores // 2))
+    duration = probe_duration(video_path)
+    if not duration:
+        raise RuntimeError(f"Could not determine duration of {video_path}")
+    keyframes = probe_keyframes(video_path)
+    target_chunk_s = target_chunk_s or default_chunk_s(duration, workers, cache)
+    pieces = [(start, end, True) for start, end in plan_chunks(keyframes, duration, target_chunk_s)]
+
+    render_pieces(video_path, ass_text, output_path, pieces, ".mp4", list(encode_args), [],
+                  workers, duration, progress_callback, cancel_event, cache)
+
+
+def default_chunk_s(duration, workers, cache=None):
+    # A cached render needs the same chunk grid every time, so it can't
+    # depend on the worker count
+    if cache is not None:
+        return max(10.0, duration / 32)
+    return max(10.0, duration / (workers * 4))
+
+
+def chunk_content_key(document, start, end):
+    """
+    Hash of everything in a parsed ASS document that affects how
+    [start, end) renders: the script info, extra sections, the styles the
+    chunk's events use (and Default, which libass falls back to) and every
+    field of the overlapping events, with their times taken relative to
+    the chunk.
+    """
+    offset = round(start * 1000)
+    start_ms, end_ms = start * 1000, end * 1000
+    used_styles = {"Default"}
+    h = hashlib.blake2b(digest_size=16)
+    for event in document.events:
+        if not event.comment and event.end > start_ms and event.start < end_ms:
+            used_styles.add(event.style)
+            values = [getattr(event, attr) - offset if attr in ("start", "end") else getattr(event, attr)
+                      for attr in SubtitleEvent.__slots__]
+            h.update(repr(values).encode("utf-8") + b"\n")
+    h.update(repr(sorted(document.info.items())).encode("utf-8") + b"\n")
+    h.update(repr(document.extra_sections).encode("utf-8") + b"\n")
+    for name in sorted(used_styles):
+        if name in document.styles:
+            h.update(style_line(document.styles[name]).encode("utf-8") + b"\n")
+    return h.hexdigest()
+
+
+def render_pieces(video_path, ass_text, output_path, pieces, ext, encode_args, copy_args,
+                  workers, duration, progress_callback=None, cancel_event=None, cache=None):
+    """
+    Produce every (start, end, reencode) piece, reusing cached chunks where
+    possible, then concatenate them into output_path.
+    """
+    work_dir = tempfile.mkdtemp(prefix="subtitle_render_")
+    aggregator = _ProgressAggregator(duration, progress_callback) if progress_callback else None
+    try:
+        source_hash = hash_file(video_path) if cache is not None else None
+        document = parse_ass(ass_text.splitlines()) if cache is not None else None
+
+        chunk_paths = []
+        jobs = []
+        keys = {}
+        for i, (start, end, reencode) in enumerate(pieces):
+            chunk_path = os.path.join(work_dir, f"chunk_{i:05}{ext}")
+            if cache is not None:
+                content = chunk_content_key(document, start, end) if reencode else "copy"
+                key = RenderCache.make_key(source_hash, f"{start:.6f}", f"{end:.6f}", ext,
+                                           " ".join(encode_args if reencode else copy_args), content)
+                cached = cache.get(key, ext)
+                if cached:
+                    chunk_paths.append(cached)
+                    if aggregator:
+                        aggregator.for_chunk(i)({"out_time": end - start})
+                    continue
+                keys[i] = key
+            chunk_paths.append(chunk_path)
+            jobs.append((start, end, chunk_path, aggregator.for_chunk(i) if aggregator else None, reencode))
+
+        if cache is not None:
+            print(f"Reusing {len(pieces) - len(jobs)} of {len(pieces)} cached chunks")
+        run_encode_jobs(video_path, ass_text, jobs, workers, encode_args, cancel_event, copy_args)
+
+        for i, key in keys.items():
+            chunk_paths[i] = cache.put(key, ext, chunk_paths[i])
+        concat_and_mux(chunk_paths, video_path, output_path, work_dir, cancel_event)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if cache is not None:
+            cache.evict()
+
+
+def run_encode_jobs(video_path, ass_text, jobs, workers, encode_args=(), cancel_event=None, copy_args=()):
+    """
+    Run (start, end, chunk_path, progress_callback, reencode) jobs
+    concurrently; jobs with reencode False are stream-copied instead.
+    The first failure stops every other running job and is re-raised.
+    """
+    if not jobs:
+        return
+    workers = min(workers, len(jobs))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    stop = threading.Event()
+
+    def forward_cancel():
+        while not stop.is_set():
+            if cancel_event.wait(0.2):
+                stop.set()
+
+    if cancel_event is not None:
+        threading.Thread(target=forward_cancel, daemon=True).start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(encode_chunk, video_path, ass_text, start, end, chunk_path,
+                            threads, encode_args, callback, stop)
+                if reencode else
+                pool.submit(copy_chunk, video_path, start, end, chunk_path, copy_args, callback, stop)
+                for start, end, chunk_path, callback, reencode in jobs
+            ]
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    stop.set()
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise FFmpegCancelled("ffmpeg was cancelled")
+                    raise future.exception()
+    finally:
+        stop.set()
+
+
+# Source codecs that smart rendering can match: the encoder used for
+# re-encoded GOPs, the bitstream filter that makes copied GOPs concat-safe,
+# the encoder's private-options flag and, per ffprobe profile name, the
+# encoder profile and the pixel formats it can encode
+SMART_RENDER_CODECS = {
+    "h264": ("libx264", "h264_mp4toannexb", "-x264-params", {
+        "Constrained Baseline": ("baseline", ("yuv420p", "yuvj420p")),
+        "Baseline": ("baseline", ("yuv420p", "yuvj420p")),
+        "Main": ("main", ("yuv420p", "yuvj420p")),
+        "High": ("high", ("yuv420p", "yuvj420p")),
+        "High 10": ("high10", ("yuv420p10le",)),
+        "High 4:2:2": ("high422", ("yuv422p", "yuvj422p", "yuv422p10le")),
+    }),
+    "hevc": ("libx265", "hevc_mp4toannexb", "-x265-params", {
+        "Main": ("main", ("yuv420p", "yuvj420p")),
+        "Main 10": ("main10", ("yuv420p10le",)),
+    }),
+}
+
+
+def probe_video_stream(video_path):
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "stream=codec_name,pix_fmt,profile,level,refs,width,height",
+        "-of", "json", video_path,
+    ]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    streams = json.loads(out).get("streams") or [{}]
+    return streams[0]
+
+
+def smart_encode_args(stream):
+    """
+    Encoder arguments that reproduce the source stream's codec, profile,
+    level, reference count, pixel format and size, as (encode_args,
+    copy_args). Raises ValueError if they can't be matched.
+
+    Re-encoded GOPs are spliced between stream-copied ones, so a player
+    has to decode both with the same decoder setup. A higher profile or
+    level, more reference frames, another bit depth or another size
+    partway through the file is something many hardware decoders and
+    players won't follow.
+    """
+    codec = stream.get("codec_name")
+    if codec not in SMART_RENDER_CODECS:
+        raise ValueError(f"codec {codec}")
+    encoder, bsf, params_flag, profiles = SMART_RENDER_CODECS[codec]
+    profile = stream.get("profile")
+    if profile not in profiles:
+        raise ValueError(f"{codec} profile {profile}")
+    encoder_profile, pix_fmts = profiles[profile]
+    pix_fmt = stream.get("pix_fmt")
+    if pix_fmt not in pix_fmts:
+        raise ValueError(f"pixel format {pix_fmt} in {codec} {profile}")
+    level = stream.get("level")
+    width, height = stream.get("width"), stream.get("height")
+    if not level or level < 0 or not width or not height:
+        raise ValueError(f"{codec} stream without a level or size")
+
+    params = []
+    if codec == "h264":
+        level = "1b" if level == 9 else f"{level // 10}.{level % 10}"
+        encode_args = ["-c:v", encoder, "-profile:v", encoder_profile, "-level", level]
+    else:
+        # HEVC levels are stored as 30 times the level number
+        params.append(f"level-idc={level / 30:.1f}")
+        encode_args = ["-c:v", encoder, "-profile:v", encoder_profile]
+    if stream.get("refs"):
+        params.append(f"ref={stream['refs']}")
+    if params:
+        encode_args += [params_flag, ":".join(params)]
+    encode_args += ["-pix_fmt", pix_fmt, "-s:v", f"{width}x{height}", "-f", "mpegts"]
+    return encode_args, ["-bsf:v", bsf, "-f", "mpegts"]
+
+
+def plan_smart_render(event_intervals, keyframes, duration):
+    """
+    Map subtitle event intervals onto GOPs and return runs of
+    (start, end, reencode) covering the whole timeline, where reencode is
+    True for runs of GOPs that overlap at least one event.
+    """
+    bounds = np.unique(np.clip(np.asarray([0.0] + list(keyframes), dtype=np.float64), 0.0, duration))
+    bounds = np.append(bounds[bounds < duration], duration)
+    gop_starts, gop_ends = bounds[:-1], bounds[1:]
+
+    # +1 at the first GOP an event touches, -1 after the last, then cumsum
+    marks = np.zeros(len(gop_starts) + 1, dtype=np.int64)
+    if event_intervals:
+        intervals = np.asarray(event_intervals, dtype=np.float64)
+        intervals = intervals[(intervals[:, 1] > intervals[:, 0]) & (intervals[:, 1] > 0) & (intervals[:, 0] < duration)]
+        first = np.searchsorted(gop_ends, intervals[:, 0], side="right")
+        last = np.searchsorted(gop_starts, intervals[:, 1], side="left")
+        np.add.at(marks, first, 1)
+        np.add.at(marks, last, -1)
+    touched = np.cumsum(marks[:-1]) > 0
+
+    runs = []
+    for start, end, reencode in zip(gop_starts, gop_ends, touched):
+        if runs and runs[-1][2] == reencode:
+            runs[-1] = (runs[-1][0], float(end), bool(reencode))
+        else:
+            runs.append((float(start), float(end), bool(reencode)))
+    return runs
+
+
+def render_smart(video_path, ass_text, output_path, workers=None, target_chunk_s=None,
+                 progress_callback=None, cancel_event=None, cache=None):
+    """
+    Burn ass_text into video_path re-encoding only the GOPs that overlap a
+    subtitle event; every other GOP is stream-copied untouched. Pieces are
+    cut as MPEG-TS so encoded and copied pieces concatenate cleanly.
+
+    With a RenderCache, pieces whose events are unchanged since a previous
+    render are reused, so a re-render after an edit only re-encodes the
+    chunks the edit touched.
+
+    Falls back to render_chunked when the re-encoded GOPs can't match the
+    source's codec parameters (see smart_encode_args).
+    """
+    try:
+        encode_args, copy_args = smart_encode_args(probe_video_stream(video_path))
+    except ValueError as e:
+        print(f"Smart render can't match {e}; re-encoding everything")
+        return render_chunked(video_path, ass_text, output_path, workers=workers, target_chunk_s=target_chunk_s,
+                              progress_callback=progress_callback, cancel_event=cancel_event, cache=cache)
+
+    cores = os.cpu_count() or 1
+    workers = workers or max(1, min(8, cores // 2))
+    duration = probe_duration(video_path)
+    if not duration:
+        raise RuntimeError(f"Could not determine duration of {video_path}")
+    keyframes = probe_keyframes(video_path)
+    events = parse_ass(ass_text.splitlines()).events
+    runs = plan_smart_render([(event.start / 1000, event.end / 1000) for event in events if not event.comment],
+                             keyframes, duration)
+
+    # Intersect the runs with a fixed keyframe grid: long encode runs spread
+    # across workers, and an edit only changes the pieces in its own grid cell
+    target_chunk_s = target_chunk_s or default_chunk_s(duration, workers, cache)
+    grid = plan_chunks(keyframes, duration, target_chunk_s)
+    pieces = []
+    run_index = 0
+    for grid_start, grid_end in grid:
+        while run_index < len(runs) and runs[run_index][1] <= grid_start:
+            run_index += 1
+        k = run_index
+        while k < len(runs) and runs[k][0] < grid_end:
+            start, end, reencode = runs[k]
+            pieces.append((max(start, grid_start), min(end, grid_end), reencode))
+            k += 1
+
+    render_pieces(video_path, ass_text, output_path, pieces, ".ts", encode_args, copy_args,
+                  workers, duration, progress_callback, cancel_event, cache)
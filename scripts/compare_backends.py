@@ -0,0 +1,128 @@
+import os
+import re
+import sys
+import time
+import argparse
+import difflib
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.audio_stream import load_pcm, SAMPLE_RATE
+from scripts.backends import BACKENDS, DEFAULT_BACKEND
+from scripts.model_cache import get_model, default_precision
+
+
+def _normalise(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def flatten_words(result):
+    return [w for segment in result["segments"] for w in segment.get("words", [])]
+
+
+def compare_word_timings(reference, candidate):
+    """
+    Align the two results' words by text and measure how far the timings
+    of matching words drift. Returns a dict with the share of reference
+    words matched and the mean / 95th percentile / max absolute start and
+    end differences in seconds.
+    """
+    ref_words = flatten_words(reference)
+    cand_words = flatten_words(candidate)
+    matcher = difflib.SequenceMatcher(
+        a=[_normalise(w["word"]) for w in ref_words],
+        b=[_normalise(w["word"]) for w in cand_words],
+        autojunk=False,
+    )
+    start_diffs, end_diffs = [], []
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            ref, cand = ref_words[block.a + k], cand_words[block.b + k]
+            start_diffs.append(abs(ref["start"] - cand["start"]))
+            end_diffs.append(abs(ref["end"] - cand["end"]))
+
+    stats = {"reference_words": len(ref_words), "candidate_words": len(cand_words),
+             "matched": len(start_diffs) / max(len(ref_words), 1)}
+    for name, diffs in (("start", start_diffs), ("end", end_diffs)):
+        diffs = np.asarray(diffs or [0.0])
+        stats[f"{name}_mean"] = float(diffs.mean())
+        stats[f"{name}_p95"] = float(np.percentile(diffs, 95))
+        stats[f"{name}_max"] = float(diffs.max())
+    return stats
+
+
+def benchmark(audio, model_name, device, backend, runs=1):
+    """Load the model (timed separately), then transcribe runs times. Returns (result, stats)."""
+    precision = default_precision(device, backend)
+    start = time.perf_counter()
+    model = get_model(model_name, device, precision, backend)
+    load_s = time.perf_counter() - start
+
+    times = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = model.transcribe(audio, task="transcribe", fp16=precision == "fp16", verbose=None,
+                                  word_timestamps=True, language="en" if model_name.endswith(".en") else None)
+        times.append(time.perf_counter() - start)
+
+    duration = len(audio) / SAMPLE_RATE
+    best = min(times)
+    return result, {"precision": precision, "load_s": load_s, "transcribe_s": best,
+                    "realtime_factor": duration / best}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare inference backends: word timing parity against a reference backend, and throughput.")
+    parser.add_argument("media", help="Audio or video file (a minute or two of speech is plenty)")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--reference", default=DEFAULT_BACKEND, choices=sorted(BACKENDS))
+    parser.add_argument("--backends", default=None,
+                        help="Comma separated backends to compare (default: every installed one)")
+    parser.add_argument("--runs", type=int, default=1, help="Transcriptions per backend; the fastest counts")
+    parser.add_argument("--max-mean-diff", type=float, default=0.1,
+                        help="Fail if matched words drift more than this many seconds on average")
+    parser.add_argument("--min-matched", type=float, default=0.9,
+                        help="Fail if fewer than this share of reference words are found")
+    args = parser.parse_args(argv)
+
+    names = args.backends.split(",") if args.backends else [n for n, b in BACKENDS.items() if b.is_available()]
+    audio = load_pcm(args.media)
+    print(f"{args.media}: {len(audio) / SAMPLE_RATE:.1f} s of audio, model {args.model} on {args.device}\n")
+
+    reference, ref_stats = benchmark(audio, args.model, args.device, args.reference, args.runs)
+    print(f"{'backend':<14}{'precision':<11}{'load s':>8}{'run s':>8}{'x realtime':>12}"
+          f"{'matched':>9}{'start mean/p95':>16}{'end mean/p95':>16}")
+
+    def row(name, stats, parity=None):
+        line = (f"{name:<14}{stats['precision']:<11}{stats['load_s']:>8.1f}{stats['transcribe_s']:>8.1f}"
+                f"{stats['realtime_factor']:>12.1f}")
+        if parity:
+            line += (f"{parity['matched']:>9.1%}"
+                     f"{parity['start_mean']:>8.3f}/{parity['start_p95']:.3f}"
+                     f"{parity['end_mean']:>9.3f}/{parity['end_p95']:.3f}")
+        print(line)
+
+    row(args.reference, ref_stats)
+    failures = []
+    for name in names:
+        if name == args.reference:
+            continue
+        result, stats = benchmark(audio, args.model, args.device, name, args.runs)
+        parity = compare_word_timings(reference, result)
+        row(name, stats, parity)
+        if parity["matched"] < args.min_matched:
+            failures.append(f"{name}: only {parity['matched']:.1%} of words matched")
+        if max(parity["start_mean"], parity["end_mean"]) > args.max_mean_diff:
+            failures.append(f"{name}: word timings drift more than {args.max_mean_diff} s on average")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,54 @@
-import whisper
 import os
-import subprocess
-import shlex
+import sys
+import json
 from pathlib import Path
 
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.model_cache import get_model, default_precision
+from scripts.backends import DEFAULT_BACKEND
+from scripts.audio_stream import load_pcm, iter_pcm_windows, SAMPLE_RATE
+from scripts.parallel_transcribe import transcribe_parallel, iter_transcribe_parallel, offset_segments, stitch_segments
+from scripts.batched_decode import transcribe_windows_batched
+from scripts.vad import is_silent, speech_chunks
+from scripts.ffmpeg_runner import run_ffmpeg
+from scripts.transcription_cache import TranscriptionCache, hash_audio, make_key
+from scripts.word_table import WordTable
+from scripts.transcription_journal import TranscriptionJournal
+
 class SubtitleGenerator:    
     
-    def __init__(self, model_name="base", device="cuda"):
+    def __init__(self, model_name="base", device="cuda", precision=None, cache=True, backend=DEFAULT_BACKEND):
         self.model_name = model_name
         self.device = device
-        self.model = whisper.load_model(model_name, device=device)
-    def extract_audio(self, video_path, audio_path):
+        # Inference engine, see scripts/backends.py
+        self.backend = backend
+        self.precision = precision or default_precision(device, backend)
+        # cache may be True (default location), False/None, or a TranscriptionCache
+        self.cache = TranscriptionCache() if cache is True else (cache or None)
+        self.last_result = None
+        self.stream_state = None
+        self.stream_finished = False
+
+    @property
+    def model(self):
+        # Drawn from the process-wide cache, so only the first job pays the load
+        return get_model(self.model_name, self.device, self.precision, self.backend)
+
+    def extract_audio(self, video_path, audio_path, progress_callback=None, cancel_event=None):
         # Extract audio from video using ffmpeg
         cmd = [
             'ffmpeg', '-y', '-i', video_path, '-vn', '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1', audio_path
         ]
-        subprocess.run(cmd, check=True)
+        run_ffmpeg(cmd, progress_callback=progress_callback, cancel_event=cancel_event)
+
+    def load_audio(self, video_path):
+        """
+        Decode the audio track into a 16 kHz mono float32 array in memory.
+        The array can be passed to transcribe_audio in place of a WAV path.
+        """
+        return load_pcm(video_path)
 
     def split_subtitle_segments_by_duration(self, result, max_segment_duration):
         """
@@ -23,45 +56,10 @@ class SubtitleGenerator:
         the same format as Whisper's result["segments"].
         Requires result to have 'words' in each segment (word_timestamps=True).
         """
-        new_segments = []
-        seg_id = 0
-
-        for segment in result["segments"]:
-            current_start = None
-            current_words = []
-
-            for word in segment["words"]:
-                if current_start is None:
-                    current_start = word["start"]
-
-                current_words.append(word)
-                
-                if word["end"] - current_start >= max_segment_duration:
-                    seg_id += 1
-                    new_segments.append({
-                        "id": seg_id,
-                        "start": current_start,
-                        "end": word["end"],
-                        "text": "".join([w["word"] for w in current_words]).strip(),
-                        "words": current_words
-                    })
-                    current_start = None
-                    current_words = []
-
-            # Handle leftover words at the end of the segment
-            if current_words:
-                seg_id += 1
-                new_segments.append({
-                    "id": seg_id,
-                    "start": current_start,
-                    "end": current_words[-1]["end"],
-                    "text": "".join([w["word"] for w in current_words]).strip(),
-                    "words": current_words
-                })
-
-        # Replace segments in original result
-        result["segments"] = new_segments
+        table = WordTable.from_result(result)
+        result["segments"] = table.to_segments(table.split_by_duration(max_segment_duration))
         return result
+
     def split_subtitle_segments_by_word_count(self, result, max_words_per_segment):
         """
         Splits Whisper transcription segments into smaller ones based on
@@ -69,82 +67,436 @@ class SubtitleGenerator:
         Keeps the same format as Whisper's result["segments"].
         Requires result to have 'words' in each segment (word_timestamps=True).
         """
-        new_segments = []
-        seg_id = 0
-
-        for segment in result["segments"]:
-            current_words = []
-            current_start = None
-
-            for word in segment["words"]:
-                if current_start is None:
-                    current_start = word["start"]
-
-                current_words.append(word)
-
-                if len(current_words) >= max_words_per_segment:
-                    seg_id += 1
-                    new_segments.append({
-                        "id": seg_id,
-                        "start": current_start,
-                        "end": current_words[-1]["end"],
-                        "text": "".join([w["word"] for w in current_words]).strip(),
-                        "words": current_words
-                    })
-                    current_words = []
-                    current_start = None
-
-            # Handle leftover words
-            if current_words:
-                seg_id += 1
-                new_segments.append({
-                    "id": seg_id,
-                    "start": current_start,
-                    "end": current_words[-1]["end"],
-                    "text": "".join([w["word"] for w in current_words]).strip(),
-                    "words": current_words
-                })
-
-        result["segments"] = new_segments
+        table = WordTable.from_result(result)
+        result["segments"] = table.to_segments(table.split_by_word_count(max_words_per_segment))
         return result
 
-    def transcribe_audio(self, audio_path, srt_path, model_name="base", device="cuda", max_words_per_line=None, max_segment_duration=None, max_words_per_segment=None):
-        def split_subtitle_text(text, max_words):
-            """Split text into multiple lines with at most max_words words per line. (multiple lines withing the same segment)"""
-            words = text.split()
-            lines = []
-            for i in range(0, len(words), max_words):
-                lines.append(" ".join(words[i:i + max_words]))
-            return "\n".join(lines)  # SRT uses actual line breaks
+    def _backend_key(self):
+        # Keys from before backends existed stay valid for the default one
+        return {} if self.backend == DEFAULT_BACKEND else {"backend": self.backend}
+
+    def _cache_lookup(self, audio, model_name, word_timestamps, chunking, precision):
+        """
+        Return (key, cached result or None); key is None when caching is off.
+        Results are kept per precision: fp16 and int8 runs don't return
+        exactly what an fp32 run does.
+        """
+        if not self.cache:
+            return None, None
+        audio_hash = hash_audio(audio)
+        key = make_key(audio_hash, model_name, "transcribe", word_timestamps=word_timestamps, chunking=chunking,
+                       precision=precision, **self._backend_key())
+        result = self.cache.get(key)
+        if result is None and not word_timestamps:
+            # A result with word timestamps also serves a plain request
+            result = self.cache.get(make_key(audio_hash, model_name, "transcribe", word_timestamps=True, chunking=chunking,
+                                             precision=precision, **self._backend_key()))
+        if result is not None:
+            print("Using cached transcription")
+        return key, result
 
+    def transcribe(self, audio, word_timestamps=False, model_name=None, device=None, workers=None, batch_size=None):
+        """
+        Run Whisper on audio (a file path or a 16 kHz float32 array) and return
+        the raw result dict. With workers > 1 the audio is split at silence and
+        the speech chunks are transcribed in parallel processes. With
+        batch_size > 1 the speech chunks are decoded batch_size at a time in
+        one model (see transcribe_batched).
+        """
+        model_name = model_name or self.model_name
+        device = device or self.device
+        precision = self.precision if device == self.device else default_precision(device, self.backend)
+        parallel = bool(workers and workers > 1)
+        batched = bool(batch_size and batch_size > 1) and not parallel
 
-        model = whisper.load_model(model_name, device=device)
-        
-        if max_segment_duration or max_words_per_segment:
-            result = model.transcribe(audio_path, task="transcribe", fp16=True, verbose=True, word_timestamps=True)
+        if isinstance(audio, (str, os.PathLike)) and (parallel or batched or self.cache):
+            audio = self.load_audio(audio)
 
-            if max_segment_duration:
-                result = self.split_subtitle_segments_by_duration(result, max_segment_duration)
+        chunking = "vad" if parallel else "batched" if batched else None
+        key, result = self._cache_lookup(audio, model_name, word_timestamps, chunking, precision)
+        if result is not None:
+            return result
 
-            if max_words_per_segment:
-                result = self.split_subtitle_segments_by_word_count(result, max_words_per_segment)
+        if batched:
+            result = self.transcribe_batched(audio, word_timestamps, model_name, device, batch_size)
+        elif parallel:
+            result = transcribe_parallel(audio, model_name=model_name, device=device, precision=precision,
+                                         backend=self.backend, workers=workers, task="transcribe", word_timestamps=word_timestamps)
         else:
-            result = model.transcribe(audio_path, task="transcribe", fp16=True, verbose=True)
-        # Save SRT
-        with open(srt_path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(result["segments"]):
-                start = segment["start"]
-                end = segment["end"]
+            model = get_model(model_name, device, precision, self.backend)
+            result = model.transcribe(audio, task="transcribe", fp16=precision == "fp16", verbose=True, word_timestamps=word_timestamps)
+
+        if key:
+            self.cache.put(key, result)
+        return result
+
+    def transcribe_batched(self, audio, word_timestamps=True, model_name=None, device=None, batch_size=8):
+        """
+        Split audio at silence into windows of at most 30 s and decode them
+        batch_size per forward pass, which keeps the CPU's matrix kernels far
+        busier than one window at a time. Returns a whisper-style result.
+        Backends other than openai-whisper transcribe the windows one by one.
+        """
+        model_name = model_name or self.model_name
+        device = device or self.device
+        precision = self.precision if device == self.device else default_precision(device, self.backend)
+        model = get_model(model_name, device, precision, self.backend)
+
+        chunks = speech_chunks(audio, SAMPLE_RATE, target_chunk_s=30)
+        windows = [audio[start:end] for start, end in chunks]
+        if self.backend in ("whisper", "whisper-int8"):
+            outputs = transcribe_windows_batched(model, windows, batch_size, word_timestamps, fp16=precision == "fp16")
+        else:
+            outputs = []
+            language = None  # detected on the first window, then fixed
+            for window in windows:
+                window_result = model.transcribe(window, task="transcribe", verbose=None,
+                                                 word_timestamps=word_timestamps, language=language)
+                language = language or window_result.get("language")
+                outputs.append((window_result["segments"], window_result.get("language")))
+
+        return stitch_segments([
+            (offset_segments(segments, start / SAMPLE_RATE), language)
+            for (start, _), (segments, language) in zip(chunks, outputs)
+        ])
+
+    def iter_transcribe(self, audio, word_timestamps=True, model_name=None, device=None, chunk_s=30, should_stop=None,
+                        journal_path=None):
+        """
+        Transcribe audio chunk by chunk, yielding (segments, position_seconds)
+        as each chunk finishes so callers can show results while Whisper runs.
+
+        The audio is cut at silences into chunks of about chunk_s seconds and
+        the tail of the previous chunk's text is passed on as the prompt. If
+        should_stop() returns True the generator ends after the current chunk.
+        The full result is stored in self.last_result once every chunk is done.
+
+        With journal_path, finished chunks are checkpointed there and a rerun
+        of the same job resumes after the last one (see iter_transcribe_windows).
+        """
+        for _, end, segments in self.iter_transcribe_windows(audio, word_timestamps, model_name, device,
+                                                             chunk_s, should_stop, journal_path):
+            yield segments, end
+
+    def iter_transcribe_windows(self, audio, word_timestamps=True, model_name=None, device=None, chunk_s=30,
+                                should_stop=None, journal_path=None):
+        """
+        Like iter_transcribe, but yields (window_start, window_end, segments)
+        so a caller can tell which stretch of audio each batch covers. The
+        windows depend only on the audio, so passes with different models
+        over the same audio produce the same windows.
+
+        With journal_path, each finished window is checkpointed to that file.
+        If it already holds checkpoints for the same audio and settings, the
+        recovered segments are yielded first as one window and Whisper
+        carries on from the last offset reached. The journal is deleted once
+        the job completes.
+        """
+        model_name = model_name or self.model_name
+        device = device or self.device
+        precision = self.precision if device == self.device else default_precision(device, self.backend)
+
+        if isinstance(audio, (str, os.PathLike)):
+            audio = self.load_audio(audio)
+        duration = len(audio) / SAMPLE_RATE
+
+        key, result = self._cache_lookup(audio, model_name, word_timestamps, "stream", precision)
+        if result is not None:
+            self.last_result = result
+            yield 0.0, duration, result["segments"]
+            return
+
+        segments = []
+        language = None
+        prompt = None
+        done = 0  # samples already transcribed by an earlier, interrupted run
+        journal = None
+        if journal_path:
+            journal = TranscriptionJournal(journal_path, make_key(
+                hash_audio(audio), model_name, "transcribe", word_timestamps=word_timestamps,
+                chunking="stream", chunk_s=chunk_s, precision=precision, **self._backend_key()))
+            for record in journal.load():
+                segments.extend(record["segments"])
+                language = record["language"]
+                prompt = record["prompt"]
+                done = record["offset"]
+            if done:
+                yield 0.0, done / SAMPLE_RATE, list(segments)
+
+        model = get_model(model_name, device, precision, self.backend)
+        chunks = speech_chunks(audio, SAMPLE_RATE, target_chunk_s=chunk_s)
+        try:
+            for start, end in chunks:
+                if end <= done:
+                    continue
+                if should_stop and should_stop():
+                    return
+                # The language detected on the first chunk holds for the rest
+                chunk_result = model.transcribe(audio[start:end], task="transcribe", fp16=precision == "fp16",
+                                                verbose=None, word_timestamps=word_timestamps, initial_prompt=prompt,
+                                                language=language)
+                language = language or chunk_result.get("language")
+                new_segments = offset_segments(chunk_result["segments"], start / SAMPLE_RATE)
+                for segment in new_segments:
+                    segment["id"] = len(segments)
+                    segments.append(segment)
+                prompt = chunk_result["text"][-200:].strip() or None
+                if journal:
+                    journal.checkpoint(end, segments=new_segments, language=language, prompt=prompt)
+                yield start / SAMPLE_RATE, end / SAMPLE_RATE, new_segments
+        finally:
+            if journal:
+                journal.close()
+
+        result = {"text": "".join(s["text"] for s in segments), "segments": segments, "language": language}
+        if key:
+            self.cache.put(key, result)
+        if journal:
+            journal.finish()
+        self.last_result = result
 
-                
-                if max_words_per_line:
-                    text = split_subtitle_text(segment["text"].strip(), max_words_per_line)
+    def iter_transcribe_parallel(self, audio, word_timestamps=True, model_name=None, device=None, workers=2,
+                                 should_stop=None):
+        """
+        The workers > 1 path of transcribe() as a generator: yields
+        (segments, position_seconds) per speech chunk, in order, as the
+        process pool finishes them (see iter_transcribe_parallel). If
+        should_stop() returns True, queued chunks are cancelled and the
+        generator ends. The full result is stored in self.last_result once
+        every chunk is done.
+        """
+        model_name = model_name or self.model_name
+        device = device or self.device
+        precision = self.precision if device == self.device else default_precision(device, self.backend)
+
+        if isinstance(audio, (str, os.PathLike)):
+            audio = self.load_audio(audio)
+
+        key, result = self._cache_lookup(audio, model_name, word_timestamps, "vad", precision)
+        if result is None:
+            results = []
+            for _, end, segments, language in iter_transcribe_parallel(
+                    audio, model_name=model_name, device=device, precision=precision, backend=self.backend,
+                    workers=workers, task="transcribe", word_timestamps=word_timestamps, should_stop=should_stop):
+                results.append((segments, language))
+                yield segments, end
+            if should_stop and should_stop():
+                return
+            result = stitch_segments(results)
+            if key:
+                self.cache.put(key, result)
+        else:
+            yield result["segments"], len(audio) / SAMPLE_RATE
+        self.last_result = result
+
+    def iter_transcribe_stream(self, source, word_timestamps=True, model_name=None, device=None, window_s=30,
+                               should_stop=None, start_sample=0, prompt=None, first_id=0, language=None):
+        """
+        Memory-bounded transcription for very long inputs. source is a media
+        path (read through the ffmpeg pipe), a raw s16le .pcm file or array
+        (memory-mapped), or any iterable of sample arrays.
+
+        Audio is pulled one window at a time and each window is transcribed
+        on its own, with the previous window's text as the prompt, so neither
+        the waveform nor its mel spectrogram is ever held whole. Only windows
+        of near-digital silence are skipped: a window can't be judged against
+        the rest of the recording, so relative VAD would drop speech under a
+        music bed. The language detected on the first window is used for the
+        rest. Yields (segments, position_seconds) per window. Unlike
+        iter_transcribe no full result is kept; callers write segments out as
+        they arrive.
+
+        start_sample, prompt, first_id and language continue an earlier run;
+        the state to pass back is kept in self.stream_state after every
+        window, and self.stream_finished is set once the whole source has
+        been read.
+        """
+        model_name = model_name or self.model_name
+        device = device or self.device
+        precision = self.precision if device == self.device else default_precision(device, self.backend)
+
+        model = get_model(model_name, device, precision, self.backend)
+        next_id = first_id
+        self.stream_state = {"offset": start_sample, "prompt": prompt, "next_id": next_id, "language": language}
+        self.stream_finished = False
+        for offset, window in iter_pcm_windows(source, window_s, start_sample=start_sample):
+            if should_stop and should_stop():
+                return
+            end = offset + len(window)
+            segments = []
+            if not is_silent(window, SAMPLE_RATE):
+                window_result = model.transcribe(window, task="transcribe", fp16=precision == "fp16", verbose=None,
+                                                 word_timestamps=word_timestamps, initial_prompt=prompt,
+                                                 language=language)
+                language = language or window_result.get("language")
+                segments = offset_segments(window_result["segments"], offset / SAMPLE_RATE)
+                for segment in segments:
+                    segment["id"] = next_id
+                    next_id += 1
+                prompt = window_result["text"][-200:].strip() or None
+            self.stream_state = {"offset": end, "prompt": prompt, "next_id": next_id, "language": language}
+            yield segments, end / SAMPLE_RATE
+        self.stream_finished = True
+
+    def _stream_source_hash(self, source):
+        """Identity of a streaming source for resume journals, or None if it can't be replayed."""
+        if isinstance(source, (str, os.PathLike)):
+            from scripts.render_cache import hash_file
+            return hash_file(source)
+        if isinstance(source, np.ndarray):
+            return hash_audio(source)
+        return None
+
+    def transcribe_stream_to_srt(self, source, srt_path, model_name=None, device=None, max_words_per_line=None,
+                                 max_segment_duration=None, max_words_per_segment=None, words_path=None,
+                                 window_s=30, should_stop=None, journal_path=None):
+        """
+        Transcribe source with iter_transcribe_stream, appending cues to
+        srt_path (and segments to words_path, in the load_words format) as
+        each window finishes. Returns the number of cues written.
+
+        With journal_path, the offset reached and the size of both output
+        files are checkpointed after every window. Rerunning the same job
+        cuts the outputs back to the last checkpoint and continues from
+        there, seeking past the audio already done. The journal is deleted
+        once the job completes.
+        """
+        model_name = model_name or self.model_name
+        resume = {"offset": 0, "prompt": None, "next_id": 0, "language": None, "cues": 0, "srt_bytes": 0,
+                  "words_bytes": 0}
+        journal = None
+        device = device or self.device
+        precision = self.precision if device == self.device else default_precision(device, self.backend)
+        source_hash = self._stream_source_hash(source) if journal_path else None
+        if source_hash:
+            journal = TranscriptionJournal(journal_path, make_key(
+                source_hash, model_name, "transcribe", chunking="stream", window_s=window_s,
+                max_words_per_line=max_words_per_line, max_segment_duration=max_segment_duration,
+                max_words_per_segment=max_words_per_segment, words=bool(words_path), precision=precision,
+                **self._backend_key()))
+            records = journal.load()
+            if records and os.path.exists(srt_path) and (not words_path or os.path.exists(words_path)):
+                resume.update(records[-1])
+            else:
+                journal = TranscriptionJournal(journal_path, journal.job_key)  # start over
+
+        count = resume["cues"]
+        srt_file = self._open_for_resume(srt_path, resume["srt_bytes"])
+        words_file = self._open_for_resume(words_path, resume["words_bytes"]) if words_path else None
+        try:
+            if words_file and not resume["words_bytes"]:
+                words_file.write('{"segments": [')
+            first = resume["next_id"] == 0
+            for segments, _ in self.iter_transcribe_stream(source, True, model_name, device, window_s, should_stop,
+                                                           resume["offset"], resume["prompt"], resume["next_id"],
+                                                           resume["language"]):
+                if segments:
+                    srt_text = self.resegment({"segments": segments}, max_words_per_line, max_segment_duration,
+                                              max_words_per_segment, start_index=count + 1)
+                    count += srt_text.count(" --> ")
+                    srt_file.write(srt_text)
+                    if words_file:
+                        for segment in segments:
+                            words_file.write(("" if first else ",") + json.dumps(segment, ensure_ascii=False,
+                                                                                 default=float))
+                            first = False
+                if journal:
+                    journal.checkpoint(cues=count, srt_bytes=self._sync(srt_file),
+                                       words_bytes=self._sync(words_file) if words_file else 0,
+                                       **self.stream_state)
                 else:
-                    text = segment["text"].strip()
-                
-                f.write(f"{i+1}\n")
-                f.write(f"{self.format_timestamp(start)} --> {self.format_timestamp(end)}\n")
-                f.write(f"{text}\n\n")
+                    srt_file.flush()
+                    if words_file:
+                        words_file.flush()
+            if self.stream_finished:
+                if words_file:
+                    words_file.write("]}")
+                if journal:
+                    journal.finish()
+        finally:
+            srt_file.close()
+            if words_file:
+                words_file.close()
+            if journal:
+                journal.close()
+        return count
+
+    def _open_for_resume(self, path, size):
+        """Open path for writing, keeping its first size bytes (a fresh file when size is 0)."""
+        if not size:
+            return open(path, "w", encoding="utf-8")
+        with open(path, "r+b") as f:
+            f.truncate(size)
+        return open(path, "a", encoding="utf-8")
+
+    def _sync(self, f):
+        """Flush f to disk and return its size in bytes."""
+        f.flush()
+        os.fsync(f.fileno())
+        return os.fstat(f.fileno()).st_size
+
+    def transcribe_audio(self, audio_path, srt_path, model_name=None, device=None, max_words_per_line=None, max_segment_duration=None, max_words_per_segment=None, workers=None, words_path=None, journal_path=None):
+        """
+        Transcribe audio_path (a file path, or a float32 array from load_audio)
+        and write the resulting subtitles to srt_path.
+
+        The raw word-level result is returned and kept in self.last_result (and
+        written to words_path if given) so it can be re-segmented later without
+        running Whisper again.
+
+        With journal_path the audio is transcribed chunk by chunk with
+        checkpoints, so a killed run picks up where it stopped when rerun.
+        """
+        if journal_path and not (workers and workers > 1):
+            for _ in self.iter_transcribe(audio_path, model_name=model_name, device=device, journal_path=journal_path):
+                pass
+            result = self.last_result
+        else:
+            result = self.transcribe(audio_path, word_timestamps=True, model_name=model_name, device=device, workers=workers)
+        self.last_result = result
+        if words_path:
+            self.save_words(result, words_path)
+
+        srt_text = self.resegment(result, max_words_per_line, max_segment_duration, max_words_per_segment)
+        with open(srt_path, "w", encoding="utf-8") as f:
+            f.write(srt_text)
+
+        return result
+
+    def resegment(self, result, max_words_per_line=None, max_segment_duration=None, max_words_per_segment=None, max_chars_per_line=None, start_index=1):
+        """
+        Re-apply the splitting rules to a word-level result (a whisper result
+        dict or a WordTable) and return SRT text. The input is left untouched,
+        so this can be called repeatedly; pass a WordTable to skip rebuilding it.
+        """
+        table = result if isinstance(result, WordTable) else WordTable.from_result(result)
+        bounds = table.segment_bounds
+        if max_segment_duration:
+            bounds = table.split_by_duration(max_segment_duration, bounds)
+        if max_words_per_segment:
+            bounds = table.split_by_word_count(max_words_per_segment, bounds)
+        return self.table_to_srt(table, bounds, max_words_per_line, max_chars_per_line, start_index)
+
+    def table_to_srt(self, table, bounds, max_words_per_line=None, max_chars_per_line=None, start_index=1):
+        parts = []
+        for g in range(len(bounds) - 1):
+            i, j = int(bounds[g]), int(bounds[g + 1])
+            breaks = table.line_breaks(i, j, max_words_per_line, max_chars_per_line) + [j]
+            text = "\n".join(" ".join(table.words_text(a, b).split()) for a, b in zip(breaks, breaks[1:]))
+
+            parts.append(f"{g + start_index}\n")
+            parts.append(f"{self.format_timestamp(table.start[i])} --> {self.format_timestamp(table.end[j - 1])}\n")
+            parts.append(f"{text}\n\n")
+        return "".join(parts)
+
+    def save_words(self, result, words_path):
+        """Write a word-level result to a JSON sidecar."""
+        with open(words_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, default=float)
+
+    def load_words(self, words_path):
+        with open(words_path, "r", encoding="utf-8") as f:
+            return json.load(f)
 
     def format_timestamp(self, seconds):
         h = int(seconds // 3600)
@@ -153,7 +505,7 @@ class SubtitleGenerator:
         ms = int((seconds - int(seconds)) * 1000)
         return f"{h:02}:{m:02}:{s:02},{ms:03}"
 
-    def add_subtitles_to_video(self, video_path, srt_path, output_path, burn_in=False):
+    def add_subtitles_to_video(self, video_path, srt_path, output_path, burn_in=False, progress_callback=None, cancel_event=None):
         # Add subtitles to video using ffmpeg
         print(video_path, srt_path, output_path, burn_in)
         if burn_in:
@@ -180,18 +532,17 @@ class SubtitleGenerator:
         # cmd = [
         #     'ffmpeg', '-y', '-i', video_path, '-vf', f"subtitles={srt_path}", output_path
         # ]
-        subprocess.run(cmd, check=True)
+        run_ffmpeg(cmd, progress_callback=progress_callback, cancel_event=cancel_event)
 
 if __name__ == "__main__":
     video_path = "input.mp4"  # Change to your video file
-    audio_path = "audio.wav"
     srt_path = "subtitles.srt"
     output_path = "output_with_subs.mp4"
     subtitleGenerator = SubtitleGenerator(model_name="base", device="cuda")
     print("Extracting audio...")
-    subtitleGenerator.extract_audio(video_path, audio_path)
+    audio = subtitleGenerator.load_audio(video_path)
     print("Transcribing audio...")
-    subtitleGenerator.transcribe_audio(audio_path, srt_path, max_words_per_line=15, max_segment_duration=5, max_words_per_segment=5)
+    subtitleGenerator.transcribe_audio(audio, srt_path, max_words_per_line=15, max_segment_duration=5, max_words_per_segment=5)
     print("Adding subtitles to video...")
     subtitleGenerator.add_subtitles_to_video(video_path, srt_path, output_path)
     print(f"Done! Output video: {output_path}")
\ No newline at end of file
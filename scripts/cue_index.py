@@ -0,0 +1,84 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class CueIndex:
+    """
+    Time index over SubtitleEvents: which events are on screen at a given
+    millisecond, with overlaps, in O(log n) per lookup.
+
+    Events are grouped by duration class (durations in [2^(c-1), 2^c) ms go
+    to class c), and each class keeps its events sorted by start. An event
+    of class c that is active at t started in (t - 2^c, t], so a lookup is
+    one bisect per class (a few dozen at most) and a short scan of events
+    that mostly do contain t. A cue that runs for the whole film lands in a
+    class of its own and never slows down lookups around it.
+
+    Events are added and removed one at a time, so an edit only touches the
+    events it changed. Comments and events with no duration are never shown
+    and aren't indexed.
+    """
+
+    def __init__(self, events=()):
+        self._classes = {}  # duration class -> sorted [(start, seq, event)]
+        self._entries = {}  # id(event) -> (class, entry)
+        self._seq = 0
+        self.extend(events)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, event):
+        return id(event) in self._entries
+
+    def _entry(self, event):
+        if event.comment or event.end <= event.start or id(event) in self._entries:
+            return None
+        self._seq += 1
+        entry = (event.start, self._seq, event)
+        duration_class = (event.end - event.start).bit_length()
+        self._entries[id(event)] = (duration_class, entry)
+        return duration_class, entry
+
+    def add(self, event):
+        indexed = self._entry(event)
+        if indexed:
+            insort(self._classes.setdefault(indexed[0], []), indexed[1])
+
+    def extend(self, events):
+        """Add many events; sorts each class once instead of inserting one by one."""
+        touched = set()
+        for event in events:
+            indexed = self._entry(event)
+            if indexed:
+                self._classes.setdefault(indexed[0], []).append(indexed[1])
+                touched.add(indexed[0])
+        for duration_class in touched:
+            self._classes[duration_class].sort()
+
+    def remove(self, event):
+        """Drop an event added earlier; unknown events are ignored."""
+        indexed = self._entries.pop(id(event), None)
+        if indexed is None:
+            return
+        duration_class, entry = indexed
+        entries = self._classes[duration_class]
+        del entries[bisect_left(entries, entry[:2])]
+        if not entries:
+            del self._classes[duration_class]
+
+    def clear(self):
+        self._classes.clear()
+        self._entries.clear()
+
+    def at(self, ms):
+        """Events on screen at ms (start <= ms < end), in render order: layer, then start."""
+        active = []
+        for duration_class, entries in self._classes.items():
+            lo = bisect_right(entries, (ms - (1 << duration_class), float("inf")))
+            hi = bisect_right(entries, (ms, float("inf")))
+            for i in range(lo, hi):
+                event = entries[i][2]
+                if event.end > ms:
+                    active.append(entries[i])
+        active.sort(key=lambda entry: (entry[2].layer, entry[0], entry[1]))
+        return [entry[2] for entry in active]
@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import queue
+import select
+import socket
+import itertools
+import threading
+import argparse
+import urllib.request
+import urllib.error
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+
+class DaemonBusy(Exception):
+    """The server's job queue is full; retry later or run in-process."""
+
+
+class TranscriptionJob:
+    def __init__(self, priority, request):
+        self.priority = priority
+        self.request = request
+        # Bounded, so a slow client stalls its own job instead of buffering
+        # an entire transcript in the server
+        self.events = queue.Queue(maxsize=64)
+        self.cancelled = threading.Event()
+
+
+class JobScheduler:
+    """
+    Priority queue of transcription jobs served by a fixed pool of runner
+    threads. Lower priority numbers run first; equal priorities run in
+    submission order. submit() raises DaemonBusy once max_pending jobs are
+    waiting, which the HTTP layer turns into 503 Retry-After.
+    """
+
+    def __init__(self, runners=1, max_pending=16):
+        self.max_pending = max_pending
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.active = 0
+        for _ in range(runners):
+            threading.Thread(target=self._run_forever, daemon=True).start()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def submit(self, job):
+        with self._lock:
+            if self._queue.qsize() >= self.max_pending:
+                raise DaemonBusy(f"{self._queue.qsize()} jobs already queued")
+            self._queue.put((job.priority, next(self._counter), job))
+
+    def _run_forever(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job.cancelled.is_set():
+                continue
+            with self._lock:
+                self.active += 1
+            try:
+                self._run(job)
+            except Exception as e:
+                self._emit(job, {"type": "error", "error": str(e)})
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+    def _emit(self, job, event):
+        while not job.cancelled.is_set():
+            try:
+                job.events.put(event, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, job):
+        from scripts.create_subtitles import SubtitleGenerator
+
+        request = job.request
+        generator = SubtitleGenerator(model_name=request.get("model", "base"), device=request.get("device", "cpu"),
+                                      backend=request.get("backend", "whisper"))
+        for segments, position in generator.iter_transcribe(
+                request["media_path"], word_timestamps=request.get("word_timestamps", True),
+                should_stop=job.cancelled.is_set):
+            if not self._emit(job, {"type": "segments", "segments": segments, "position": position}):
+                return
+        if generator.last_result is not None:
+            self._emit(job, {"type": "result", "result": generator.last_result})
+        elif not job.cancelled.is_set():
+            self._emit(job, {"type": "error", "error": "transcription stopped without a result"})
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    scheduler = None  # set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, default=float).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        from scripts.model_cache import get_model_cache
+
+        cache = get_model_cache()
+        self._send_json(200, {
+            "status": "ok",
+            "pending": self.scheduler.pending(),
+            "active": self.scheduler.active,
+            "models": [list(key) for key in cache.keys()],
+            "model_memory_mb": cache.used_mb(),
+        })
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        if self.path == "/transcribe":
+            self._transcribe(request)
+        elif self.path == "/resegment":
+            self._resegment(request)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _resegment(self, request):
+        from scripts.create_subtitles import SubtitleGenerator
+
+        generator = SubtitleGenerator(cache=False)
+        try:
+            result = request.get("result") or generator.load_words(request["words_path"])
+            srt_text = generator.resegment(
+                result,
+                max_words_per_line=request.get("max_words_per_line"),
+                max_segment_duration=request.get("max_segment_duration"),
+                max_words_per_segment=request.get("max_words_per_segment"),
+            )
+        except KeyError as e:
+            self._send_json(400, {"error": f"missing field {e}"})
+            return
+        except (OSError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"srt": srt_text})
+
+    def _client_gone(self):
+        # A closed connection reads as ready with nothing to read
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+        except OSError:
+            return True
+
+    def _transcribe(self, request):
+        if not request.get("media_path") or not os.path.exists(request["media_path"]):
+            self._send_json(400, {"error": "media_path must name an existing local file"})
+            return
+        job = TranscriptionJob(int(request.get("priority", 10)), request)
+        try:
+            self.scheduler.submit(job)
+        except DaemonBusy as e:
+            self._send_json(503, {"error": str(e)}, {"Retry-After": "5"})
+            return
+
+        # Stream newline-delimited JSON events as the job produces them
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            while True:
+                try:
+                    event = job.events.get(timeout=0.5)
+                except queue.Empty:
+                    # Nothing is written while the job waits in the queue, so
+                    # look for a disconnect; a cancelled job is skipped when
+                    # its turn comes
+                    if self._client_gone():
+                        break
+                    continue
+                line = json.dumps(event, default=float).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+                if event["type"] in ("result", "error"):
+                    break
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            # Client went away (or we're done): stop the job so it frees its runner
+            job.cancelled.set()
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, runners=1, max_pending=16, memory_budget_mb=None, preload=()):
+    from scripts.model_cache import get_model_cache
+
+    cache = get_model_cache()
+    if memory_budget_mb:
+        cache.memory_budget_mb = memory_budget_mb
+    for spec in preload:
+        model_name, _, rest = spec.partition(":")
+        device, _, backend = rest.partition(":")
+        print(f"Preloading {model_name} on {device or 'cpu'}...")
+        cache.get(model_name, device or "cpu", backend=backend or "whisper")
+
+    DaemonHandler.scheduler = JobScheduler(runners=runners, max_pending=max_pending)
+    server = ThreadingHTTPServer((host, port), DaemonHandler)
+    server.daemon_threads = True
+    print(f"Transcription server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class DaemonClient:
+    """Client for a running transcription server."""
+
+    def __init__(self, url=DEFAULT_URL, timeout=5):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.last_result = None
+
+    def _post(self, path, payload, timeout=None):
+        request = urllib.request.Request(
+            self.url + path, data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 503:
+                raise DaemonBusy(e.read().decode(errors="replace")) from e
+            raise
+
+    def health(self):
+        with urllib.request.urlopen(self.url + "/health", timeout=self.timeout) as response:
+            return json.load(response)
+
+    def is_available(self):
+        try:
+            return self.health().get("status") == "ok"
+        except (OSError, ValueError):
+            return False
+
+    def iter_transcribe(self, media_path, model_name="base", device="cpu", priority=10, word_timestamps=True,
+                        backend="whisper"):
+        """
+        Submit a job and yield (segments, position_seconds) as the server
+        streams them, mirroring SubtitleGenerator.iter_transcribe. The full
+        result is stored in self.last_result when the job finishes.
+        Raises DaemonBusy if the server's queue is full.
+        """
+        self.last_result = None
+        payload = {
+            "media_path": os.path.abspath(media_path), "model": model_name, "device": device,
+            "priority": priority, "word_timestamps": word_timestamps, "backend": backend,
+        }
+        with self._post("/transcribe", payload) as response:
+            for line in response:
+                event = json.loads(line)
+                if event["type"] == "segments":
+                    yield event["segments"], event["position"]
+                elif event["type"] == "result":
+                    self.last_result = event["result"]
+                elif event["type"] == "error":
+                    raise RuntimeError(f"Transcription server error: {event['error']}")
+
+    def transcribe(self, media_path, model_name="base", device="cpu", priority=10, word_timestamps=True,
+                   backend="whisper"):
+        for _ in self.iter_transcribe(media_path, model_name, device, priority, word_timestamps, backend):
+            pass
+        return self.last_result
+
+    def resegment(self, result, max_words_per_line=None, max_segment_duration=None, max_words_per_segment=None):
+        payload = {
+            "result": result, "max_words_per_line": max_words_per_line,
+            "max_segment_duration": max_segment_duration, "max_words_per_segment": max_words_per_segment,
+        }
+        with self._post("/resegment", payload, timeout=self.timeout) as response:
+            return json.load(response)["srt"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep Whisper models warm and serve transcription jobs locally.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--runners", type=int, default=1, help="Jobs transcribed at the same time")
+    parser.add_argument("--max-pending", type=int, default=16, help="Queued jobs before new ones are refused")
+    parser.add_argument("--memory-budget-mb", type=int, default=None, help="Model cache budget")
+    parser.add_argument("--preload", action="append", default=[], metavar="MODEL[:DEVICE[:BACKEND]]",
+                        help="Load a model at startup, e.g. --preload small:cpu or --preload small:cpu:ctranslate2")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.runners, args.max_pending, args.memory_budget_mb, args.preload)
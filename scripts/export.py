@@ -0,0 +1,105 @@
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.add_subtitles_to_video import convert_to_ass
+from scripts.ffmpeg_runner import run_ffmpeg, subtitles_filter
+from scripts.subtitle_document import parse, dumps
+
+
+EXPORT_FORMATS = ("soft_mp4", "burned_mp4", "srt", "ass", "vtt")
+
+
+def srt_to_vtt(srt_text):
+    """Convert SRT text to WebVTT (cue numbers dropped, '.' millisecond separator)."""
+    return dumps(parse(srt_text, "srt"), "vtt")
+
+
+def export_paths(output_base, formats):
+    """Map each requested format to its output path next to output_base."""
+    suffixes = {
+        "soft_mp4": "_soft.mp4",
+        "burned_mp4": "_burned.mp4",
+        "srt": ".srt",
+        "ass": ".ass",
+        "vtt": ".vtt",
+    }
+    return {fmt: output_base + suffixes[fmt] for fmt in formats}
+
+
+def export_deliverables(video_path, srt_text, output_base, formats=EXPORT_FORMATS, ass_text=None,
+                        progress_callback=None, cancel_event=None):
+    """
+    Write every requested deliverable for one video with a single ffmpeg run.
+
+    Sidecar files (srt/ass/vtt) are written straight from the subtitle text.
+    The video outputs share one ffmpeg process: the source is read once, the
+    soft-subtitled MP4 stream-copies it, and only the burned-in branch
+    decodes and re-encodes. The burned-in output uses ass_text when given
+    (keeping its styling), otherwise the default style from convert_to_ass.
+
+    Returns a dict of format -> written path.
+    """
+    unknown = set(formats) - set(EXPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown export formats: {', '.join(sorted(unknown))}")
+
+    paths = export_paths(output_base, formats)
+    ass_text = ass_text or convert_to_ass(srt_text)
+
+    sidecars = {"srt": srt_text, "ass": ass_text}
+    if "vtt" in paths:
+        sidecars["vtt"] = srt_to_vtt(srt_text)
+    for fmt, text in sidecars.items():
+        if fmt in paths:
+            with open(paths[fmt], "w", encoding="utf-8") as f:
+                f.write(text)
+
+    if "soft_mp4" not in paths and "burned_mp4" not in paths:
+        return paths
+
+    # The ffmpeg graph reads the subtitles from files; use a scratch copy of
+    # any that weren't requested as deliverables
+    work_dir = tempfile.mkdtemp(prefix="subtitle_export_")
+    try:
+        srt_path = paths.get("srt") or os.path.join(work_dir, "subtitles.srt")
+        ass_path = paths.get("ass") or os.path.join(work_dir, "subtitles.ass")
+        for path, text in ((srt_path, srt_text), (ass_path, ass_text)):
+            if path.startswith(work_dir):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+        run_export_ffmpeg(video_path, paths, srt_path, ass_path, progress_callback, cancel_event)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return paths
+
+
+def run_export_ffmpeg(video_path, paths, srt_path, ass_path, progress_callback=None, cancel_event=None):
+    cmd = ["ffmpeg", "-y", "-i", video_path]
+    if "soft_mp4" in paths:
+        cmd += ["-i", srt_path]
+    if "burned_mp4" in paths:
+        cmd += ["-filter_complex", f"[0:v]{subtitles_filter(ass_path)}[burned]"]
+
+    if "soft_mp4" in paths:
+        cmd += [
+            "-map", "0:v", "-map", "0:a?", "-map", "1:s",
+            "-c:v", "copy", "-c:a", "copy", "-c:s", "mov_text",
+            paths["soft_mp4"],
+        ]
+    if "burned_mp4" in paths:
+        cmd += [
+            "-map", "[burned]", "-map", "0:a?",
+            "-c:a", "copy",
+            paths["burned_mp4"],
+        ]
+    run_ffmpeg(cmd, progress_callback=progress_callback, cancel_event=cancel_event, input_path=video_path)
+
+
+if __name__ == "__main__":
+    video_path = "input.mp4"
+    with open("subtitles.srt", "r", encoding="utf-8") as f:
+        srt_text = f.read()
+    print(export_deliverables(video_path, srt_text, "output"))
@@ -0,0 +1,116 @@
+import os
+import sys
+from pathlib import Path
+import subprocess
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.audio_stream import probe_duration
+
+
+class FFmpegCancelled(Exception):
+    pass
+
+
+def subtitles_filter(subtitle_path):
+    """Build a subtitles= video filter with the path escaped for ffmpeg."""
+    subtitle_path = Path(subtitle_path).resolve().as_posix()
+    if os.name == "nt": #windows
+        subtitle_path = subtitle_path.replace(":", r"\:")
+    return f"subtitles='{subtitle_path}'"
+
+
+def _parse_speed(value):
+    try:
+        return float(value.rstrip("x"))
+    except (ValueError, AttributeError):
+        return None
+
+
+def run_ffmpeg(cmd, duration=None, progress_callback=None, cancel_event=None, input_path=None):
+    """
+    Run an ffmpeg command, reporting progress and allowing cancellation.
+
+    "-progress pipe:1 -nostats" is inserted after the binary name and the
+    key=value blocks ffmpeg writes to stdout are parsed. After each block
+    progress_callback (if given) is called with a dict containing
+    "out_time" (seconds), "percent", "fps", "speed", "eta" (seconds) and
+    "frame"; fields ffmpeg has not reported yet are None.
+
+    duration is the length of the output timeline in seconds; when omitted it
+    is probed from input_path (or the first -i argument).
+    Setting cancel_event terminates ffmpeg and raises FFmpegCancelled.
+    A non-zero exit raises subprocess.CalledProcessError, like run(check=True).
+    """
+    if duration is None:
+        if input_path is None and "-i" in cmd:
+            input_path = cmd[cmd.index("-i") + 1]
+        duration = probe_duration(input_path) if input_path else None
+
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True, bufsize=1)
+
+    # Drain stderr on a thread so a chatty ffmpeg never blocks on a full pipe
+    stderr_tail = []
+
+    def drain_stderr():
+        for line in proc.stderr:
+            stderr_tail.append(line)
+            if len(stderr_tail) > 50:
+                del stderr_tail[0]
+
+    stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+    stderr_thread.start()
+
+    if cancel_event is not None:
+        def watch_cancel():
+            while proc.poll() is None:
+                if cancel_event.wait(0.2):
+                    proc.terminate()
+                    return
+
+        threading.Thread(target=watch_cancel, daemon=True).start()
+
+    started = time.monotonic()
+    block = {}
+    for line in proc.stdout:
+        key, _, value = line.strip().partition("=")
+        if key != "progress":
+            block[key] = value
+            continue
+
+        if progress_callback:
+            out_time = None
+            if block.get("out_time_us", "N/A") not in ("N/A", ""):
+                out_time = max(0, int(block["out_time_us"])) / 1_000_000
+            speed = _parse_speed(block.get("speed"))
+            percent = eta = None
+            if duration and out_time is not None:
+                percent = min(100.0, out_time / duration * 100)
+                if speed:
+                    eta = max(0.0, (duration - out_time) / speed)
+                elif out_time > 0:
+                    eta = (time.monotonic() - started) * (duration - out_time) / out_time
+            try:
+                fps = float(block.get("fps"))
+            except (TypeError, ValueError):
+                fps = None
+            progress_callback({
+                "out_time": out_time,
+                "percent": 100.0 if value == "end" else percent,
+                "fps": fps,
+                "speed": speed,
+                "eta": 0.0 if value == "end" else eta,
+                "frame": int(block["frame"]) if block.get("frame", "").isdigit() else None,
+            })
+        block = {}
+
+    returncode = proc.wait()
+    stderr_thread.join(timeout=1)
+    if cancel_event is not None and cancel_event.is_set():
+        raise FFmpegCancelled("ffmpeg was cancelled")
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, stderr="".join(stderr_tail))
+    return returncode
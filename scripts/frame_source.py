@@ -0,0 +1,98 @@
+import os
+import sys
+from bisect import bisect_right
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.chunked_render import probe_keyframes
+
+
+# Without a keyframe list, decode forward rather than seek when the target
+# is at most this far ahead of the decoder
+SEQUENTIAL_READ_S = 2.0
+
+
+class FrameSource:
+    """
+    One persistent OpenCV decoder over a video, read by timestamp.
+
+    A read picks the cheaper way to the target frame. Decoding forward from
+    where the decoder already is costs (target - position) frames; seeking
+    costs (target - preceding keyframe). So when no keyframe lies between
+    the current position and the target, frames are skipped with grab(),
+    which doesn't convert pixels. Otherwise it seeks. Keyframes come from
+    ffprobe packet flags, read once; without them a short lookahead
+    decides.
+    """
+
+    def __init__(self, video_path, keyframes=None):
+        import cv2
+
+        self.video_path = video_path
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open {video_path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        if keyframes is None:
+            try:
+                keyframes = probe_keyframes(video_path)
+            except Exception:
+                keyframes = []
+        self.keyframes = [round(kf * self.fps) for kf in keyframes]
+        self.next_index = 0  # frame the decoder returns on its next read
+
+    def frame_index(self, ms):
+        index = max(0, round(ms * self.fps / 1000))
+        if self.frame_count:
+            index = min(index, self.frame_count - 1)
+        return index
+
+    def _should_seek(self, index):
+        if index < self.next_index:
+            return True
+        if self.keyframes:
+            i = bisect_right(self.keyframes, index)
+            return i > 0 and self.keyframes[i - 1] > self.next_index
+        return index - self.next_index > SEQUENTIAL_READ_S * self.fps
+
+    def read(self, index):
+        """BGR frame number index, or None past the end."""
+        import cv2
+
+        if self._should_seek(index):
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        else:
+            for _ in range(index - self.next_index):
+                if not self.cap.grab():
+                    break
+        ok, frame = self.cap.read()
+        self.next_index = index + 1
+        return frame if ok else None
+
+    def close(self):
+        self.cap.release()
+
+
+def prepare_frame(frame, width, height, bottom=1.0, fit="cover"):
+    """
+    Shrink a BGR frame to width x height RGB, straight after decoding so
+    only small images are converted and kept. bottom keeps just that
+    fraction of the picture (1/3 is the subtitle area). fit "cover" scales
+    to fill the box and crops the overflow, keeping the aspect ratio, while
+    "stretch" scales to the box exactly.
+    """
+    import cv2
+
+    h = frame.shape[0]
+    if bottom < 1.0:
+        frame = frame[h - max(1, int(h * bottom)):, :, :]
+    h, w = frame.shape[:2]
+    if fit == "cover":
+        scale = max(width / w, height / h)
+        scaled_w, scaled_h = max(width, round(w * scale)), max(height, round(h * scale))
+        frame = cv2.resize(frame, (scaled_w, scaled_h), interpolation=cv2.INTER_AREA)
+        x, y = (scaled_w - width) // 2, (scaled_h - height) // 2
+        frame = frame[y:y + height, x:x + width]
+    else:
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -0,0 +1,61 @@
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules that must not be imported until the user actually needs them
+DEFERRED_MODULES = ("torch", "whisper", "cv2", "PyQt6.QtMultimedia", "PyQt6.QtMultimediaWidgets")
+
+
+def measure_imports(module="UI.mainUI"):
+    """
+    Import module in a fresh interpreter with -X importtime and return
+    ({imported module: cumulative_us}, total_us).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    timings = {}
+    pattern = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+    total = 0
+    for line in result.stderr.splitlines():
+        match = pattern.match(line)
+        if not match:
+            continue
+        cumulative, name = int(match.group(2)), match.group(4)
+        timings[name] = cumulative
+        if len(match.group(3)) == 1:  # top-level import
+            total += cumulative
+    return timings, total
+
+
+def check(module="UI.mainUI", budget_ms=1500):
+    timings, total_us = measure_imports(module)
+    problems = [f"{name} is imported at startup" for name in DEFERRED_MODULES if name in timings]
+    if total_us / 1000 > budget_ms:
+        problems.append(f"importing {module} took {total_us / 1000:.0f} ms (budget {budget_ms} ms)")
+    return problems, timings, total_us
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that the GUI starts without importing heavy modules.")
+    parser.add_argument("--module", default="UI.mainUI")
+    parser.add_argument("--budget-ms", type=int, default=1500)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    problems, timings, total_us = check(args.module, args.budget_ms)
+    print(f"import {args.module}: {total_us / 1000:.0f} ms")
+    for name, us in sorted(timings.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
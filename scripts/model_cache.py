@@ -0,0 +1,137 @@
+import threading
+from collections import OrderedDict
+
+from scripts.backends import DEFAULT_BACKEND, get_backend
+
+
+# Rough resident size of each Whisper checkpoint in fp32, in MB. Used to keep
+# the cache under its memory budget without having to measure live tensors.
+MODEL_SIZES_MB = {
+    "tiny": 150,
+    "tiny.en": 150,
+    "base": 290,
+    "base.en": 290,
+    "small": 970,
+    "small.en": 970,
+    "medium": 3000,
+    "medium.en": 3000,
+    "large": 6200,
+    "large-v1": 6200,
+    "large-v2": 6200,
+    "large-v3": 6200,
+    "large-v3-turbo": 3200,
+    "turbo": 3200,
+}
+
+
+def estimate_model_mb(model_name, precision="fp32"):
+    size = MODEL_SIZES_MB.get(model_name, 1000)
+    if precision == "fp16":
+        return size // 2
+    if precision == "int8":
+        return size // 4
+    return size
+
+
+def default_precision(device, backend=DEFAULT_BACKEND):
+    return get_backend(backend).default_precision(device)
+
+
+class ModelCache:
+    """
+    Process-wide LRU registry of loaded Whisper models, keyed by
+    (model name, device, precision, backend). Models are evicted least recently used
+    first once the estimated total exceeds memory_budget_mb.
+
+    Loads are serialised per key: a second caller asking for a model that is
+    still loading waits for it, while a different model can load alongside.
+    """
+
+    def __init__(self, memory_budget_mb=8000, max_models=None):
+        self.memory_budget_mb = memory_budget_mb
+        self.max_models = max_models
+        self._models = OrderedDict()  # key -> (model, size_mb)
+        self._lock = threading.RLock()
+        self._load_locks = {}  # key -> Lock held while that model loads
+
+    def _load(self, model_name, device, precision, backend):
+        return get_backend(backend).load(model_name, device, precision)
+
+    def get(self, model_name="base", device="cuda", precision=None, backend=DEFAULT_BACKEND):
+        if precision is None:
+            precision = default_precision(device, backend)
+        key = (model_name, device, precision, backend)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+                size_mb = estimate_model_mb(model_name, precision)
+                self._evict_for(size_mb)
+
+            model = self._load(model_name, device, precision, backend)
+            with self._lock:
+                self._models[key] = (model, size_mb)
+                self._load_locks.pop(key, None)
+            return model
+
+    def _evict_for(self, size_mb):
+        while self._models:
+            over_budget = self.used_mb() + size_mb > self.memory_budget_mb
+            over_count = self.max_models is not None and len(self._models) >= self.max_models
+            if not (over_budget or over_count):
+                break
+            key, _ = self._models.popitem(last=False)
+            self._free(key)
+
+    def _free(self, key):
+        device = key[1]
+        if device == "cuda":
+            try:
+                import torch
+                torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    def release(self, model_name, device, precision=None, backend=DEFAULT_BACKEND):
+        if precision is None:
+            precision = default_precision(device, backend)
+        key = (model_name, device, precision, backend)
+        with self._lock:
+            if self._models.pop(key, None) is not None:
+                self._free(key)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._models)
+            self._models.clear()
+            for key in keys:
+                self._free(key)
+
+    def used_mb(self):
+        return sum(size for _, size in self._models.values())
+
+    def keys(self):
+        with self._lock:
+            return list(self._models)
+
+    def __contains__(self, key):
+        return key in self._models
+
+
+_default_cache = ModelCache()
+
+
+def get_model_cache():
+    return _default_cache
+
+
+def get_model(model_name="base", device="cuda", precision=None, backend=DEFAULT_BACKEND):
+    return _default_cache.get(model_name, device, precision, backend)
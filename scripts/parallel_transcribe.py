@@ -0,0 +1,141 @@
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.vad import speech_chunks
+
+
+SAMPLE_RATE = 16000
+
+
+def _init_worker(threads):
+    # Must run before torch spins up its thread pools in this process
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+    except ImportError:
+        return  # torch-free backends go by the environment variables alone
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+
+def _transcribe_chunk(chunk, offset, model_name, device, precision, backend, options):
+    from scripts.model_cache import get_model
+
+    model = get_model(model_name, device, precision, backend)
+    result = model.transcribe(chunk, fp16=precision == "fp16", verbose=None, **options)
+    return offset_segments(result["segments"], offset), result.get("language")
+
+
+def offset_segments(segments, offset):
+    """Shift segment and word timestamps by offset seconds, in place."""
+    if not offset:
+        return segments
+    for segment in segments:
+        segment["start"] += offset
+        segment["end"] += offset
+        for word in segment.get("words", []):
+            word["start"] += offset
+            word["end"] += offset
+    return segments
+
+
+def stitch_segments(chunk_results):
+    """Join per-chunk segment lists (already globally timed) into one result."""
+    segments = []
+    language = None
+    for chunk_segments, chunk_language in chunk_results:
+        language = language or chunk_language
+        segments.extend(chunk_segments)
+    segments.sort(key=lambda s: s["start"])
+    for i, segment in enumerate(segments):
+        segment["id"] = i
+    return {
+        "text": "".join(s["text"] for s in segments),
+        "segments": segments,
+        "language": language,
+    }
+
+
+def transcribe_parallel(audio, model_name="base", device="cpu", precision=None, backend="whisper",
+                        workers=None, threads_per_worker=None, target_chunk_s=120,
+                        **options):
+    """
+    Split audio at silence, drop non-speech, and transcribe the speech
+    chunks concurrently in a process pool. Returns a whisper-style result
+    with timestamps relative to the start of the full audio.
+
+    audio is a 16 kHz float32 array (see SubtitleGenerator.load_audio).
+    Extra keyword options are passed through to model.transcribe.
+    """
+    results = [(segments, language) for _, _, segments, language in iter_transcribe_parallel(
+        audio, model_name, device, precision, backend, workers, threads_per_worker, target_chunk_s, **options)]
+    return stitch_segments(results)
+
+
+def iter_transcribe_parallel(audio, model_name="base", device="cpu", precision=None, backend="whisper",
+                             workers=None, threads_per_worker=None, target_chunk_s=120, should_stop=None,
+                             **options):
+    """
+    Like transcribe_parallel, but yields (chunk_start_s, chunk_end_s,
+    segments, language) for each chunk in audio order, as soon as it and
+    every chunk before it are done. Updates therefore come a chunk (about
+    target_chunk_s of audio) at a time.
+
+    Unless options give a language, the first chunk is transcribed alone
+    and its detected language is passed to every other chunk, so workers
+    don't each re-detect it (and can't disagree). If should_stop() turns
+    True, chunks not yet started are cancelled and the generator ends;
+    workers finish their current chunk in the background and exit.
+    """
+    from scripts.model_cache import default_precision
+
+    precision = precision or default_precision(device, backend)
+    cores = os.cpu_count() or 1
+    workers = workers or max(1, cores // 4)
+    threads_per_worker = threads_per_worker or max(1, cores // workers)
+
+    chunks = speech_chunks(audio, SAMPLE_RATE, target_chunk_s)
+    if not chunks:
+        return
+
+    # Spawned, not forked: the caller may be a Qt process with CUDA already
+    # initialised, and neither survives a fork
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(threads_per_worker,))
+    finished = False
+    try:
+        def submit(index):
+            start, end = chunks[index]
+            return pool.submit(_transcribe_chunk, audio[start:end], start / SAMPLE_RATE,
+                               model_name, device, precision, backend, options)
+
+        pending = {submit(0): 0}
+        submitted = 1
+        if options.get("language"):
+            pending.update((submit(i), i) for i in range(1, len(chunks)))
+            submitted = len(chunks)
+        done = {}
+        next_index = 0
+        while pending:
+            completed, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            if should_stop and should_stop():
+                return
+            for future in completed:
+                done[pending.pop(future)] = future.result()
+            if submitted == 1 and 0 in done:
+                # Language of the first chunk goes to all the others
+                options = dict(options, language=done[0][1])
+                pending.update((submit(i), i) for i in range(1, len(chunks)))
+                submitted = len(chunks)
+            while next_index in done:
+                segments, language = done.pop(next_index)
+                start, end = chunks[next_index]
+                next_index += 1
+                yield start / SAMPLE_RATE, end / SAMPLE_RATE, segments, language
+        finished = True
+    finally:
+        pool.shutdown(wait=finished, cancel_futures=True)
@@ -0,0 +1,91 @@
+from difflib import SequenceMatcher
+
+from scripts.subtitle_document import SubtitleDocument, parse, dumps
+
+
+DRAFT_MODELS = {
+    "small": "tiny",
+    "medium": "base",
+    "large": "base",
+    "turbo": "base",
+}
+
+
+def draft_model_for(model_name):
+    """Small model used for the instant first pass, or None if model_name is already small."""
+    return DRAFT_MODELS.get(model_name)
+
+
+def parse_srt_cues(srt_text):
+    """SubtitleEvents of SRT text; blocks without a valid time line are skipped."""
+    return parse(srt_text, "srt").events
+
+
+def cues_to_srt(cues):
+    return dumps(SubtitleDocument(cues), "srt")
+
+
+def cue_key(cue):
+    """Identity of a cue as the draft pass wrote it: times and text."""
+    return cue.start, cue.end, cue.text
+
+
+def merge_refined_window(srt_text, draft_cues, window_start, window_end, refined_srt):
+    """
+    Replace the draft cues of one audio window with the refined ones.
+
+    draft_cues maps cue_key -> cue for every cue the draft pass produced.
+    A cue belongs to the window when its midpoint falls inside it. Draft
+    cues still in the editor exactly as written are replaced. Anything the
+    user changed is kept: edited or added cues stay as they are, and refined
+    cues that overlap them, or overlap draft cues the user deleted, are
+    dropped so the edit isn't duplicated or undone.
+
+    Returns the new SRT text, renumbered.
+    """
+    window_start, window_end = window_start * 1000, window_end * 1000
+
+    def in_window(cue):
+        return window_start <= (cue.start + cue.end) / 2 < window_end
+
+    current = parse_srt_cues(srt_text)
+    present = {cue_key(cue) for cue in current}
+
+    kept = []
+    protected = []  # (start, end) spans the user has touched
+    for cue in current:
+        if not in_window(cue):
+            kept.append(cue)
+        elif cue_key(cue) not in draft_cues:
+            kept.append(cue)
+            protected.append((cue.start, cue.end))
+    for key, cue in draft_cues.items():
+        if key not in present and in_window(cue):
+            protected.append((cue.start, cue.end))
+
+    for cue in parse_srt_cues(refined_srt):
+        if not any(cue.start < end and start < cue.end for start, end in protected):
+            kept.append(cue)
+
+    kept.sort(key=lambda cue: (cue.start, cue.end))
+    return cues_to_srt(kept)
+
+
+def line_edits(old_text, new_text):
+    """
+    The runs of lines that differ between old_text and new_text, as
+    (start, end, replacement) with start and end positions in old_text.
+    The last edit comes first, so applying them in order never shifts one
+    still to come. Positions count UTF-16 code units, as QTextDocument does.
+    """
+    old_lines = old_text.splitlines(keepends=True)
+    new_lines = new_text.splitlines(keepends=True)
+    offsets = [0]
+    for line in old_lines:
+        offsets.append(offsets[-1] + len(line.encode("utf-16-le")) // 2)
+    edits = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+        if tag != "equal":
+            edits.append((offsets[i1], offsets[i2], "".join(new_lines[j1:j2])))
+    edits.reverse()
+    return edits
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import shutil
+import threading
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "subtitle-generator", "render")
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024 * 1024
+
+
+def hash_file(path, sample_bytes=1024 * 1024):
+    """
+    Fast identity hash of a media file: size, mtime and the first and last
+    sample_bytes of content. Enough to tell sources apart without reading
+    multi-gigabyte files end to end.
+    """
+    st = os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        h.update(f.read(sample_bytes))
+        if st.st_size > sample_bytes:
+            f.seek(max(sample_bytes, st.st_size - sample_bytes))
+            h.update(f.read(sample_bytes))
+    return h.hexdigest()
+
+
+class RenderCache:
+    """
+    On-disk store of encoded video chunks keyed by whatever identifies their
+    content (source hash, chunk range, subtitle events, encoder settings).
+    Least recently used chunks are evicted once the directory exceeds
+    max_bytes; a hit refreshes the chunk's mtime.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts):
+        h = hashlib.blake2b(digest_size=20)
+        for part in parts:
+            h.update(str(part).encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def path_for(self, key, ext):
+        return os.path.join(self.cache_dir, key + ext)
+
+    def get(self, key, ext):
+        """Return the cached chunk path for key, or None."""
+        path = self.path_for(key, ext)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key, ext, chunk_path):
+        """Move a freshly encoded chunk into the cache and return its new path."""
+        path = self.path_for(key, ext)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.move(chunk_path, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def entries(self):
+        """List (file name, size_bytes, last_used) for every chunk, oldest first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((name, st.st_size, st.st_mtime))
+        entries.sort(key=lambda e: e[2])
+        return entries
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            "cache_dir": self.cache_dir,
+            "entries": len(entries),
+            "total_bytes": sum(e[1] for e in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def evict(self):
+        with self._lock:
+            entries = self.entries()
+            total = sum(e[1] for e in entries)
+            for name, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            for name, _, _ in self.entries():
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the rendered chunk cache.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--clear", action="store_true", help="Delete every cached chunk")
+    args = parser.parse_args()
+
+    cache = RenderCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+    for key, value in cache.stats().items():
+        print(f"{key}: {value}")
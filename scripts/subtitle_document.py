@@ -0,0 +1,433 @@
+import io
+
+
+# Times are integer milliseconds throughout; text uses "\n" for line breaks
+# (ASS "\N" is converted on the way in and out), everything else is kept
+# as written, including ASS override tags.
+
+
+class SubtitleEvent:
+    __slots__ = ("start", "end", "text", "style", "layer", "name", "margin_l", "margin_r", "margin_v", "effect",
+                 "comment")
+
+    def __init__(self, start, end, text="", style="Default", layer=0, name="", margin_l=0, margin_r=0, margin_v=0,
+                 effect="", comment=False):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.style = style
+        self.layer = layer
+        self.name = name
+        self.margin_l = margin_l
+        self.margin_r = margin_r
+        self.margin_v = margin_v
+        self.effect = effect
+        self.comment = comment
+
+    def __repr__(self):
+        return f"SubtitleEvent({self.start}, {self.end}, {self.text!r})"
+
+
+# (name in the ASS Format line, attribute, parser, default)
+STYLE_FIELDS = (
+    ("Name", "name", str, "Default"),
+    ("Fontname", "fontname", str, "Arial"),
+    ("Fontsize", "fontsize", "number", 28),
+    ("PrimaryColour", "primary_colour", str, "&HFFFFFF&"),
+    ("SecondaryColour", "secondary_colour", str, "&H000000&"),
+    ("OutlineColour", "outline_colour", str, "&H000000&"),
+    ("BackColour", "back_colour", str, "&H000000&"),
+    ("Bold", "bold", int, -1),
+    ("Italic", "italic", int, 0),
+    ("Underline", "underline", int, 0),
+    ("StrikeOut", "strikeout", int, 0),
+    ("ScaleX", "scale_x", "number", 100),
+    ("ScaleY", "scale_y", "number", 100),
+    ("Spacing", "spacing", "number", 0),
+    ("Angle", "angle", "number", 0),
+    ("BorderStyle", "border_style", int, 1),
+    ("Outline", "outline", "number", 2),
+    ("Shadow", "shadow", "number", 0),
+    ("Alignment", "alignment", int, 2),
+    ("MarginL", "margin_l", int, 10),
+    ("MarginR", "margin_r", int, 10),
+    ("MarginV", "margin_v", int, 30),
+    ("Encoding", "encoding", int, 0),
+)
+_STYLE_BY_KEY = {field[0].lower(): field for field in STYLE_FIELDS}
+
+EVENT_FORMAT = ("Layer", "Start", "End", "Style", "Name", "MarginL", "MarginR", "MarginV", "Effect", "Text")
+
+
+class SubtitleStyle:
+    __slots__ = tuple(field[1] for field in STYLE_FIELDS)
+
+    def __init__(self, **values):
+        for _, attr, _, default in STYLE_FIELDS:
+            setattr(self, attr, values.pop(attr, default))
+        if values:
+            raise TypeError(f"Unknown style fields: {', '.join(values)}")
+
+    def __repr__(self):
+        return f"SubtitleStyle({self.name!r}, {self.fontname!r}, {self.fontsize})"
+
+
+class SubtitleDocument:
+    """
+    Events plus, for ASS, the styles and [Script Info] entries. Sections
+    this model doesn't know (e.g. [Fonts]) are kept as raw lines so an ASS
+    file survives a round trip.
+    """
+    __slots__ = ("events", "styles", "info", "extra_sections")
+
+    def __init__(self, events=None, styles=None, info=None):
+        self.events = events if events is not None else []
+        self.styles = styles if styles is not None else {}
+        self.info = info if info is not None else dict(DEFAULT_INFO)
+        self.extra_sections = []  # (section header, [lines])
+
+
+DEFAULT_INFO = {"ScriptType": "v4.00+", "Collisions": "Normal", "PlayResX": "1920", "PlayResY": "1080"}
+
+
+# --- times ---
+
+def parse_time(text):
+    """
+    Milliseconds from an SRT (H:MM:SS,mmm), VTT (MM:SS.mmm or H:MM:SS.mmm)
+    or ASS (H:MM:SS.cc) timestamp.
+    """
+    text = text.strip()
+    whole, _, frac = text.replace(",", ".").rpartition(".")
+    if not whole:
+        whole, frac = frac, ""
+    parts = whole.split(":")
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    ms = int((frac + "00")[:3]) if frac else 0
+    return seconds * 1000 + ms
+
+
+def format_srt_time(ms):
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+
+
+def format_vtt_time(ms):
+    return format_srt_time(ms).replace(",", ".")
+
+
+def format_ass_time(ms):
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:01}:{m:02}:{s:02}.{ms // 10:02}"
+
+
+def _fast_time(t):
+    # HH:MM:SS,mmm / HH:MM:SS.mmm, the shape every writer produces
+    return (int(t[0:2]) * 3600 + int(t[3:5]) * 60 + int(t[6:8])) * 1000 + int(t[9:12])
+
+
+def _parse_time_line(line):
+    """(start_ms, end_ms) from an SRT/VTT timing line, ignoring any cue settings after it."""
+    if len(line) >= 29 and line[12:17] == " --> " and line[2] == ":" and line[19] == ":":
+        try:
+            return _fast_time(line[0:12]), _fast_time(line[17:29])
+        except ValueError:
+            pass
+    start, _, rest = line.partition("-->")
+    end = rest.split()[0]
+    return parse_time(start), parse_time(end)
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+# --- parsing ---
+
+def detect_format(first_line):
+    line = first_line.lstrip("﻿").strip()
+    if line.upper().startswith("WEBVTT"):
+        return "vtt"
+    if line.startswith("["):
+        return "ass"
+    return "srt"
+
+
+def iter_srt(lines):
+    """
+    Yield a SubtitleEvent per SRT cue from an iterable of lines, in one
+    pass. Cue numbers are ignored and every text line up to the blank line
+    ending the cue is kept.
+    """
+    start = end = None
+    text = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if start is None:
+            if "-->" in line:
+                try:
+                    start, end = _parse_time_line(line)
+                except (ValueError, IndexError):
+                    start = None
+            continue
+        if line.strip():
+            text.append(line)
+            continue
+        yield SubtitleEvent(start, end, "\n".join(text))
+        start = None
+        text = []
+    if start is not None:
+        yield SubtitleEvent(start, end, "\n".join(text))
+
+
+def iter_vtt(lines):
+    """Yield a SubtitleEvent per WebVTT cue; NOTE, STYLE and REGION blocks are skipped."""
+    lines = iter(lines)
+    for line in lines:  # header runs to the first blank line
+        if not line.strip():
+            break
+    block = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip():
+            block.append(line)
+            continue
+        event = _vtt_block(block)
+        if event is not None:
+            yield event
+        block = []
+    event = _vtt_block(block)
+    if event is not None:
+        yield event
+
+
+def _vtt_block(block):
+    for i, line in enumerate(block[:2]):
+        if "-->" in line:
+            start, end = _parse_time_line(line)
+            return SubtitleEvent(start, end, "\n".join(block[i + 1:]))
+    return None
+
+
+def parse_style_line(line, fields=None):
+    """SubtitleStyle from an ASS 'Style:' line, given the section's Format field names."""
+    fields = fields or [field[0] for field in STYLE_FIELDS]
+    values = line.split(":", 1)[1].split(",", len(fields) - 1)
+    style = SubtitleStyle()
+    for key, value in zip(fields, values):
+        field = _STYLE_BY_KEY.get(key.strip().lower())
+        if field is None:
+            continue
+        _, attr, parser, default = field
+        value = value.strip()
+        try:
+            setattr(style, attr, _number(value) if parser == "number" else parser(value))
+        except ValueError:
+            setattr(style, attr, default)
+    return style
+
+
+def parse_event_line(line, fields=EVENT_FORMAT):
+    """SubtitleEvent from an ASS 'Dialogue:'/'Comment:' line, given the Format field names."""
+    kind, _, rest = line.partition(":")
+    values = rest.split(",", len(fields) - 1)
+    comment = kind.strip().lower() == "comment"
+    if len(values) == 10 and tuple(fields) == EVENT_FORMAT:
+        # The layout every writer uses: unpack directly
+        layer, start, end, style, name, margin_l, margin_r, margin_v, effect, text = values
+        try:
+            return SubtitleEvent(parse_time(start), parse_time(end), text.replace("\\N", "\n"), style.strip(),
+                                 int(layer), name.strip(), int(margin_l), int(margin_r), int(margin_v),
+                                 effect.strip(), comment)
+        except ValueError:
+            pass
+    event = SubtitleEvent(0, 0, comment=comment)
+    for key, value in zip(fields, values):
+        key = key.strip().lower()
+        if key == "text":
+            event.text = value.replace("\\N", "\n")
+        elif key == "start":
+            event.start = parse_time(value)
+        elif key == "end":
+            event.end = parse_time(value)
+        elif key == "style":
+            event.style = value.strip()
+        elif key == "name":
+            event.name = value.strip()
+        elif key == "effect":
+            event.effect = value.strip()
+        elif key in ("layer", "marginl", "marginr", "marginv"):
+            try:
+                number = int(value)
+            except ValueError:
+                number = 0
+            attr = {"layer": "layer", "marginl": "margin_l", "marginr": "margin_r", "marginv": "margin_v"}[key]
+            setattr(event, attr, number)
+    return event
+
+
+def parse_ass(lines, document=None):
+    """Read ASS lines into a SubtitleDocument (or the one given), in one pass."""
+    document = document or SubtitleDocument(info={})
+    section = None
+    style_fields = None
+    event_fields = EVENT_FORMAT
+    for line in lines:
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if not stripped or stripped.startswith(";"):
+            continue
+        if stripped.startswith("[") and stripped.endswith("]"):
+            section = stripped.lower()
+            if section not in ("[script info]", "[v4+ styles]", "[v4 styles]", "[events]"):
+                document.extra_sections.append((stripped, []))
+            continue
+        if section == "[events]":
+            if stripped.startswith(("Dialogue:", "Comment:")):
+                try:
+                    document.events.append(parse_event_line(stripped, event_fields))
+                except ValueError:
+                    continue  # malformed timestamp
+            elif stripped.lower().startswith("format:"):
+                event_fields = tuple(f.strip() for f in stripped.split(":", 1)[1].split(","))
+        elif section in ("[v4+ styles]", "[v4 styles]"):
+            if stripped.lower().startswith("style:"):
+                style = parse_style_line(stripped, style_fields)
+                document.styles[style.name] = style
+            elif stripped.lower().startswith("format:"):
+                style_fields = [f.strip() for f in stripped.split(":", 1)[1].split(",")]
+        elif section == "[script info]":
+            key, sep, value = stripped.partition(":")
+            if sep:
+                document.info[key.strip()] = value.strip()
+        elif document.extra_sections:
+            document.extra_sections[-1][1].append(line)
+    return document
+
+
+def parse(text, fmt=None):
+    """Parse SRT, VTT or ASS text (format detected from the first line if not given)."""
+    return parse_lines(io.StringIO(text), fmt)
+
+
+def parse_lines(lines, fmt=None):
+    lines = iter(lines)
+    first = next(lines, "")
+    fmt = fmt or detect_format(first)
+
+    def all_lines():
+        yield first.lstrip("﻿")
+        yield from lines
+
+    if fmt == "ass":
+        return parse_ass(all_lines())
+    events = list(iter_vtt(all_lines()) if fmt == "vtt" else iter_srt(all_lines()))
+    return SubtitleDocument(events)
+
+
+def load(path, fmt=None):
+    """Parse a subtitle file, streaming it line by line."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return parse_lines(f, fmt)
+
+
+# --- writing ---
+
+class _BufferedWriter:
+    """Collects small strings and hands them to the file in large blocks."""
+
+    def __init__(self, f, block=4096):
+        self.f = f
+        self.block = block
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+        if len(self.parts) >= self.block:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.f.write("".join(self.parts))
+            self.parts = []
+
+
+def write_srt(events, f, start_index=1):
+    out = _BufferedWriter(f)
+    for i, event in enumerate(events, start_index):
+        out.write(f"{i}\n{format_srt_time(event.start)} --> {format_srt_time(event.end)}\n{event.text}\n\n")
+    out.flush()
+
+
+def write_vtt(events, f):
+    out = _BufferedWriter(f)
+    out.write("WEBVTT\n\n")
+    for event in events:
+        out.write(f"{format_vtt_time(event.start)} --> {format_vtt_time(event.end)}\n{event.text}\n\n")
+    out.flush()
+
+
+def style_line(style):
+    values = []
+    for _, attr, parser, _ in STYLE_FIELDS:
+        value = getattr(style, attr)
+        values.append(_format_number(value) if parser == "number" else str(value))
+    return "Style: " + ",".join(values)
+
+
+def event_line(event):
+    kind = "Comment" if event.comment else "Dialogue"
+    return (f"{kind}: {event.layer},{format_ass_time(event.start)},{format_ass_time(event.end)},{event.style},"
+            f"{event.name},{event.margin_l},{event.margin_r},{event.margin_v},{event.effect},"
+            f"{event.text.replace(chr(10), chr(92) + 'N')}")
+
+
+def write_ass(document, f):
+    out = _BufferedWriter(f)
+    out.write("[Script Info]\n")
+    for key, value in (document.info or DEFAULT_INFO).items():
+        out.write(f"{key}: {value}\n")
+    out.write("\n[V4+ Styles]\nFormat: " + ", ".join(field[0] for field in STYLE_FIELDS) + "\n")
+    for style in (document.styles or {"Default": SubtitleStyle()}).values():
+        out.write(style_line(style) + "\n")
+    for header, lines in document.extra_sections:
+        out.write(f"\n{header}\n")
+        for line in lines:
+            out.write(line + "\n")
+    out.write("\n[Events]\nFormat: " + ", ".join(EVENT_FORMAT) + "\n")
+    for event in document.events:
+        out.write(event_line(event) + "\n")
+    out.flush()
+
+
+WRITERS = {"srt": lambda doc, f: write_srt(doc.events, f), "vtt": lambda doc, f: write_vtt(doc.events, f),
+           "ass": write_ass}
+
+
+def dump(document, f, fmt):
+    WRITERS[fmt](document, f)
+
+
+def dumps(document, fmt):
+    f = io.StringIO()
+    dump(document, f, fmt)
+    return f.getvalue()
+
+
+def save(document, path, fmt=None):
+    fmt = fmt or path.rsplit(".", 1)[-1].lower()
+    with open(path, "w", encoding="utf-8") as f:
+        dump(document, f, fmt)
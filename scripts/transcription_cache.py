@@ -0,0 +1,124 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "subtitle-generator", "transcripts")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def hash_audio(audio):
+    """Fast content hash of a decoded float32 audio array."""
+    audio = np.ascontiguousarray(audio)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(audio.dtype).encode())
+    h.update(memoryview(audio).cast("B"))
+    return h.hexdigest()
+
+
+def make_key(audio_hash, model_name, task="transcribe", **options):
+    """Cache key for an audio hash plus everything that changes Whisper's output."""
+    settings = json.dumps({"model": model_name, "task": task, **options}, sort_keys=True, default=str)
+    return hashlib.blake2b(f"{audio_hash}:{settings}".encode(), digest_size=16).hexdigest()
+
+
+class TranscriptionCache:
+    """
+    Persistent on-disk cache of raw Whisper results (including word
+    timestamps), stored as gzipped JSON. Entries are evicted least recently
+    used first once the directory exceeds max_bytes; a hit refreshes the
+    entry's mtime.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json.gz")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, default=float)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self):
+        """List (key, size_bytes, last_used) for every entry, oldest first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json.gz"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((name[:-len(".json.gz")], st.st_size, st.st_mtime))
+        entries.sort(key=lambda e: e[2])
+        return entries
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            "cache_dir": self.cache_dir,
+            "entries": len(entries),
+            "total_bytes": sum(e[1] for e in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def evict(self):
+        with self._lock:
+            entries = self.entries()
+            total = sum(e[1] for e in entries)
+            for key, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self._path(key))
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            for key, _, _ in self.entries():
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the transcription cache.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--clear", action="store_true", help="Delete every cached transcription")
+    args = parser.parse_args()
+
+    cache = TranscriptionCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+    for key, value in cache.stats().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,82 @@
+import json
+import os
+
+
+class TranscriptionJournal:
+    """
+    Append-only checkpoint file for a transcription in progress, one JSON
+    object per line. The first line names the job (a key built from the
+    audio hash and every setting that changes the output); each later line
+    records one finished window: the audio offset reached plus whatever
+    state the caller needs to carry on from there.
+
+    Lines are flushed and fsynced as they are written, so after a crash the
+    file holds every checkpoint but possibly a torn last line, which load()
+    ignores and start() cuts off.
+    """
+
+    def __init__(self, path, job_key):
+        self.path = path
+        self.job_key = job_key
+        self._file = None
+        self._valid_bytes = 0
+
+    def load(self):
+        """Return the checkpoints of this job, oldest first ([] if none or for a different job)."""
+        self._valid_bytes = 0
+        records = []
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return records
+        with f:
+            header = f.readline()
+            try:
+                if not header.endswith(b"\n") or json.loads(header).get("job") != self.job_key:
+                    return records
+            except ValueError:
+                return records
+            valid = len(header)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                valid += len(line)
+        self._valid_bytes = valid
+        return records
+
+    def start(self):
+        """Open for appending after the last good checkpoint, or start a fresh journal."""
+        if self._valid_bytes:
+            self._file = open(self.path, "r+b")
+            self._file.truncate(self._valid_bytes)
+            self._file.seek(self._valid_bytes)
+        else:
+            self._file = open(self.path, "wb")
+            self._write({"job": self.job_key})
+
+    def checkpoint(self, offset, **state):
+        if self._file is None:
+            self.start()
+        self._write({"offset": offset, **state})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, default=float).encode("utf-8") + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        """The job completed: the journal is no longer needed."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
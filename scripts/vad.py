@@ -0,0 +1,150 @@
+import numpy as np
+
+
+# Speech threshold, as a fraction of the way from the quiet frames (10th
+# percentile) to the loud ones (99th percentile of the audible frames)
+THRESHOLD_FRACTION = 0.4
+# Below this spread between quiet and loud frames the audible part of the
+# recording is one steady level (speech buried in a constant bed) and
+# nothing can be told apart
+MIN_DYNAMIC_RANGE_DB = 2.0
+# Frames at or below this are digital silence or close to it, never speech
+SILENCE_DB = -60.0
+
+
+def frame_energy_db(audio, sample_rate=16000, frame_ms=30):
+    """Per-frame RMS energy in dBFS, computed with a single reshape."""
+    frame_len = int(sample_rate * frame_ms / 1000)
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32), frame_len
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1) + 1e-10)
+    return 20 * np.log10(rms), frame_len
+
+
+def is_silent(audio, sample_rate=16000, frame_ms=30, floor_db=SILENCE_DB):
+    """True if no frame of audio is louder than floor_db. Audio shorter
+    than one frame holds nothing worth transcribing and counts as silent."""
+    energy, _ = frame_energy_db(audio, sample_rate, frame_ms)
+    return len(energy) == 0 or float(energy.max()) <= floor_db
+
+
+def detect_speech_spans(audio, sample_rate=16000, frame_ms=30, threshold_db=None,
+                        min_silence_ms=500, min_speech_ms=250, padding_ms=200):
+    """
+    Cheap energy-based voice activity detection.
+
+    Returns a list of (start_sample, end_sample) spans that contain speech.
+    Frames at or below SILENCE_DB never count as speech, and audio with
+    nothing louder than that has no spans. When threshold_db is None it
+    adapts to the recording: frames more than THRESHOLD_FRACTION of the way
+    from the 10th percentile of all frames to the 99th percentile of the
+    audible ones count as speech. Taking the loud level from the audible
+    frames alone keeps a few short bursts in hours of silence detectable,
+    and a loud noise floor or music bed raises the bar instead of hiding
+    everything under it.
+
+    When the audible frames are one steady level, speech can't be told
+    apart from the bed and the whole audio is returned as one span, so
+    callers transcribe it rather than silently dropping it.
+    """
+    whole = [(0, len(audio))] if len(audio) else []
+    energy, frame_len = frame_energy_db(audio, sample_rate, frame_ms)
+    audible = energy > SILENCE_DB
+    if not audible.any():
+        return []
+
+    if threshold_db is None:
+        quiet = np.percentile(energy, 10)
+        loud = np.percentile(energy[audible], 99)
+        if loud - quiet < MIN_DYNAMIC_RANGE_DB:
+            return whole
+        threshold_db = quiet + THRESHOLD_FRACTION * (loud - quiet)
+    voiced = energy > max(threshold_db, SILENCE_DB)
+
+    # Fill short silences so a pause between words does not end a span
+    min_silence_frames = max(1, min_silence_ms // frame_ms)
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+
+    gaps = starts[1:] - ends[:-1]
+    keep = np.concatenate(([True], gaps >= min_silence_frames))
+    merged_starts = starts[keep]
+    merged_ends = np.concatenate((ends[:-1][keep[1:]], [ends[-1]]))
+
+    min_speech_frames = max(1, min_speech_ms // frame_ms)
+    long_enough = (merged_ends - merged_starts) >= min_speech_frames
+
+    pad = int(sample_rate * padding_ms / 1000)
+    spans = []
+    for s, e in zip(merged_starts[long_enough], merged_ends[long_enough]):
+        start = max(0, int(s) * frame_len - pad)
+        end = min(len(audio), int(e) * frame_len + pad)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def group_spans(spans, sample_rate=16000, target_chunk_s=120, max_gap_s=2.0):
+    """
+    Merge neighbouring speech spans into chunks of roughly target_chunk_s
+    seconds, splitting only at silences. Short gaps are kept inside a chunk
+    so whisper still sees natural pauses.
+    """
+    target = int(target_chunk_s * sample_rate)
+    max_gap = int(max_gap_s * sample_rate)
+    chunks = []
+    for start, end in spans:
+        if chunks:
+            c_start, c_end = chunks[-1]
+            if start - c_end <= max_gap and end - c_start <= target:
+                chunks[-1] = (c_start, end)
+                continue
+        chunks.append((start, end))
+    return chunks
+
+
+def quietest_cut(audio, sample_rate=16000, search_from=0, frame_ms=30):
+    """
+    Sample index of the quietest frame in audio[search_from:], used to end a
+    window in a pause rather than mid-word. Returns len(audio) if the search
+    region is shorter than one frame.
+    """
+    energy, frame_len = frame_energy_db(audio[search_from:], sample_rate, frame_ms)
+    if len(energy) == 0:
+        return len(audio)
+    return search_from + int(np.argmin(energy)) * frame_len + frame_len // 2
+
+
+def split_long_chunks(chunks, audio, sample_rate=16000, max_chunk_s=30, search_s=5):
+    """
+    Cut any chunk longer than max_chunk_s at its quietest points so every
+    piece fits in one Whisper window.
+    """
+    limit = int(max_chunk_s * sample_rate)
+    search_from = limit - int(min(search_s, max_chunk_s / 2) * sample_rate)
+    pieces = []
+    for start, end in chunks:
+        while end - start > limit:
+            cut = start + quietest_cut(audio[start:start + limit], sample_rate, search_from)
+            pieces.append((start, cut))
+            start = cut
+        pieces.append((start, end))
+    return pieces
+
+
+def speech_chunks(audio, sample_rate=16000, target_chunk_s=30):
+    """
+    Chunks of at most target_chunk_s seconds to transcribe: the speech
+    spans grouped at silences, and any longer piece cut at its quietest
+    points. Silence between the spans is never sent to the model.
+    """
+    spans = detect_speech_spans(audio, sample_rate)
+    chunks = group_spans(spans, sample_rate, target_chunk_s=target_chunk_s)
+    return split_long_chunks(chunks, audio, sample_rate, max_chunk_s=target_chunk_s)
@@ -0,0 +1,162 @@
+import numpy as np
+
+
+class WordTable:
+    """
+    Columnar view of a word-level Whisper result.
+
+    Word timings live in float arrays, word text in one string buffer indexed
+    by offsets, so any run of words i..j-1 is a single slice. Segmentations
+    are expressed as an int array of boundaries (group start indices followed
+    by len(table)), and every splitting pass works on those arrays instead of
+    per-word dicts.
+    """
+
+    __slots__ = ("start", "end", "probability", "segment", "text", "offsets", "segment_bounds", "language")
+
+    def __init__(self, start, end, probability, segment, text, offsets, segment_bounds, language=None):
+        self.start = start
+        self.end = end
+        self.probability = probability
+        self.segment = segment
+        self.text = text
+        self.offsets = offsets
+        self.segment_bounds = segment_bounds
+        self.language = language
+
+    @classmethod
+    def from_result(cls, result):
+        """Build the table from whisper's result dict (word_timestamps=True)."""
+        starts, ends, probs, seg_ids, pieces = [], [], [], [], []
+        seg_bounds = [0]
+        for seg_index, segment in enumerate(result["segments"]):
+            for word in segment.get("words") or ():
+                starts.append(word["start"])
+                ends.append(word["end"])
+                probs.append(word.get("probability", 1.0))
+                seg_ids.append(seg_index)
+                pieces.append(word["word"])
+            if len(starts) > seg_bounds[-1]:
+                seg_bounds.append(len(starts))
+
+        lengths = np.fromiter((len(p) for p in pieces), dtype=np.int64, count=len(pieces))
+        offsets = np.zeros(len(pieces) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        return cls(
+            start=np.asarray(starts, dtype=np.float64),
+            end=np.asarray(ends, dtype=np.float64),
+            probability=np.asarray(probs, dtype=np.float32),
+            segment=np.asarray(seg_ids, dtype=np.int32),
+            text="".join(pieces),
+            offsets=offsets,
+            segment_bounds=np.asarray(seg_bounds, dtype=np.int64),
+            language=result.get("language"),
+        )
+
+    def __len__(self):
+        return len(self.start)
+
+    def words_text(self, i, j):
+        """Joined text of words i..j-1 (whisper words carry their own spacing)."""
+        return self.text[self.offsets[i]:self.offsets[j]]
+
+    def _group_ids(self, bounds):
+        return np.repeat(np.arange(len(bounds) - 1), np.diff(bounds))
+
+    def split_by_word_count(self, max_words, bounds=None):
+        """Cut every group into runs of at most max_words words."""
+        bounds = self.segment_bounds if bounds is None else bounds
+        n = len(self)
+        if n == 0:
+            return bounds
+        group_ids = self._group_ids(bounds)
+        position = np.arange(n) - bounds[group_ids]
+        new_bounds = np.flatnonzero(position % max_words == 0)
+        return np.append(new_bounds, n)
+
+    def split_by_duration(self, max_duration, bounds=None):
+        """
+        Close a run at the first word whose end is max_duration or more after
+        the run's first start, the same rule as
+        SubtitleGenerator.split_subtitle_segments_by_duration. In a group whose
+        word ends never go backwards each cut is one searchsorted, so the cost
+        scales with the number of output runs rather than the number of words;
+        groups with overlapping, out-of-order ends are walked word by word.
+        """
+        bounds = self.segment_bounds if bounds is None else bounds
+        n = len(self)
+        if n == 0:
+            return bounds
+
+        # Positions p where end[p + 1] < end[p]
+        drops = np.flatnonzero(np.diff(self.end) < 0)
+        new_bounds = []
+        for g in range(len(bounds) - 1):
+            i, stop = int(bounds[g]), int(bounds[g + 1])
+            monotonic = np.searchsorted(drops, i) == np.searchsorted(drops, stop - 1)
+            while i < stop:
+                new_bounds.append(i)
+                k = self._first_end_after(i, stop, max_duration, monotonic)
+                i = k + 1
+        new_bounds.append(n)
+        return np.asarray(new_bounds, dtype=np.int64)
+
+    def _first_end_after(self, i, stop, max_duration, monotonic):
+        """First k in [i, stop) with end[k] - start[i] >= max_duration, or stop - 1."""
+        first = self.start[i]
+        if not monotonic:
+            for k in range(i, stop):
+                if self.end[k] - first >= max_duration:
+                    return k
+            return stop - 1
+        ends = self.end[i:stop]
+        k = int(np.searchsorted(ends, first + max_duration, side="left"))
+        # first + max_duration can round differently from end - first; settle
+        # on the exact comparison the scalar rule makes
+        while k > 0 and ends[k - 1] - first >= max_duration:
+            k -= 1
+        while k < len(ends) and ends[k] - first < max_duration:
+            k += 1
+        return i + min(k, len(ends) - 1)
+
+    def line_breaks(self, i, j, max_words=None, max_chars=None):
+        """
+        Start indices of the lines for words i..j-1, wrapping at max_words
+        words or max_chars characters per line (whichever comes first).
+        """
+        if not max_words and not max_chars:
+            return [i]
+        breaks = []
+        k = i
+        while k < j:
+            breaks.append(k)
+            stop = j
+            if max_words:
+                stop = min(stop, k + max_words)
+            if max_chars:
+                limit = self.offsets[k] + max_chars
+                # Always keep at least one word per line
+                stop = min(stop, max(k + 1, int(np.searchsorted(self.offsets, limit, side="right")) - 1))
+            k = stop
+        return breaks
+
+    def to_segments(self, bounds, include_words=True):
+        """Expand a segmentation back into whisper-style segment dicts."""
+        segments = []
+        for g in range(len(bounds) - 1):
+            i, j = int(bounds[g]), int(bounds[g + 1])
+            segment = {
+                "id": g + 1,
+                "start": float(self.start[i]),
+                "end": float(self.end[j - 1]),
+                "text": self.words_text(i, j).strip(),
+            }
+            if include_words:
+                segment["words"] = [
+                    {"word": self.words_text(k, k + 1), "start": float(self.start[k]),
+                     "end": float(self.end[k]), "probability": float(self.probability[k])}
+                    for k in range(i, j)
+                ]
+            segments.append(segment)
+        return segments
@@ -0,0 +1,108 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.ass_index import AssLineIndex
+
+SCRIPT = """[Script Info]
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize
+Style: Default, Arial, 28
+Style: Top, Verdana, 40
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,One
+Dialogue: 0,0:00:02.00,0:00:04.00,Top,,0,0,0,,Two, with a comma
+Comment: 0,0:00:03.00,0:00:05.00,Default,,0,0,0,,Note
+Dialogue: 1,0:00:05.00,0:00:06.00,Default,,0,0,0,,Three
+Dialogue: 0,0:00:07.00,0:00:09.00,Top,,0,0,0,,Four"""
+
+
+def apply_change(index, text, position, chars_removed, added):
+    """Mirror ASSPreview.apply_contents_change for an edit to text; returns the new text."""
+    new_text = text[:position] + added + text[position + chars_removed:]
+    new_lines = new_text.split("\n")
+    first = text[:position].count("\n")
+    last = new_text[:position + len(added)].count("\n")
+    removed = last - first + 1 - (len(new_lines) - len(text.split("\n")))
+    index.replace(first, removed, new_lines[first:last + 1])
+    return new_text
+
+
+def snapshot(index):
+    def describe(entry):
+        if entry is None:
+            return None
+        return type(entry).__name__, tuple(getattr(entry, attr) for attr in type(entry).__slots__)
+
+    lines = [describe(index.entry(number)) for number in range(len(index))]
+    on_screen = [[describe(event) for event in index.cues.at(ms)] for ms in range(0, 10000, 250)]
+    styles = {name: describe(style) for name, style in index.styles.items()}
+    return lines, on_screen, styles
+
+
+def offset_of_line(text, number):
+    return sum(len(line) + 1 for line in text.split("\n")[:number])
+
+
+def dialogue_line(text, contains):
+    return next(i for i, line in enumerate(text.split("\n")) if contains in line)
+
+
+@pytest.mark.parametrize("edit", ["insert", "insert_many", "delete", "delete_many", "edit", "edit_across_lines"])
+def test_incremental_update_matches_a_full_parse(edit):
+    text = SCRIPT
+    index = AssLineIndex(text.split("\n"))
+    two = offset_of_line(text, dialogue_line(text, "Two"))
+    three = offset_of_line(text, dialogue_line(text, "Three"))
+
+    if edit == "insert":
+        text = apply_change(index, text, two, 0, "Dialogue: 2,0:00:02.50,0:00:08.00,Top,,0,0,0,,Inserted\n")
+    elif edit == "insert_many":
+        added = "".join(f"Dialogue: 0,0:00:0{s}.10,0:00:0{s}.90,Default,,0,0,0,,Pasted {s}\n" for s in range(1, 9))
+        text = apply_change(index, text, three, 0, added)
+    elif edit == "delete":
+        text = apply_change(index, text, two, three - two, "")
+    elif edit == "delete_many":
+        text = apply_change(index, text, two, len(text) - two, "")
+    elif edit == "edit":
+        position = text.index("Two, with")
+        text = apply_change(index, text, position, 3, "Deux")
+        position = text.index("0:00:04.00")
+        text = apply_change(index, text, position, 10, "0:00:08.00")
+    else:
+        # Select from inside one event to inside the next and type over it
+        start = text.index("One") + 1
+        end = text.index("Two") + 1
+        text = apply_change(index, text, start, end - start, "ne\nDialogue: 0,0:00:02.00,0:00:04.00,Default,,0,0,0,,T")
+
+    assert index.lines == text.split("\n")
+    assert snapshot(index) == snapshot(AssLineIndex(text.split("\n")))
+
+
+def test_editing_a_style_or_format_line_matches_a_full_parse():
+    text = SCRIPT
+    index = AssLineIndex(text.split("\n"))
+    position = text.index("Verdana")
+    text = apply_change(index, text, position, len("Verdana"), "Georgia")
+    assert snapshot(index) == snapshot(AssLineIndex(text.split("\n")))
+
+    # Swapping Start and End in the Format line changes how every event reads
+    position = text.index("Layer, Start, End")
+    text = apply_change(index, text, position, len("Layer, Start, End"), "Layer, End, Start")
+    assert snapshot(index) == snapshot(AssLineIndex(text.split("\n")))
+
+
+def test_typing_a_line_one_character_at_a_time():
+    text = SCRIPT
+    index = AssLineIndex(text.split("\n"))
+    position = len(text)
+    for char in "\nDialogue: 0,0:00:08.00,0:00:09.50,Top,,0,0,0,,Typed":
+        text = apply_change(index, text, position, 0, char)
+        position += 1
+        assert snapshot(index) == snapshot(AssLineIndex(text.split("\n")))
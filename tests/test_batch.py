@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.batch import find_inputs, main, output_bases
+
+
+def test_same_names_in_different_folders_get_separate_outputs(tmp_path):
+    source = tmp_path / "videos"
+    for folder in ("a", "b"):
+        (source / folder).mkdir(parents=True)
+        (source / folder / "intro.mp4").write_bytes(b"")
+    inputs = find_inputs(str(source))
+    bases = output_bases(inputs, str(tmp_path / "out"), str(source))
+
+    assert sorted(bases.values()) == [str(tmp_path / "out" / "a" / "intro"), str(tmp_path / "out" / "b" / "intro")]
+
+
+def test_manifest_inputs_are_placed_relative_to_their_common_folder(tmp_path):
+    inputs = [str(tmp_path / "x" / "one.mp4"), str(tmp_path / "x" / "y" / "one.mkv")]
+    bases = output_bases(inputs, "out")
+    assert bases == {inputs[0]: os.path.join("out", "one"), inputs[1]: os.path.join("out", "y", "one")}
+
+
+def test_unknown_formats_are_rejected_before_any_work(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(tmp_path), "-o", str(tmp_path / "out"), "--formats", "srt,vttt"])
+    assert exit_info.value.code == 2
+    assert "vttt" in capsys.readouterr().err
+    assert not (tmp_path / "out").exists()
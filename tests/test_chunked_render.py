@@ -0,0 +1,71 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import scripts.chunked_render as chunked_render
+from scripts.chunked_render import chunk_content_key, plan_chunks, probe_keyframes, smart_encode_args
+from scripts.subtitle_document import parse_ass
+
+
+def h264(**overrides):
+    stream = {"codec_name": "h264", "profile": "High", "level": 41, "refs": 4,
+              "pix_fmt": "yuv420p", "width": 1920, "height": 1080}
+    stream.update(overrides)
+    return stream
+
+
+def test_h264_encode_matches_source_parameters():
+    encode_args, copy_args = smart_encode_args(h264())
+    assert encode_args == ["-c:v", "libx264", "-profile:v", "high", "-level", "4.1",
+                           "-x264-params", "ref=4", "-pix_fmt", "yuv420p", "-s:v", "1920x1080",
+                           "-f", "mpegts"]
+    assert copy_args == ["-bsf:v", "h264_mp4toannexb", "-f", "mpegts"]
+
+
+def test_hevc_level_and_refs_go_through_x265_params():
+    encode_args, _ = smart_encode_args({"codec_name": "hevc", "profile": "Main 10", "level": 123, "refs": 1,
+                                        "pix_fmt": "yuv420p10le", "width": 3840, "height": 2160})
+    assert encode_args[:4] == ["-c:v", "libx265", "-profile:v", "main10"]
+    assert encode_args[encode_args.index("-x265-params") + 1] == "level-idc=4.1:ref=1"
+
+
+@pytest.mark.parametrize("stream", [
+    h264(codec_name="vp9"),
+    h264(profile="High 4:4:4 Predictive"),
+    h264(pix_fmt="yuv420p10le"),  # 10-bit in an 8-bit profile
+    h264(level=None),
+    h264(width=None),
+])
+def test_unmatched_streams_are_refused(stream):
+    with pytest.raises(ValueError):
+        smart_encode_args(stream)
+
+
+def test_chunk_key_covers_every_field_but_the_times():
+    def key(dialogue, start=10.0, fmt="Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"):
+        return chunk_content_key(parse_ass(["[Events]", "Format: " + fmt, dialogue]), start, start + 10)
+
+    base = key("Dialogue: 0,0:00:12.00,0:00:14.00,Default,,0,0,0,,Hello, world")
+    assert key("Dialogue: 1,0:00:12.00,0:00:14.00,Default,,0,0,0,,Hello, world") != base
+    assert key("Dialogue: 0,0:00:12.00,0:00:14.00,Default,,0,0,5,,Hello, world") != base
+    assert key("Dialogue: 0,0:00:12.00,0:00:14.00,Default,,0,0,0,,Hello, world!") != base
+    assert key("Dialogue: 0,0:00:12.00,0:00:14.00,Default,,0,0,0,,Hello, world") == base
+    # Same event in another field order, and shifted along with its chunk
+    assert key("Dialogue: 0,Default,0:00:12.00,0:00:14.00,,0,0,0,,Hello, world",
+               fmt="Layer, Style, Start, End, Name, MarginL, MarginR, MarginV, Effect, Text") == base
+    assert key("Dialogue: 0,0:00:22.00,0:00:24.00,Default,,0,0,0,,Hello, world", start=20.0) == base
+
+
+def test_keyframes_of_an_offset_stream_are_relative_to_the_file_start(monkeypatch):
+    # An MPEG-TS capture whose clock starts at 1.4 s, keyframes every 2 s
+    out = "".join(f"packet,{1.4 + i * 0.5:.6f},{'K_' if i % 4 == 0 else '__'}\n" for i in range(20))
+    out += "packet,N/A,K_\nformat,1.400000\n"
+    monkeypatch.setattr(chunked_render.subprocess, "run",
+                        lambda cmd, **kwargs: subprocess.CompletedProcess(cmd, 0, stdout=out, stderr=""))
+    keyframes = probe_keyframes("capture.ts")
+
+    assert keyframes == pytest.approx([0.0, 2.0, 4.0, 6.0, 8.0])
+    assert all(start in keyframes for start, _ in plan_chunks(keyframes, 10.0, 3.0))
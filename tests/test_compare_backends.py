@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.backends import BACKENDS, DEFAULT_BACKEND
+from scripts.compare_backends import compare_word_timings, main
+
+
+def result(*words):
+    return {"segments": [{"words": [{"word": word, "start": start, "end": end} for word, start, end in words]}]}
+
+
+def test_matching_words_are_compared_by_timing():
+    reference = result(("Hello", 0.0, 0.5), (" world.", 0.5, 1.0), (" Again", 2.0, 2.4))
+    candidate = result((" hello", 0.1, 0.5), ("World", 0.5, 1.3), (" extra", 1.5, 1.8))
+    stats = compare_word_timings(reference, candidate)
+
+    assert stats["reference_words"] == 3 and stats["candidate_words"] == 3
+    assert stats["matched"] == pytest.approx(2 / 3)
+    assert stats["start_mean"] == pytest.approx(0.05)
+    assert stats["start_max"] == pytest.approx(0.1)
+    assert stats["end_max"] == pytest.approx(0.3)
+
+
+def test_no_common_words():
+    stats = compare_word_timings(result(("a", 0, 1)), {"segments": []})
+    assert stats["matched"] == 0 and stats["start_max"] == 0.0
+
+
+def test_installed_backends_agree_with_the_reference():
+    # Needs real speech and real models: point SUBTITLE_TEST_MEDIA at a short clip
+    media = os.environ.get("SUBTITLE_TEST_MEDIA")
+    if not media or not os.path.exists(media):
+        pytest.skip("SUBTITLE_TEST_MEDIA is not set")
+    if not BACKENDS[DEFAULT_BACKEND].is_available():
+        pytest.skip(f"reference backend {DEFAULT_BACKEND} is not installed")
+    if not any(backend.is_available() for name, backend in BACKENDS.items() if name != DEFAULT_BACKEND):
+        pytest.skip("no other backend is installed")
+    assert main([media, "--model", "tiny"]) == 0
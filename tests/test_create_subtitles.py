@@ -0,0 +1,96 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import scripts.create_subtitles as create_subtitles
+from scripts.create_subtitles import SubtitleGenerator
+
+SR = 16000
+
+
+class FakeModel:
+    """Returns one segment spanning each window and records the calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append((len(audio), options.get("language")))
+        duration = len(audio) / SR
+        text = f" window {len(self.calls)}"
+        words = [{"word": text, "start": 0.0, "end": duration, "probability": 1.0}]
+        return {"text": text, "language": "en",
+                "segments": [{"start": 0.0, "end": duration, "text": text, "words": words}]}
+
+
+def make_generator(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(create_subtitles, "get_model", lambda *args, **kwargs: model)
+    return SubtitleGenerator(device="cpu", cache=False), model
+
+
+def music_bed(seconds, seed=0):
+    # A steady level VAD can't split into speech and silence
+    return np.random.default_rng(seed).normal(0, 0.1, int(seconds * SR)).astype(np.float32)
+
+
+def test_audio_without_detectable_speech_is_still_transcribed(monkeypatch):
+    generator, model = make_generator(monkeypatch)
+    audio = music_bed(75)
+    windows = list(generator.iter_transcribe_windows(audio, chunk_s=30))
+
+    assert windows[0][0] == 0.0 and windows[-1][1] == len(audio) / SR
+    assert all(end - start <= 30 for start, end, _ in windows)
+    assert sum(len(segments) for _, _, segments in windows) == len(model.calls) == 3
+    assert len(generator.last_result["segments"]) == 3
+
+
+def test_short_speech_bursts_in_silence_are_all_that_is_transcribed(monkeypatch):
+    generator, model = make_generator(monkeypatch)
+    audio = music_bed(600) * 0.01  # quiet background, -60 dBFS
+    bursts = (60, 250, 480)
+    for second in bursts:
+        audio[second * SR:(second + 2) * SR] *= 100  # 2 s of speech at -20 dBFS
+    windows = list(generator.iter_transcribe_windows(audio, chunk_s=30))
+
+    assert len(windows) == len(bursts)
+    for (start, end, _), second in zip(windows, bursts):
+        assert second - 0.5 < start <= second and second + 2 <= end < second + 2.5
+    assert sum(length for length, _ in model.calls) < 8 * SR
+
+
+def test_language_is_detected_once(monkeypatch):
+    generator, model = make_generator(monkeypatch)
+    list(generator.iter_transcribe_windows(music_bed(95), chunk_s=30))
+
+    assert [language for _, language in model.calls] == [None] + ["en"] * (len(model.calls) - 1)
+
+
+def test_stream_transcribes_every_audible_window_in_one_language(monkeypatch):
+    generator, model = make_generator(monkeypatch)
+    audio = music_bed(90)
+    audio[20 * SR:80 * SR] = 0  # a silent minute in the middle
+    windows = list(generator.iter_transcribe_stream(audio, window_s=30))
+
+    skipped = [position for segments, position in windows if not segments]
+    assert skipped and all(20 < position <= 80 for position in skipped)
+    assert len(model.calls) == len(windows) - len(skipped)
+    assert [language for _, language in model.calls] == [None] + ["en"] * (len(model.calls) - 1)
+    assert generator.stream_state["language"] == "en"
+
+
+def test_cached_results_are_kept_per_precision(monkeypatch, tmp_path):
+    from scripts.transcription_cache import TranscriptionCache
+
+    model = FakeModel()
+    monkeypatch.setattr(create_subtitles, "get_model", lambda *args, **kwargs: model)
+    cache = TranscriptionCache(str(tmp_path))
+    audio = music_bed(20)
+    SubtitleGenerator(device="cpu", cache=cache).transcribe(audio)
+    SubtitleGenerator(device="cpu", cache=cache).transcribe(audio)
+    assert len(model.calls) == 1
+
+    SubtitleGenerator(device="cpu", precision="int8", cache=cache).transcribe(audio)
+    assert len(model.calls) == 2
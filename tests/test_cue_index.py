@@ -0,0 +1,72 @@
+import os
+import sys
+import random
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.cue_index import CueIndex
+from scripts.subtitle_document import SubtitleEvent
+
+
+def brute_force(events, ms):
+    active = [event for event in events if not event.comment and event.start <= ms < event.end]
+    return sorted(active, key=lambda event: (event.layer, event.start))
+
+
+def test_overlapping_cues_come_back_in_render_order():
+    low = SubtitleEvent(1000, 5000, "low", layer=0)
+    high = SubtitleEvent(2000, 3000, "high", layer=1)
+    later = SubtitleEvent(2500, 4000, "later", layer=0)
+    index = CueIndex([high, later, low])
+    assert index.at(2600) == [low, later, high]
+    assert index.at(3500) == [low, later]
+
+
+def test_long_cue_over_many_short_ones():
+    # One cue for the whole film lands in its own duration class
+    title = SubtitleEvent(0, 3_600_000, "title")
+    lines = [SubtitleEvent(t, t + 1500, f"line {t}") for t in range(0, 3_600_000, 2000)]
+    index = CueIndex(lines + [title])
+    assert index.at(1_000_500) == [title, lines[500]]
+    assert index.at(1_001_700) == [title]
+    assert index.at(3_600_000) == []
+
+    rng = random.Random(0)
+    events = [SubtitleEvent(start, start + rng.choice((40, 900, 5000, 60000, 900000)))
+              for start in (rng.randrange(0, 2_000_000) for _ in range(2000))]
+    index = CueIndex(events)
+    for ms in [rng.randrange(0, 3_000_000) for _ in range(300)]:
+        assert index.at(ms) == brute_force(events, ms)
+
+
+def test_start_is_inclusive_and_end_exclusive():
+    event = SubtitleEvent(1000, 2000, "cue")
+    following = SubtitleEvent(2000, 3000, "next")
+    index = CueIndex([event, following])
+    assert index.at(999) == []
+    assert index.at(1000) == [event]
+    assert index.at(1999) == [event]
+    assert index.at(2000) == [following]
+
+
+def test_empty_index_and_unshown_events():
+    assert CueIndex().at(0) == []
+    index = CueIndex([SubtitleEvent(0, 1000, comment=True), SubtitleEvent(500, 500)])
+    assert len(index) == 0 and index.at(500) == []
+
+
+def test_add_and_remove_keep_lookups_exact():
+    rng = random.Random(1)
+    events = [SubtitleEvent(rng.randrange(0, 100_000), 0) for _ in range(500)]
+    for event in events:
+        event.end = event.start + rng.randrange(1, 20_000)
+    index = CueIndex(events)
+    removed = events[::3]
+    for event in removed:
+        index.remove(event)
+    index.remove(SubtitleEvent(0, 10))  # unknown: ignored
+    kept = [event for event in events if event not in removed]
+    extra = SubtitleEvent(50_000, 51_000, "added")
+    index.add(extra)
+    kept.append(extra)
+    for ms in range(0, 120_000, 997):
+        assert index.at(ms) == brute_force(kept, ms)
@@ -0,0 +1,66 @@
+import os
+import sys
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.daemon import DaemonHandler, JobScheduler
+
+
+class RecordingScheduler(JobScheduler):
+    """No runners, so submitted jobs stay queued where the test can see them."""
+
+    def __init__(self):
+        super().__init__(runners=0)
+        self.jobs = []
+
+    def submit(self, job):
+        super().submit(job)
+        self.jobs.append(job)
+
+
+@pytest.fixture
+def server():
+    DaemonHandler.scheduler = RecordingScheduler()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), DaemonHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(server, path, payload):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}{path}",
+                                     data=json.dumps(payload).encode("utf-8"), method="POST")
+    return urllib.request.urlopen(request, timeout=5)
+
+
+def test_resegment_errors_come_back_as_json(server, tmp_path):
+    for payload in ({}, {"words_path": str(tmp_path / "missing.json")}):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(server, "/resegment", payload)
+        assert error.value.code == 400
+        assert "error" in json.load(error.value)
+
+
+def test_queued_job_is_cancelled_when_client_disconnects(server, tmp_path):
+    media = tmp_path / "clip.wav"
+    media.write_bytes(b"")
+    body = json.dumps({"media_path": str(media)}).encode("utf-8")
+    with socket.create_connection(("127.0.0.1", server.server_port)) as sock:
+        sock.sendall(b"POST /transcribe HTTP/1.1\r\nHost: localhost\r\n"
+                     + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        sock.recv(1024)  # response headers: the job is queued
+    jobs = DaemonHandler.scheduler.jobs
+    deadline = time.monotonic() + 5
+    while not (jobs and jobs[0].cancelled.is_set()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert jobs and jobs[0].cancelled.is_set()
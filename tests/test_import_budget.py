@@ -0,0 +1,23 @@
+import os
+import sys
+from importlib.util import find_spec
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.import_budget import check
+
+
+@pytest.mark.parametrize("module", [
+    "UI.mainUI",
+    "scripts.create_subtitles",
+    "scripts.add_subtitles_to_video",
+    "scripts.daemon",
+    "scripts.backends",
+    "scripts.progressive",
+])
+def test_startup_imports_stay_within_budget(module):
+    if module.startswith("UI.") and find_spec("PyQt6") is None:
+        pytest.skip("PyQt6 is not installed")
+    problems, _, _ = check(module)
+    assert problems == []
@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.progressive import line_edits
+
+
+def apply(text, edits):
+    # Positions are UTF-16 code units, as in a QTextDocument
+    units = text.encode("utf-16-le")
+    for start, end, replacement in edits:
+        units = units[:start * 2] + replacement.encode("utf-16-le") + units[end * 2:]
+    return units.decode("utf-16-le")
+
+
+def test_edits_rebuild_the_new_text_touching_only_changed_lines():
+    old = "1\n00:00:01,000 --> 00:00:02,000\nHi 👋\n\n2\n00:00:03,000 --> 00:00:04,000\nDraft\n\n"
+    new = "1\n00:00:01,000 --> 00:00:02,000\nHi 👋\n\n2\n00:00:03,000 --> 00:00:04,500\nRefined\n\n"
+    edits = line_edits(old, new)
+    assert apply(old, edits) == new
+    # Everything before the second cue's time line is left alone
+    assert min(start for start, _, _ in edits) == len(old.split("00:00:03")[0].encode("utf-16-le")) // 2
+
+
+def test_edits_apply_back_to_front():
+    old = "a\nb\nc\nd\n"
+    new = "A\nb\nc\nD\ne\n"
+    edits = line_edits(old, new)
+    assert [start for start, _, _ in edits] == sorted((start for start, _, _ in edits), reverse=True)
+    assert apply(old, edits) == new
+    assert line_edits(new, new) == []
@@ -0,0 +1,64 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.subtitle_document import dumps, parse
+
+
+def cues(document):
+    return [(event.start, event.end, event.text) for event in document.events]
+
+
+def test_srt_multi_line_cues_round_trip():
+    srt = ("1\n00:00:01,000 --> 00:00:02,500\nFirst line\nsecond line\n\n"
+           "2\n00:00:03,000 --> 00:00:04,000\n- Who?\n- Me.\n- Really?\n\n")
+    document = parse(srt, "srt")
+    assert cues(document) == [(1000, 2500, "First line\nsecond line"), (3000, 4000, "- Who?\n- Me.\n- Really?")]
+    assert dumps(document, "srt") == srt
+
+
+def test_srt_without_a_final_blank_line_keeps_the_last_cue():
+    document = parse("1\n00:00:01,000 --> 00:00:02,000\nLast\nwords", "srt")
+    assert cues(document) == [(1000, 2000, "Last\nwords")]
+
+
+def test_vtt_header_notes_and_cue_settings_stay_out_of_the_text():
+    vtt = ("﻿WEBVTT - Lecture 3\nKind: captions\nLanguage: en\n\n"
+           "NOTE written by hand\nspanning two lines\n\n"
+           "STYLE\n::cue { color: yellow }\n\n"
+           "intro\n00:01.000 --> 00:02.500 align:start position:10% line:0\nHello\nthere\n\n"
+           "01:00:03.000 --> 01:00:04.000 size:50%\nBye\n")
+    document = parse(vtt)
+    expected = [(1000, 2500, "Hello\nthere"), (3603000, 3604000, "Bye")]
+    assert cues(document) == expected
+    # Written back out as plain VTT, and read again unchanged
+    written = dumps(document, "vtt")
+    assert written.startswith("WEBVTT\n\n")
+    assert cues(parse(written)) == expected
+
+
+def test_ass_with_another_format_order_and_commas_in_text():
+    ass = ("[Script Info]\nScriptType: v4.00+\nPlayResX: 1280\n\n"
+           "[V4+ Styles]\n"
+           "Format: Name, Fontsize, Fontname, PrimaryColour, Bold, Alignment, MarginV\n"
+           "Style: Top, 40, Verdana, &H00FFFF&, 0, 8, 12\n\n"
+           "[Events]\n"
+           "Format: Layer, Style, Start, End, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+           "Dialogue: 1,Top,0:00:01.50,0:00:03.00,Ann,0,0,20,,Well, well, {\\i1}well{\\i0}\\Nnext line\n"
+           "Comment: 0,Top,0:00:04.00,0:00:05.00,,0,0,0,,not shown, ever\n")
+    document = parse(ass)
+    style = document.styles["Top"]
+    assert (style.fontname, style.fontsize, style.alignment, style.margin_v) == ("Verdana", 40, 8, 12)
+    assert style.outline == 2  # not in the Format line: default kept
+    first, comment = document.events
+    assert (first.start, first.end, first.layer, first.style, first.name, first.margin_v) == (1500, 3000, 1, "Top",
+                                                                                           "Ann", 20)
+    assert first.text == "Well, well, {\\i1}well{\\i0}\nnext line"
+    assert comment.comment and comment.text == "not shown, ever"
+    assert document.info["PlayResX"] == "1280"
+
+    again = parse(dumps(document, "ass"))
+    assert cues(again) == cues(document)
+    assert [(e.layer, e.style, e.name, e.margin_v, e.comment) for e in again.events] == \
+           [(e.layer, e.style, e.name, e.margin_v, e.comment) for e in document.events]
+    assert again.styles["Top"].fontname == "Verdana" and again.info == document.info
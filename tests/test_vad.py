@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.vad import detect_speech_spans
+
+SR = 16000
+
+
+def noise(seconds, rms, seed=0):
+    return np.random.default_rng(seed).normal(0, rms, int(seconds * SR)).astype(np.float32)
+
+
+def test_speech_over_quiet_background():
+    audio = noise(20, 0.001)
+    audio[5 * SR:8 * SR] += noise(3, 0.2, seed=1)
+    spans = detect_speech_spans(audio, SR)
+    assert len(spans) == 1
+    start, end = spans[0]
+    assert 4.5 * SR < start < 5 * SR and 8 * SR < end < 8.5 * SR
+
+
+def test_speech_a_few_db_over_a_loud_bed_is_found():
+    # Steady -20 dBFS bed with bursts 3.5 dB louder
+    envelope = np.ones(20 * SR, dtype=np.float32)
+    for second in range(2, 18, 4):
+        envelope[second * SR:(second + 2) * SR] = 10 ** (3.5 / 20)
+    spans = detect_speech_spans(noise(20, 0.1) * envelope, SR)
+    assert len(spans) == 4
+
+
+def test_sparse_speech_in_long_silence_is_found():
+    # 3 s of speech in 10 minutes: the 90th percentile is still background
+    audio = noise(600, 0.001)
+    audio[300 * SR:303 * SR] += noise(3, 0.2, seed=1)
+    spans = detect_speech_spans(audio, SR)
+    assert len(spans) == 1 and sum(end - start for start, end in spans) < 4 * SR
+
+
+def test_steady_bed_returns_the_whole_audio():
+    assert detect_speech_spans(noise(10, 0.1), SR) == [(0, 10 * SR)]
+
+
+def test_silence_has_no_speech():
+    assert detect_speech_spans(np.zeros(5 * SR, dtype=np.float32), SR) == []
+    assert detect_speech_spans(noise(5, 0.0001), SR) == []
+    assert detect_speech_spans(np.zeros(10, dtype=np.float32), SR) == []
+    assert detect_speech_spans(np.zeros(0, dtype=np.float32), SR) == []
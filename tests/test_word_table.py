@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.word_table import WordTable
+
+
+def reference_split_by_duration(result, max_duration):
+    """The original per-word loop, as run boundaries."""
+    bounds, index = [], 0
+    for segment in result["segments"]:
+        current_start = None
+        for word in segment["words"]:
+            if current_start is None:
+                current_start = word["start"]
+                bounds.append(index)
+            if word["end"] - current_start >= max_duration:
+                current_start = None
+            index += 1
+    return bounds + [index]
+
+
+def random_result(rng, monotonic):
+    segments, t = [], 0.0
+    for _ in range(rng.integers(1, 30)):
+        words = []
+        for _ in range(rng.integers(1, 40)):
+            start = t + rng.uniform(-0.3, 0.6)
+            end = start + rng.uniform(0.01, 2.5)
+            words.append({"word": " w", "start": start, "end": end})
+            t = end if monotonic else t + rng.uniform(0.0, 0.8)
+        segments.append({"words": words})
+    return {"segments": segments}
+
+
+def test_split_by_duration_matches_the_word_loop():
+    rng = np.random.default_rng(0)
+    for trial in range(400):
+        result = random_result(rng, monotonic=trial % 2 == 0)
+        table = WordTable.from_result(result)
+        for max_duration in (0.5, 1.7, 3.0, 10.0):
+            assert table.split_by_duration(max_duration).tolist() == \
+                reference_split_by_duration(result, max_duration)
+
+
+def test_split_by_word_count():
+    result = {"segments": [{"words": [{"word": " w", "start": i, "end": i + 1} for i in range(7)]},
+                           {"words": [{"word": " w", "start": 9, "end": 10}]}]}
+    assert WordTable.from_result(result).split_by_word_count(3).tolist() == [0, 3, 6, 7, 8]